@@ -1,10 +1,15 @@
 import streamlit as st
-import pandas as pd
 import numpy as np
-import joblib
-import matplotlib.pyplot as plt
 from pathlib import Path
 
+from ibov.artifacts import ArimaParams, has_artifact, load_artifact
+from ibov.ingest import read_investing_ohlcv
+from ibov.lazy import lazy_import
+from ibov.scenarios import fan_chart
+from ibov.trading_calendar import b3_calendar
+
+plt = lazy_import('matplotlib.pyplot')
+
 # =========================
 # CONFIGURAÇÃO DA PÁGINA
 # =========================
@@ -21,41 +26,32 @@ st.write("Aplicação desenvolvida para o Tech Challenge – Fase 4")
 # =========================
 DATA_PATH = Path("data/Dados Históricos - Ibovespa 2005-2025.csv")
 MODEL_PATH = Path("model/modelo_ibov.pkl")
+# Maior |log-return| diário plausível (o pior pregão desde 2005 foi ~-0,16);
+# acima disso o fechamento foi mal lido (ex.: separador de milhar)
+MAX_LOG_RETURN = 0.3
 
 # =========================
 # CARREGAMENTO DOS DADOS
 # =========================
 @st.cache_data
 def carregar_dados():
-    df = pd.read_csv(DATA_PATH)
-
-    # Normalizar colunas
-    df.columns = df.columns.str.strip()
-
-    # Converter data
-    df["Data"] = pd.to_datetime(
-        df["Data"],
-        format="%d/%m/%Y",
-        errors="coerce"
-    )
-
-    # Criar Fechamento
-    if "Último" not in df.columns:
-        st.error("Coluna 'Último' não encontrada no CSV.")
+    # Export do Investing.com: milhar com ".", decimal com "," (39.950 → 39950.0)
+    df = read_investing_ohlcv(DATA_PATH)
+    if df.empty:
+        st.error("Nenhuma cotação válida encontrada no CSV.")
         st.stop()
+    df = df.rename(columns={"date": "Data", "close": "Fechamento"})
 
-    df["Fechamento"] = (
-        df["Último"]
-        .astype(str)
-        .str.replace(".", "", regex=False)
-        .str.replace(",", ".", regex=False)
-    )
-
-    df["Fechamento"] = pd.to_numeric(df["Fechamento"], errors="coerce")
-
-    df = df.dropna(subset=["Data", "Fechamento"])
-    df = df.sort_values("Data")
+    # Só pregões da B3 (o export traz cópias do dia anterior em alguns feriados)
+    df = b3_calendar().align(df, "Data")
 
+    saltos = np.log(df["Fechamento"]).diff().abs() > MAX_LOG_RETURN
+    if saltos.any():
+        st.error(
+            f"{int(saltos.sum())} log-returns diários acima de {MAX_LOG_RETURN} "
+            f"(primeiro em {df['Data'][saltos].iloc[0]:%d/%m/%Y}): fechamentos mal lidos no CSV."
+        )
+        st.stop()
     return df
 
 
@@ -64,9 +60,27 @@ def carregar_dados():
 # =========================
 @st.cache_resource
 def carregar_modelo():
+    # Formato rápido (model/modelo_ibov/: header.json + .npy mapeados em
+    # memória) quando exportado com `python -m ibov.artifacts export`
+    if has_artifact(MODEL_PATH):
+        return load_artifact(MODEL_PATH)
+    import joblib  # só no fallback (unpickle)
+
     return joblib.load(MODEL_PATH)
 
 
+# =========================
+# CENÁRIOS (MONTE CARLO)
+# =========================
+@st.cache_data
+def simular_cenarios(horizonte, n_caminhos, bootstrap, ultimo_preco, ultimo_retorno, ultima_data):
+    fan = fan_chart(
+        carregar_modelo(), ultimo_preco, ultimo_retorno,
+        horizon=horizonte, n_paths=n_caminhos, bootstrap=bootstrap, seed=42
+    )
+    return fan.to_frame(ultima_data)
+
+
 # =========================
 # EXECUÇÃO
 # =========================
@@ -108,10 +122,49 @@ else:
 
     previsao = modelo.predict(X_input)[0]
 
+    proximo_pregao = b3_calendar().next_trading_day(df_lr["Data"].iloc[-1])
     st.metric(
-        label="Log-return previsto",
+        label=f"Log-return previsto para o pregão de {proximo_pregao:%d/%m/%Y}",
         value=f"{previsao:.6f}"
     )
 
+# =========================
+# CENÁRIOS DE PREÇO
+# =========================
+if len(df_lr) >= 1 and isinstance(modelo, ArimaParams):
+    st.subheader("🌪️ Cenários de Preço (Monte Carlo)")
+
+    c1, c2, c3 = st.columns(3)
+    horizonte = c1.slider("Dias à frente", 5, 120, 60, step=5)
+    n_caminhos = c2.select_slider(
+        "Caminhos simulados", options=[10_000, 50_000, 100_000, 200_000], value=100_000
+    )
+    bootstrap = c3.checkbox("Reamostrar resíduos do ARIMA", value=False)
+
+    cenarios = simular_cenarios(
+        horizonte, n_caminhos, bootstrap,
+        float(df["Fechamento"].iloc[-1]), float(df_lr["log_return"].iloc[-1]),
+        df["Data"].iloc[-1]
+    )
+
+    fig_fan, ax_fan = plt.subplots()
+    historico = df.tail(120)
+    ax_fan.plot(historico["Data"], historico["Fechamento"], color="black", label="Histórico")
+    ax_fan.fill_between(cenarios.index, cenarios["q05"], cenarios["q95"], alpha=0.2, label="5% – 95%")
+    ax_fan.fill_between(cenarios.index, cenarios["q25"], cenarios["q75"], alpha=0.4, label="25% – 75%")
+    ax_fan.plot(cenarios.index, cenarios["q50"], label="Mediana")
+    ax_fan.set_xlabel("Data")
+    ax_fan.set_ylabel("Ibovespa")
+    ax_fan.grid(True)
+    ax_fan.legend()
+    st.pyplot(fig_fan)
+
+    final = cenarios.iloc[-1]
+    st.write(
+        f"Em {horizonte} pregões: mediana **{final['q50']:,.0f}** pontos, "
+        f"intervalo de 90% entre **{final['q05']:,.0f}** e **{final['q95']:,.0f}**; "
+        f"probabilidade de fechar acima do último valor: **{final['prob_up']:.1%}**."
+    )
+
 st.caption("Modelo treinado na Fase 2 e aplicado em ambiente Streamlit Cloud.")
 
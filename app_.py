@@ -1,11 +1,16 @@
 import streamlit as st
 import pandas as pd
 import numpy as np
-import joblib
-import plotly.graph_objects as go
-from plotly.subplots import make_subplots
 from pathlib import Path
 
+from ibov.artifacts import has_artifact, load_artifact
+from ibov.ingest import data_version, read_investing_ohlcv
+from ibov.lazy import lazy_function, lazy_import
+from ibov.rollups import build_rollups
+
+go = lazy_import('plotly.graph_objects')
+make_subplots = lazy_function('plotly.subplots', 'make_subplots')
+
 # =========================
 # CONFIGURAÇÃO DA PÁGINA
 # =========================
@@ -51,37 +56,11 @@ MODEL_PATH = Path("model/modelo_ibov.pkl")
 # =========================
 @st.cache_data
 def carregar_dados():
-    df = pd.read_csv(DATA_PATH)
-
-    # Normalizar colunas
-    df.columns = df.columns.str.strip()
-
-    # Converter data
-    df["Data"] = pd.to_datetime(
-        df["Data"],
-        format="%d/%m/%Y",
-        errors="coerce",
-    )
-
-    # Criar Fechamento
-    if "Último" not in df.columns:
-        st.error("Coluna 'Último' não encontrada no CSV.")
+    # OHLCV do export do Investing.com (candles com máxima/mínima reais)
+    df = read_investing_ohlcv(DATA_PATH)
+    if df.empty:
+        st.error("Nenhuma cotação válida encontrada no CSV.")
         st.stop()
-
-    df["Fechamento"] = (
-        df["Último"]
-        .astype(str)
-        .str.replace(".", "", regex=False)
-        .str.replace(",", ".", regex=False)
-    )
-    df["Fechamento"] = pd.to_numeric(df["Fechamento"], errors="coerce")
-
-    df = df.dropna(subset=["Data", "Fechamento"])
-    df = df.sort_values("Data")
-
-    # Renomear para padrão usado nas visualizações avançadas
-    df = df.rename(columns={"Data": "date", "Fechamento": "close"})
-
     return df
 
 
@@ -90,6 +69,12 @@ def carregar_dados():
 # =========================
 @st.cache_resource
 def carregar_modelo():
+    # Formato rápido (model/modelo_ibov/: header.json + .npy mapeados em
+    # memória) quando exportado com `python -m ibov.artifacts export`
+    if has_artifact(MODEL_PATH):
+        return load_artifact(MODEL_PATH)
+    import joblib  # só no fallback (unpickle)
+
     return joblib.load(MODEL_PATH)
 
 
@@ -126,6 +111,15 @@ def create_features(df_temp: pd.DataFrame) -> pd.DataFrame:
 
 df_feat = create_features(df).dropna()
 
+
+@st.cache_resource
+def carregar_rollups(_df, version):
+    """Séries diária/semanal/mensal com MAs, calculadas uma vez por versão do CSV"""
+    return build_rollups(create_features(_df), extra=("ma5", "ma20", "ma50"))
+
+
+rollups = carregar_rollups(df, data_version(DATA_PATH))
+
 # =========================
 # SIDEBAR – CONTROLES
 # =========================
@@ -189,65 +183,70 @@ tab1, tab2, tab3 = st.tabs(
 with tab1:
     st.subheader("Série Histórica com Médias Móveis")
 
-    fig = go.Figure()
+    # Resolução escolhida pelo tamanho do período (diária, semanal ou mensal)
+    resolucao, df_plot = rollups.select(df_filtered["date"].min(), df_filtered["date"].max())
 
-    # Série de preços filtrada
-    fig.add_trace(
-        go.Scatter(
-            x=df_filtered["date"],
-            y=df_filtered["close"],
-            name="Ibovespa",
-            line=dict(color="#38bdf8", width=2),
-        )
-    )
+    fig = go.Figure()
 
-    # Filtrar features para mesmo período
-    if not df_filtered.empty:
-        df_feat_filtered = df_feat[
-            df_feat["date"].between(
-                df_filtered["date"].min(),
-                df_filtered["date"].max(),
+    if resolucao == "Diário":
+        fig.add_trace(
+            go.Scatter(
+                x=df_plot["date"],
+                y=df_plot["close"],
+                name="Ibovespa",
+                line=dict(color="#38bdf8", width=2),
             )
-        ]
+        )
     else:
-        df_feat_filtered = df_feat
+        fig.add_trace(
+            go.Candlestick(
+                x=df_plot["date"],
+                open=df_plot["open"],
+                high=df_plot["high"],
+                low=df_plot["low"],
+                close=df_plot["close"],
+                name="Ibovespa",
+            )
+        )
 
-    # Médias móveis
+    # Médias móveis (último valor de cada período)
     fig.add_trace(
         go.Scatter(
-            x=df_feat_filtered["date"],
-            y=df_feat_filtered["ma5"],
+            x=df_plot["date"],
+            y=df_plot["ma5"],
             name="MA5",
             line=dict(color="#fbbf24", dash="dash"),
         )
     )
     fig.add_trace(
         go.Scatter(
-            x=df_feat_filtered["date"],
-            y=df_feat_filtered["ma20"],
+            x=df_plot["date"],
+            y=df_plot["ma20"],
             name="MA20",
             line=dict(color="#f87171"),
         )
     )
     fig.add_trace(
         go.Scatter(
-            x=df_feat_filtered["date"],
-            y=df_feat_filtered["ma50"],
+            x=df_plot["date"],
+            y=df_plot["ma50"],
             name="MA50",
             line=dict(color="#10b981"),
         )
     )
 
     fig.update_layout(
-        title="Ibovespa - Série Histórica com Médias Móveis",
+        title=f"Ibovespa - Série Histórica com Médias Móveis ({resolucao})",
         xaxis_title="Data",
         yaxis_title="Índice",
         template="plotly_dark",
         hovermode="x unified",
         height=500,
+        xaxis_rangeslider_visible=False,
     )
 
     st.plotly_chart(fig, use_container_width=True)
+    st.caption(f"{len(df_plot)} pontos ({resolucao.lower()}) para {len(df_filtered)} pregões")
 
 # -------------------------
 # TAB 2 – INDICADORES
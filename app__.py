@@ -1,14 +1,20 @@
 import streamlit as st
 import pandas as pd
 import numpy as np
-import pickle
-import json
 from datetime import datetime
-import plotly.graph_objects as go
-from plotly.subplots import make_subplots
 import warnings
 warnings.filterwarnings('ignore')
 
+from ibov.features import build_features, create_features
+from ibov.ingest import data_version
+from ibov.lazy import lazy_function, lazy_import
+from ibov.model_bundle import FeatureSchemaError
+from ibov.registry import open_model
+from ibov.rollups import build_rollups
+
+go = lazy_import('plotly.graph_objects')
+make_subplots = lazy_function('plotly.subplots', 'make_subplots')
+
 # Configuração da página
 st.set_page_config(
     page_title='IBOVESPA Prediction Dashboard',
@@ -45,26 +51,28 @@ st.markdown('---')
 # Carregar modelo e dados
 @st.cache_resource
 def load_model_and_data():
-    with open('best_model.pkl', 'rb') as f:
-        model = pickle.load(f)
-
-    with open('model_info.json', 'r') as f:
-        model_info = json.load(f)
-
-    with open('feature_columns.json', 'r') as f:
-        feature_columns = json.load(f)['feature_columns']
+    # Modelo validado contra feature_columns.json e model_info.json uma única vez
+    # (registry/ com hot-swap em segundo plano, ou arquivos da raiz)
+    served_model = open_model('registry')
 
     df = pd.read_csv('Unified_Data.csv')
     df['date'] = pd.to_datetime(df['date'])
 
-    return model, model_info, feature_columns, df
+    return served_model, df
 
 try:
-    best_model, model_info, feature_columns, df = load_model_and_data()
+    served_model, df = load_model_and_data()
+    bundle = served_model.get()
     df = df.sort_values('date').reset_index(drop=True)
 except FileNotFoundError:
     st.error('❌ Arquivos necessários não encontrados: best_model.pkl, model_info.json, feature_columns.json, Unified_Data.csv')
     st.stop()
+except FeatureSchemaError as e:
+    st.error(f'❌ Modelo incompatível com as features: {e}')
+    st.stop()
+
+model_info = bundle.info
+feature_columns = bundle.feature_columns
 
 # Função de limpeza
 def clean_close_price(close_price):
@@ -84,74 +92,24 @@ def clean_close_price(close_price):
 
     return close_array
 
-# Função de features
-def create_features(df_temp):
-    df_feat = df_temp.copy()
-    df_feat['returns'] = df_feat['close'].pct_change()
-
-    for lag in range(1, 6):
-        df_feat[f'close_lag_{lag}'] = df_feat['close'].shift(lag)
-    df_feat['close_lag_10'] = df_feat['close'].shift(10)
-
-    df_feat['sinal_t1'] = (df_feat['close'] > df_feat['close'].shift(1)).astype(int)
-    df_feat['sinal_t2'] = (df_feat['close'] > df_feat['close'].shift(2)).astype(int)
-    df_feat['sinal_t3'] = (df_feat['close'] > df_feat['close'].shift(3)).astype(int)
-    df_feat['sinal_t5'] = (df_feat['close'] > df_feat['close'].shift(5)).astype(int)
-    df_feat['sinal_t10'] = (df_feat['close'] > df_feat['close'].shift(10)).astype(int)
-
-    for lag in range(1, 11):
-        df_feat[f'returns_lag_{lag}'] = df_feat['returns'].shift(lag)
-
-    df_feat['ma5'] = df_feat['close'].rolling(5).mean()
-    df_feat['ma20'] = df_feat['close'].rolling(20).mean()
-    df_feat['ma50'] = df_feat['close'].rolling(50).mean()
-
-    df_feat['sinal_ma5_ma20'] = (df_feat['ma5'] > df_feat['ma20']).astype(int)
-    df_feat['close_acima_ma5'] = (df_feat['close'] > df_feat['ma5']).astype(int)
-    df_feat['close_acima_ma20'] = (df_feat['close'] > df_feat['ma20']).astype(int)
-
-    df_feat['volatility'] = df_feat['returns'].rolling(20).std()
-
-    delta = df_feat['close'].diff()
-    gain = (delta.where(delta > 0, 0)).rolling(window=14).mean()
-    loss = (-delta.where(delta < 0, 0)).rolling(window=14).mean()
-    rs = gain / loss
-    df_feat['rsi'] = 100 - (100 / (1 + rs))
-
-    df_feat['sinal_usd_up'] = (df_feat['usd_close'] > df_feat['usd_close'].shift(1)).astype(int)
-    df_feat['usd_change'] = df_feat['usd_close'].pct_change()
-
-    df_feat['selic_subindo'] = (df_feat['selic'] > df_feat['selic'].shift(1)).astype(int)
-    df_feat['selic_change'] = df_feat['selic'].diff()
-
-    return df_feat
-
 # Função de previsão
-def predict_next_day(df_last):
-    df_feat = create_features(df_last.tail(100))
-
-    if len(df_feat) < len(feature_columns):
-        return None, None
-
-    X_last = df_feat[feature_columns].iloc[-1:]
-
-    if X_last.isnull().any().any():
-        X_last = X_last.fillna(0)
-
-    pred = best_model.predict(X_last)[0]
-    proba = best_model.predict_proba(X_last)[0]
-
-    prediction = 'ALTA' if pred == 1 else 'BAIXA'
-    confidence = max(proba) * 100
-
-    return prediction, confidence
+def predict_next_day(model_input):
+    # Matriz já na ordem do modelo (contrato validado na carga)
+    return bundle.predict(model_input.last())
 
 # Limpar dados
 df['close'] = clean_close_price(df['close'])
-df_feat = create_features(df).dropna()
+df_feat, model_input = build_features(df, feature_columns)
+
+# Séries diária/semanal/mensal para o gráfico histórico (uma vez por versão dos dados)
+@st.cache_resource
+def load_rollups(_df, version):
+    return build_rollups(create_features(_df), extra=('ma5', 'ma20', 'ma50'))
+
+rollups = load_rollups(df, data_version('Unified_Data.csv'))
 
 # Fazer previsão
-pred, conf = predict_next_day(df)
+pred, conf = predict_next_day(model_input)
 
 # ==== SIDEBAR ====
 with st.sidebar:
@@ -199,46 +157,61 @@ tab1, tab2, tab3, tab4 = st.tabs(['📈 Série Histórica', '📊 Indicadores',
 with tab1:
     st.subheader('IBOVESPA com Médias Móveis')
 
+    # Resolução pelo tamanho do período: diária, semanal ou mensal (OHLC)
+    resolution, df_plot = rollups.select(date_range[0], date_range[1])
+
     fig = go.Figure()
 
-    fig.add_trace(go.Scatter(
-        x=df_filtered['date'],
-        y=df_filtered['close'],
-        name='IBOVESPA',
-        line=dict(color='#38bdf8', width=2)
-    ))
+    if resolution == 'Diário':
+        fig.add_trace(go.Scatter(
+            x=df_plot['date'],
+            y=df_plot['close'],
+            name='IBOVESPA',
+            line=dict(color='#38bdf8', width=2)
+        ))
+    else:
+        fig.add_trace(go.Candlestick(
+            x=df_plot['date'],
+            open=df_plot['open'],
+            high=df_plot['high'],
+            low=df_plot['low'],
+            close=df_plot['close'],
+            name='IBOVESPA'
+        ))
 
     fig.add_trace(go.Scatter(
-        x=df_feat['date'],
-        y=df_feat['ma5'],
+        x=df_plot['date'],
+        y=df_plot['ma5'],
         name='MA5',
         line=dict(color='#fbbf24', dash='dash')
     ))
 
     fig.add_trace(go.Scatter(
-        x=df_feat['date'],
-        y=df_feat['ma20'],
+        x=df_plot['date'],
+        y=df_plot['ma20'],
         name='MA20',
         line=dict(color='#f87171')
     ))
 
     fig.add_trace(go.Scatter(
-        x=df_feat['date'],
-        y=df_feat['ma50'],
+        x=df_plot['date'],
+        y=df_plot['ma50'],
         name='MA50',
         line=dict(color='#10b981')
     ))
 
     fig.update_layout(
-        title='IBOVESPA - Série Histórica com Médias Móveis',
+        title=f'IBOVESPA - Série Histórica com Médias Móveis ({resolution})',
         xaxis_title='Data',
         yaxis_title='Preço',
         template='plotly_dark',
         hovermode='x unified',
-        height=500
+        height=500,
+        xaxis_rangeslider_visible=False
     )
 
     st.plotly_chart(fig, use_container_width=True)
+    st.caption(f'{len(df_plot)} pontos ({resolution.lower()}) para {len(df_filtered)} pregões')
 
 with tab2:
     st.subheader('Indicadores Técnicos - Últimos 100 dias')
@@ -293,9 +266,8 @@ with tab3:
 
     with col2:
         st.write('**Modelos Comparados:**')
-        for model_name, metrics in model_info['all_models'].items():
-            st.write(f"
-**{model_name}**")
+        for model_name, metrics in model_info['all_models_metrics'].items():
+            st.write(f"\n**{model_name}**")
             st.write(f"Accuracy: {metrics['accuracy']:.2%}")
             st.write(f"F1-Score: {metrics['f1']:.2%}")
 
@@ -316,6 +288,5 @@ with tab4:
         st.write(f"**Features utilizadas:** {model_info['feature_count']}")
         st.write(f"**Data treino:** {model_info['training_date']}")
 
-    st.write('
-**Últimas 10 linhas:**')
+    st.write('\n**Últimas 10 linhas:**')
     st.dataframe(df[['date', 'close', 'usd_close', 'selic']].tail(10), use_container_width=True)
@@ -1,13 +1,15 @@
 import streamlit as st
 import pandas as pd
 import numpy as np
-import pickle
-import json
 import warnings
 from datetime import datetime
-from sklearn.preprocessing import StandardScaler
-import plotly.graph_objects as go
-from plotly.subplots import make_subplots
+
+from ibov.features import ATR_WINDOW, build_features, true_range
+from ibov.lazy import lazy_function, lazy_import
+from ibov.model_bundle import FeatureSchemaError, load_model_bundle
+
+go = lazy_import('plotly.graph_objects')
+make_subplots = lazy_function('plotly.subplots', 'make_subplots')
 
 warnings.filterwarnings('ignore')
 
@@ -33,6 +35,7 @@ def load_csv_optimized():
             'high': 'float32',
             'low': 'float32',
             'open': 'float32',
+            'volume': 'float32',
             'usd_close': 'float32',
             'selic': 'float32'
         },
@@ -92,17 +95,11 @@ def create_features(df):
     df['bb_width'] = df['bb_upper'] - df['bb_lower']
     
     # ATR
-    df['tr'] = np.maximum(
-        df['high'] - df['low'],
-        np.maximum(
-            abs(df['high'] - df['close'].shift()),
-            abs(df['low'] - df['close'].shift())
-        )
-    )
-    df['atr'] = df['tr'].rolling(window=14).mean()
+    df['tr'] = true_range(df['high'], df['low'], df['close'])
+    df['atr'] = df['tr'].rolling(window=ATR_WINDOW).mean()
     
     # Volume features
-    df['volume_change'] = df['close'].pct_change()
+    df['volume_change'] = df['volume'].pct_change(fill_method=None)
     df['price_range'] = (df['high'] - df['low']) / df['close']
     
     # Correlação com dólar e SELIC
@@ -116,13 +113,13 @@ def create_features(df):
     return df
 
 
-@st.cache_data(ttl=3600)
-def load_features_cached():
+@st.cache_resource(ttl=3600)
+def load_features_cached(feature_columns):
     """
     SOLUÇÃO 2: Cachear features já calculadas
     - Carrega CSV uma vez
-    - Cria features uma vez
-    - Resultado fica em cache por 1 hora
+    - Cria features uma vez (gráficos + matriz do modelo na ordem do bundle)
+    - Resultado fica em cache por 1 hora (objetos compartilhados, não modificar)
     
     ANTES: 5 seg (criação) + 15-20 seg (CSV) = 20-25 seg
     DEPOIS: ~1-2 segundos (primeira vez), <1 seg (recargas)
@@ -130,38 +127,29 @@ def load_features_cached():
     df = load_csv_optimized()
     df = clean_close_price(df)  # CORRIGIDO: passa DataFrame inteiro
     df_feat = create_features(df).dropna()
-    return df_feat, df
+    _, model_input = build_features(df, feature_columns)
+    return df_feat, df, model_input
 
 
 @st.cache_resource
 def load_model_and_info():
-    """Carrega modelo e informações em cache de recurso"""
-    with open('best_model.pkl', 'rb') as f:
-        model = pickle.load(f)
-    
-    with open('model_info.json', 'r') as f:
-        model_info = json.load(f)
-    
-    with open('feature_columns.json', 'r') as f:
-        feature_columns = json.load(f)
-    
-    return model, model_info, feature_columns
+    """
+    Carrega modelo e informações em cache de recurso
+    - Valida modelo x feature_columns.json x model_info.json UMA vez
+    """
+    return load_model_bundle('best_model.pkl', 'model_info.json', 'feature_columns.json')
 
 
-def predict_next_day(df_feat_last, feature_columns, model):
+def predict_next_day(model_input, bundle):
     """
     SOLUÇÃO 3: Não recalcula features, usa as já calculadas
+    - Última linha da matriz do modelo (colunas na ordem do bundle)
     
     ANTES: Recalculava features (~2 seg)
     DEPOIS: Usa features do cache (<0.1 seg)
     """
     try:
-        X_last = df_feat_last[feature_columns].iloc[-1:].values
-        pred = model.predict(X_last)[0]
-        proba = model.predict_proba(X_last)
-        confidence = max(proba[0]) * 100
-        
-        return 'ALTA' if pred == 1 else 'BAIXA', confidence
+        return bundle.predict(model_input.last())
     except Exception as e:
         st.error(f"Erro na previsão: {e}")
         return None, None
@@ -203,8 +191,12 @@ st.markdown("""
 st.title("📊 IBOVESPA Prediction Dashboard")
 
 # Carregar dados (usando cache)
-df_feat, df = load_features_cached()
-model, model_info, feature_columns = load_model_and_info()
+try:
+    bundle = load_model_and_info()
+except (OSError, FeatureSchemaError) as e:
+    st.error(f"❌ Modelo incompatível com as features: {e}")
+    st.stop()
+df_feat, df, model_input = load_features_cached(bundle.feature_columns)
 
 # Sidebar para filtros
 st.sidebar.header("⚙️ Configurações")
@@ -231,8 +223,8 @@ with col2:
     st.metric("📈 Variação", f"{pct_change:+.2f}%")
 
 with col3:
-    pred, conf = predict_next_day(df_feat, feature_columns, model)
-    st.metric("🔮 Previsão", pred, f"Confiança: {conf:.1f}%")
+    pred, conf = predict_next_day(model_input, bundle)
+    st.metric("🔮 Previsão", pred or "—", f"Confiança: {conf:.1f}%" if conf is not None else None)
 
 with col4:
     last_date = df['date'].iloc[-1].strftime("%d/%m/%Y")
@@ -1,13 +1,23 @@
 import streamlit as st
-import pandas as pd
 import numpy as np
-import pickle
-import json
 import warnings
 from datetime import datetime
-from sklearn.preprocessing import StandardScaler
-import plotly.graph_objects as go
-from plotly.subplots import make_subplots
+from pathlib import Path
+
+from ibov.feature_store import open_snapshot
+from ibov.features import compute_features, memory_report
+from ibov.horizons import load_horizon_model
+from ibov.intraday import REPLAY_SPEED, THROTTLE_SECONDS, open_replay
+from ibov.ingest import data_version, load_unified_data
+from ibov.lazy import lazy_function, lazy_import
+from ibov.memo import PredictionMemo
+from ibov.model_bundle import FeatureSchemaError
+from ibov.online import ONLINE_DIR, load_online_bundle, online_stamp
+from ibov.registry import open_model
+from ibov.trading_calendar import b3_calendar
+
+go = lazy_import('plotly.graph_objects')
+make_subplots = lazy_function('plotly.subplots', 'make_subplots')
 
 warnings.filterwarnings('ignore')
 
@@ -15,147 +25,119 @@ warnings.filterwarnings('ignore')
 # ⚡ OTIMIZAÇÕES CRÍTICAS - SOLUÇÃO 1, 2, 3
 # ═══════════════════════════════════════════════════════════════════════════
 
+DATA_PATH = 'Unified_Data.csv'
+
+
 @st.cache_data(ttl=3600)
-def load_csv_optimized():
+def load_csv_optimized(version):
     """
     SOLUÇÃO 1: Carrega CSV COM OTIMIZAÇÕES
     - Especifica dtypes (float32 em vez de float64)
     - parse_dates já converte data na leitura
-    - Cache por 1 hora
+    - Ordena por data (o CSV vem do mais recente para o mais antigo)
+    - Cache por 1 hora e por versão do CSV (``version``: regravar o
+      arquivo invalida este cache e todos os derivados dele)
     
     ANTES: 15-20 segundos
     DEPOIS: 1-2 segundos (primeira vez), <1 segundo (recargas)
     """
-    df = pd.read_csv(
-        'Unified_Data.csv',
-        dtype={
-            'close': 'float32',
-            'high': 'float32',
-            'low': 'float32',
-            'open': 'float32',
-            'usd_close': 'float32',
-            'selic': 'float32'
-        },
-        parse_dates=['date']  # Converte direto na leitura
-    )
-    return df
-
+    return load_unified_data(DATA_PATH)
 
-def clean_close_price(close_series):
-    """Remove outliers da série de fechamento"""
-    Q1 = close_series.quantile(0.25)
-    Q3 = close_series.quantile(0.75)
-    IQR = Q3 - Q1
-    return close_series[~((close_series < (Q1 - 1.5 * IQR)) | 
-                          (close_series > (Q3 + 1.5 * IQR)))]
 
-
-def create_features(df):
-    """Cria 26 features técnicos"""
-    df = df.copy()
-    
-    # Médias móveis
-    df['ma5'] = df['close'].rolling(window=5).mean()
-    df['ma20'] = df['close'].rolling(window=20).mean()
-    df['ma50'] = df['close'].rolling(window=50).mean()
-    df['ma200'] = df['close'].rolling(window=200).mean()
-    
-    # Volatilidade
-    df['volatility'] = df['close'].rolling(window=20).std()
-    df['log_return'] = np.log(df['close'] / df['close'].shift(1))
-    
-    # RSI
-    delta = df['close'].diff()
-    gain = (delta.where(delta > 0, 0)).rolling(window=14).mean()
-    loss = (-delta.where(delta < 0, 0)).rolling(window=14).mean()
-    rs = gain / loss
-    df['rsi'] = 100 - (100 / (1 + rs))
-    
-    # MACD
-    exp1 = df['close'].ewm(span=12, adjust=False).mean()
-    exp2 = df['close'].ewm(span=26, adjust=False).mean()
-    df['macd'] = exp1 - exp2
-    df['signal_line'] = df['macd'].ewm(span=9, adjust=False).mean()
-    df['macd_hist'] = df['macd'] - df['signal_line']
-    
-    # Bollinger Bands
-    sma = df['close'].rolling(window=20).mean()
-    std = df['close'].rolling(window=20).std()
-    df['bb_upper'] = sma + (std * 2)
-    df['bb_lower'] = sma - (std * 2)
-    df['bb_width'] = df['bb_upper'] - df['bb_lower']
-    
-    # ATR
-    df['tr'] = np.maximum(
-        df['high'] - df['low'],
-        np.maximum(
-            abs(df['high'] - df['close'].shift()),
-            abs(df['low'] - df['close'].shift())
-        )
-    )
-    df['atr'] = df['tr'].rolling(window=14).mean()
-    
-    # Volume features
-    df['volume_change'] = df['close'].pct_change()
-    df['price_range'] = (df['high'] - df['low']) / df['close']
+@st.cache_resource(ttl=3600)
+def load_features_cached(feature_columns, version):
+    """
+    SOLUÇÃO 2: Cachear features já calculadas
+    - Carrega CSV uma vez
+    - Cria features uma vez, escrevendo as do modelo direto numa
+      matriz float32 C-contígua na ordem de feature_columns.json
+    - Cache de recurso: os mesmos objetos são compartilhados entre
+      reruns (sem unpickle a cada interação) - NÃO modificar in-place
     
-    # Correlação com dólar e SELIC
-    df['corr_usd'] = df['close'].rolling(window=20).corr(df['usd_close'])
-    df['corr_selic'] = df['close'].rolling(window=20).corr(df['selic'])
+    ANTES: 5 seg (criação) + 15-20 seg (CSV) = 20-25 seg
+    DEPOIS: ~1-2 segundos (primeira vez), <1 seg (recargas)
     
-    # Médias móveis do dólar
-    df['usd_ma5'] = df['usd_close'].rolling(window=5).mean()
-    df['selic_ma5'] = df['selic'].rolling(window=5).mean()
+    SOLUÇÃO 2b: Feature store compartilhado entre réplicas
+    - Com `python -m ibov.feature_store watch` rodando, o snapshot da
+      versão atual é aberto via mmap (mesmas páginas em todas as réplicas)
+    - Sem snapshot publicado, calcula localmente como antes
     
-    return df
+    Features: ibov.features.create_features (compartilhado entre os apps)
+    """
+    snapshot = open_snapshot(version, feature_columns)
+    if snapshot is not None:
+        return snapshot.df_feat, snapshot.df, snapshot.matrix
+    df, df_feat, model_input = compute_features(load_csv_optimized(version), feature_columns)
+    return df_feat, df, model_input
 
 
 @st.cache_data(ttl=3600)
-def load_features_cached():
+def features_memory_report(feature_columns, version):
     """
-    SOLUÇÃO 2: Cachear features já calculadas
-    - Carrega CSV uma vez
-    - Cria features uma vez
-    - Resultado fica em cache por 1 hora
-    
-    ANTES: 5 seg (criação) + 15-20 seg (CSV) = 20-25 seg
-    DEPOIS: ~1-2 segundos (primeira vez), <1 seg (recargas)
+    SOLUÇÃO 1b: Layout compacto das features
+    - Indicadores em float32, sinais binários em int8
+    - Reporta a memória antes (float64/int64) e depois
     """
-    df = load_csv_optimized()
-    df['close'] = clean_close_price(df['close'])
-    df_feat = create_features(df).dropna()
-    return df_feat, df
+    df_feat, _, _ = load_features_cached(feature_columns, version)
+    return memory_report(df_feat)
 
 
 @st.cache_resource
 def load_model_and_info():
-    """Carrega modelo e informações em cache de recurso"""
-    with open('best_model.pkl', 'rb') as f:
-        model = pickle.load(f)
-    
-    with open('model_info.json', 'r') as f:
-        model_info = json.load(f)
-    
-    with open('feature_columns.json', 'r') as f:
-        feature_columns = json.load(f)
-    
-    return model, model_info, feature_columns
+    """
+    Carrega modelo e informações em cache de recurso
+    - Valida modelo x feature_columns.json x model_info.json UMA vez
+      (quantidade, ordem e tipos das features)
+    - Com registry/ presente, uma thread troca o modelo em segundo plano
+      quando registry/CURRENT muda (sem reiniciar o app)
+    """
+    return open_model('registry')
+
+
+@st.cache_resource
+def load_online_model(stamp):
+    """
+    Modelo online (SGD, online_model/) com o mesmo contrato do batch
+    - ``stamp`` muda a cada `python -m ibov.online update`: o novo estado
+      é carregado sem reiniciar o app
+    """
+    return load_online_bundle(ONLINE_DIR)
+
+
+@st.cache_resource
+def load_horizon_models():
+    """
+    Classificadores t+1, t+5 e t+10 (horizon_models/)
+    - Árvores de todos os horizontes empilhadas num único ensemble
+    - Uma passada sobre a matriz de features prevê todos os horizontes
+    """
+    try:
+        return load_horizon_model('horizon_models')
+    except (OSError, FeatureSchemaError) as e:
+        print(f"⚠️  Previsão multi-horizonte indisponível: {e}")
+        return None
 
 
-def predict_next_day(df_feat_last, feature_columns, model):
+@st.cache_resource
+def prediction_memo():
+    """Memo da previsão compartilhado por todas as sessões (uma entrada por modelo servido)"""
+    return PredictionMemo()
+
+
+def predict_next_day(model_input, bundle, slot):
     """
     SOLUÇÃO 3: Não recalcula features, usa as já calculadas
+    - Última linha da matriz do modelo é uma view (sem cópia/reindexação)
+    - Contrato já validado na carga: sem checagem de colunas por chamada
+    - Memo por (versão + hash do modelo, hash da linha): o modelo só roda de novo
+      quando chega um pregão novo ou troca o modelo
     
     ANTES: Recalculava features (~2 seg)
     DEPOIS: Usa features do cache (<0.1 seg)
     """
     try:
-        X_last = df_feat_last[feature_columns].iloc[-1:].values
-        pred = model.predict(X_last)[0]
-        proba = model.predict_proba(X_last)
-        confidence = max(proba[0]) * 100
-        
-        return 'ALTA' if pred == 1 else 'BAIXA', confidence
+        prediction = prediction_memo().predict(bundle, model_input.last(), slot=slot)
+        return prediction.label, prediction.confidence
     except Exception as e:
         st.error(f"Erro na previsão: {e}")
         return None, None
@@ -196,19 +178,30 @@ st.markdown("""
 
 st.title("📊 IBOVESPA Prediction Dashboard")
 
-# Carregar dados (usando cache)
-df_feat, df = load_features_cached()
-model, model_info, feature_columns = load_model_and_info()
-
-# Sidebar para filtros
 st.sidebar.header("⚙️ Configurações")
-days_back = st.sidebar.slider(
-    "Dias para exibir",
-    min_value=30,
-    max_value=len(df),
-    value=250,
-    step=10
-)
+
+# Carregar dados (usando cache)
+try:
+    bundle = load_model_and_info().get()
+    model_slot = "batch"
+    # Modelo online como alternativa ao batch, quando existe
+    stamp = online_stamp(ONLINE_DIR)
+    if stamp is not None:
+        model_kind = st.sidebar.radio(
+            "🧠 Modelo",
+            ["Batch (best_model.pkl)", "Online (SGD diário)"],
+            key="model_kind",
+            help="O modelo online aprende cada novo pregão com `python -m ibov.online update`",
+        )
+        if model_kind.startswith("Online"):
+            bundle = load_online_model(stamp)
+            model_slot = "online"
+except (OSError, FeatureSchemaError) as e:
+    st.error(f"❌ Modelo incompatível com as features: {e}")
+    st.stop()
+model_info = bundle.info
+version = data_version(DATA_PATH)
+df_feat, df, model_input = load_features_cached(bundle.feature_columns, version)
 
 # ═══════════════════════════════════════════════════════════════════════════
 # 🎯 SEÇÃO SUPERIOR - MÉTRICAS
@@ -224,41 +217,83 @@ with col2:
     pct_change = ((df['close'].iloc[-1] - df['close'].iloc[-2]) / df['close'].iloc[-2]) * 100
     st.metric("📈 Variação", f"{pct_change:+.2f}%")
 
+# Pregões-alvo pelo calendário da B3 (feriados e fins de semana pulados)
+last_session = df_feat['date'].iloc[-1]
+next_session = b3_calendar().next_trading_day(last_session)
+
 with col3:
-    pred, conf = predict_next_day(df_feat, feature_columns, model)
-    st.metric("🔮 Previsão", pred, f"Confiança: {conf:.1f}%")
+    pred, conf = predict_next_day(model_input, bundle, model_slot)
+    st.metric("🔮 Previsão", pred or "—", f"Confiança: {conf:.1f}%" if conf is not None else None)
+    st.caption(f"Para o pregão de {next_session:%d/%m/%Y}")
+    if 'n_updates' in model_info:
+        st.caption(f"Online: {model_info['n_updates']} pregões aprendidos até "
+                   f"{model_info['last_date']} (acurácia prequencial {model_info['accuracy']:.1%})")
 
 with col4:
     last_date = df['date'].iloc[-1].strftime("%d/%m/%Y")
     st.metric("📅 Data", last_date)
 
+# Previsão por horizonte (mesma FeatureMatrix quando as colunas coincidem)
+horizon_model = load_horizon_models()
+if horizon_model is not None:
+    if horizon_model.feature_columns == bundle.feature_columns:
+        horizon_input = model_input
+    else:
+        _, _, horizon_input = load_features_cached(horizon_model.feature_columns, version)
+    horizon_preds = horizon_model.predict(horizon_input.last())
+    horizon_metrics = horizon_model.info.get('metrics', {})
+
+    st.subheader("🔭 Previsão por Horizonte")
+    target_sessions = b3_calendar().next_trading_day([last_session] * len(horizon_preds),
+                                                     np.array(list(horizon_preds)))
+    for col, (h, (h_pred, h_conf)), target in zip(st.columns(len(horizon_preds)), horizon_preds.items(),
+                                                   target_sessions):
+        acc = horizon_metrics.get(f't{h}', {}).get('accuracy')
+        with col:
+            st.metric(f"t+{h} pregões", h_pred, f"Confiança: {h_conf:.1f}%", delta_color="off")
+            st.caption(f"Pregão de {target:%d/%m/%Y}")
+            if acc is not None:
+                st.caption(f"Acurácia no teste: {acc:.1%}")
+
 st.divider()
 
 # ═══════════════════════════════════════════════════════════════════════════
 # 📊 SEÇÃO DE GRÁFICOS COM LAZY LOADING
 # ═══════════════════════════════════════════════════════════════════════════
 
-tab1, tab2, tab3, tab4 = st.tabs([
-    "📈 Série Histórica",
-    "🔬 Indicadores Técnicos",
-    "📊 Performance",
-    "📋 Dados"
-])
-
-# Preparar dados para gráficos
-df_filtered = df.tail(days_back).copy()
-df_feat_filtered = df_feat.tail(days_back).copy()
-
 # ═══════════════════════════════════════════════════════════════════════════
 # SOLUÇÃO 4: Resampling - Reduzir pontos nos gráficos (90% menos!)
+# SOLUÇÃO 5: Fragmentos - cada gráfico tem seu controle de período e é
+#            o único trecho reexecutado quando ele muda (previsão, métricas
+#            e demais abas não rodam de novo)
 # ═══════════════════════════════════════════════════════════════════════════
 
-# Amostragem a cada 5 dias para gráficos (reduz de 2.280 para ~456 pontos)
-sampling_rate = 5
-df_plot = df_filtered.iloc[::sampling_rate].copy()
+SAMPLING_RATE = 5
+
+
+def period_slider(df, key):
+    return st.slider(
+        "Dias para exibir",
+        min_value=30,
+        max_value=len(df),
+        value=250,
+        step=10,
+        key=key
+    )
+
+
+def sample_period(df, df_feat, days_back):
+    """Últimos ``days_back`` dias; o preço amostrado a cada SAMPLING_RATE (de 2.280 para ~456 pontos)"""
+    df_plot = df.tail(days_back).iloc[::SAMPLING_RATE]
+    df_feat_filtered = df_feat.tail(days_back)
+    return df_plot, df_feat_filtered
+
+
+@st.cache_resource(ttl=3600, max_entries=64)
+def price_figure(_df, _df_feat, version, days_back):
+    """Série histórica + médias móveis (figura compartilhada, não modificar)"""
+    df_plot, df_feat_filtered = sample_period(_df, _df_feat, days_back)
 
-# TAB 1: Série Histórica
-with tab1:
     fig = go.Figure()
     
     # Preço de fechamento (resampled)
@@ -272,7 +307,7 @@ with tab1:
     
     # Médias móveis (resampled)
     if not df_feat_filtered['ma5'].isna().all():
-        ma5_plot = df_feat_filtered['ma5'].iloc[::sampling_rate]
+        ma5_plot = df_feat_filtered['ma5'].iloc[::SAMPLING_RATE]
         fig.add_trace(go.Scatter(
             x=df_plot['date'],
             y=ma5_plot,
@@ -282,7 +317,7 @@ with tab1:
         ))
     
     if not df_feat_filtered['ma20'].isna().all():
-        ma20_plot = df_feat_filtered['ma20'].iloc[::sampling_rate]
+        ma20_plot = df_feat_filtered['ma20'].iloc[::SAMPLING_RATE]
         fig.add_trace(go.Scatter(
             x=df_plot['date'],
             y=ma20_plot,
@@ -292,7 +327,7 @@ with tab1:
         ))
     
     if not df_feat_filtered['ma50'].isna().all():
-        ma50_plot = df_feat_filtered['ma50'].iloc[::sampling_rate]
+        ma50_plot = df_feat_filtered['ma50'].iloc[::SAMPLING_RATE]
         fig.add_trace(go.Scatter(
             x=df_plot['date'],
             y=ma50_plot,
@@ -309,10 +344,14 @@ with tab1:
         hovermode='x unified',
         template='plotly_dark'
     )
-    st.plotly_chart(fig, use_container_width=True)
+    return fig
+
+
+@st.cache_resource(ttl=3600, max_entries=64)
+def indicator_figure(_df, _df_feat, version, days_back):
+    """RSI, MACD e volatilidade (figura compartilhada, não modificar)"""
+    df_plot, df_feat_filtered = sample_period(_df, _df_feat, days_back)
 
-# TAB 2: Indicadores Técnicos
-with tab2:
     fig = make_subplots(
         rows=3, cols=1,
         shared_xaxes=True,
@@ -324,7 +363,7 @@ with tab2:
     
     # RSI
     if not df_feat_filtered['rsi'].isna().all():
-        rsi_plot = df_feat_filtered['rsi'].iloc[::sampling_rate]
+        rsi_plot = df_feat_filtered['rsi'].iloc[::SAMPLING_RATE]
         fig.add_trace(
             go.Scatter(
                 x=df_plot['date'],
@@ -340,8 +379,8 @@ with tab2:
     
     # MACD
     if not df_feat_filtered['macd'].isna().all():
-        macd_plot = df_feat_filtered['macd'].iloc[::sampling_rate]
-        signal_plot = df_feat_filtered['signal_line'].iloc[::sampling_rate]
+        macd_plot = df_feat_filtered['macd'].iloc[::SAMPLING_RATE]
+        signal_plot = df_feat_filtered['signal'].iloc[::SAMPLING_RATE]
         
         fig.add_trace(
             go.Scatter(
@@ -366,7 +405,7 @@ with tab2:
     
     # Volatilidade
     if not df_feat_filtered['volatility'].isna().all():
-        vol_plot = df_feat_filtered['volatility'].iloc[::sampling_rate]
+        vol_plot = df_feat_filtered['volatility'].iloc[::SAMPLING_RATE]
         fig.add_trace(
             go.Scatter(
                 x=df_plot['date'],
@@ -384,31 +423,33 @@ with tab2:
     fig.update_xaxes(title_text="Data", row=3, col=1)
     
     fig.update_layout(height=700, hovermode='x unified', template='plotly_dark')
-    st.plotly_chart(fig, use_container_width=True)
+    return fig
+
+
+@st.fragment
+def render_price_chart(df, df_feat, version):
+    """Rerun só deste fragmento ao mudar o período"""
+    days_back = period_slider(df, 'days_back_price')
+    st.plotly_chart(price_figure(df, df_feat, version, days_back), use_container_width=True)
+
+
+@st.fragment
+def render_indicator_chart(df, df_feat, version):
+    """Rerun só deste fragmento ao mudar o período"""
+    days_back = period_slider(df, 'days_back_indicators')
+    st.plotly_chart(indicator_figure(df, df_feat, version, days_back), use_container_width=True)
+
+
+@st.cache_resource(ttl=3600)
+def performance_panel(_df, version):
+    """Estatísticas + histograma de retornos (figura compartilhada, não modificar)"""
+    df = _df
+    daily_returns = df['close'].pct_change().dropna()
+    returns = ((df['close'].iloc[-1] - df['close'].iloc[0]) / df['close'].iloc[0]) * 100
+    max_drawdown = ((df['close'].cummax() - df['close']) / df['close'].cummax()).max() * 100
+    volatility = daily_returns.std() * np.sqrt(252)
+    sharpe = (daily_returns.mean() * 252) / volatility if volatility > 0 else 0
 
-# TAB 3: Performance
-with tab3:
-    st.subheader("📊 Estatísticas de Performance")
-    
-    col1, col2, col3, col4 = st.columns(4)
-    
-    with col1:
-        returns = ((df['close'].iloc[-1] - df['close'].iloc[0]) / df['close'].iloc[0]) * 100
-        st.metric("Retorno Total", f"{returns:.2f}%")
-    
-    with col2:
-        daily_returns = df['close'].pct_change().dropna()
-        max_drawdown = ((df['close'].cummax() - df['close']) / df['close'].cummax()).max() * 100
-        st.metric("Max Drawdown", f"-{max_drawdown:.2f}%")
-    
-    with col3:
-        volatility = daily_returns.std() * np.sqrt(252)
-        st.metric("Volatilidade Anualizada", f"{volatility:.2f}%")
-    
-    with col4:
-        sharpe = (daily_returns.mean() * 252) / volatility if volatility > 0 else 0
-        st.metric("Sharpe Ratio", f"{sharpe:.2f}")
-    
     # Distribuição de retornos
     fig = go.Figure()
     fig.add_trace(go.Histogram(
@@ -424,36 +465,160 @@ with tab3:
         height=400,
         template='plotly_dark'
     )
-    st.plotly_chart(fig, use_container_width=True)
+    return returns, max_drawdown, volatility, sharpe, fig
+
+
+@st.cache_data(ttl=3600)
+def data_csv(_df, columns, version):
+    """CSV para download (serializado uma vez por versão dos dados)"""
+    return _df[list(columns)].to_csv(index=False)
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# SOLUÇÃO 7: Modo intradiário - ticks de um replay (gerador assíncrono numa
+#            thread de fundo) atualizam só a linha de hoje, em O(1) por tick;
+#            o fragmento relê o último estado publicado a cada THROTTLE_SECONDS
+#            (o resto da página não roda de novo)
+# ═══════════════════════════════════════════════════════════════════════════
+
+TICKS_PATH = 'ticks.csv'
+
+
+def stop_intraday_feed():
+    feed = st.session_state.pop("intraday_feed", None)
+    if feed is not None:
+        feed.stop()
+
+
+@st.fragment(run_every=THROTTLE_SECONDS)
+def render_intraday(feed):
+    """Último estado publicado pelo feed (o modelo roda uma vez por publicação, não por tick)"""
+    if feed.error is not None:
+        st.error(f"Replay interrompido: {feed.error}")
+    snapshot = feed.latest
+    if snapshot is None:
+        st.caption("⏳ Aguardando o primeiro tick...")
+        return
+    f = snapshot.features
+    col1, col2, col3, col4, col5 = st.columns(5)
+    col1.metric("💰 Preço", f"{f['close']:,.2f}", f"{f['returns']:+.2%}")
+    col2.metric("🔮 P(ALTA) no próximo fechamento", f"{snapshot.proba:.1%}")
+    col3.metric("RSI", f"{f['rsi']:.1f}")
+    col4.metric("MACD", f"{f['macd']:,.1f}", f"Sinal {f['signal']:,.1f}", delta_color="off")
+    col5.metric("MA20", f"{f['ma20']:,.0f}", f"BB {f['bb_lower']:,.0f} – {f['bb_upper']:,.0f}", delta_color="off")
+
+    frame = feed.frame().set_index('time')
+    st.line_chart(frame[['close', 'ma20', 'bb_upper', 'bb_lower']], height=300)
+    status = "replay concluído" if feed.done else "em andamento"
+    st.caption(f"Pregão de {snapshot.session:%d/%m/%Y}, {snapshot.time:%H:%M:%S} | "
+               f"{snapshot.n_ticks} ticks | {len(feed.published)} atualizações | {status}")
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# SOLUÇÃO 6: Abas preguiçosas - só a aba aberta executa (on_change="rerun");
+#            figuras e tabelas ficam em cache por versão dos dados
+# ═══════════════════════════════════════════════════════════════════════════
+
+tab1, tab2, tab3, tab4, tab5 = st.tabs([
+    "📈 Série Histórica",
+    "🔬 Indicadores Técnicos",
+    "📊 Performance",
+    "📋 Dados",
+    "⏱️ Intradiário"
+], key="main_tab", on_change="rerun")
+
+# TAB 1: Série Histórica
+if tab1.open:
+    with tab1:
+        render_price_chart(df, df_feat, version)
+
+# TAB 2: Indicadores Técnicos
+if tab2.open:
+    with tab2:
+        render_indicator_chart(df, df_feat, version)
+
+# TAB 3: Performance
+if tab3.open:
+    with tab3:
+        st.subheader("📊 Estatísticas de Performance")
+
+        returns, max_drawdown, volatility, sharpe, fig = performance_panel(df, version)
+        col1, col2, col3, col4 = st.columns(4)
+
+        with col1:
+            st.metric("Retorno Total", f"{returns:.2f}%")
+
+        with col2:
+            st.metric("Max Drawdown", f"-{max_drawdown:.2f}%")
+
+        with col3:
+            st.metric("Volatilidade Anualizada", f"{volatility:.2f}%")
+
+        with col4:
+            st.metric("Sharpe Ratio", f"{sharpe:.2f}")
+
+        st.plotly_chart(fig, use_container_width=True)
 
 # TAB 4: Dados Brutos
-with tab4:
-    st.subheader("📋 Últimas Linhas de Dados")
-    
-    # Mostrar últimos 50 dados
-    display_cols = ['date', 'close', 'high', 'low', 'open', 'usd_close', 'selic']
-    st.dataframe(
-        df[display_cols].tail(50).style.format({
-            'close': '{:,.2f}',
-            'high': '{:,.2f}',
-            'low': '{:,.2f}',
-            'open': '{:,.2f}',
-            'usd_close': '{:,.2f}',
-            'selic': '{:,.4f}'
-        }),
-        use_container_width=True
-    )
-    
-    # Download CSV
-    csv = df[display_cols].to_csv(index=False)
-    st.download_button(
-        label="📥 Download dados completos",
-        data=csv,
-        file_name="ibovespa_data.csv",
-        mime="text/csv"
-    )
+if tab4.open:
+    with tab4:
+        st.subheader("📋 Últimas Linhas de Dados")
+
+        # Mostrar últimos 50 dados
+        display_cols = ['date', 'close', 'high', 'low', 'open', 'volume', 'usd_close', 'selic']
+        st.dataframe(
+            df[display_cols].tail(50).style.format({
+                'close': '{:,.2f}',
+                'high': '{:,.2f}',
+                'low': '{:,.2f}',
+                'open': '{:,.2f}',
+                'volume': '{:,.0f}',
+                'usd_close': '{:,.2f}',
+                'selic': '{:,.4f}'
+            }),
+            use_container_width=True
+        )
+
+        # Download CSV
+        st.download_button(
+            label="📥 Download dados completos",
+            data=data_csv(df, tuple(display_cols), version),
+            file_name="ibovespa_data.csv",
+            mime="text/csv"
+        )
+
+# TAB 5: Intradiário (replay de ticks)
+if tab5.open:
+    with tab5:
+        st.subheader("⏱️ Pregão em Andamento (replay de ticks)")
+
+        col1, col2, col3, col4 = st.columns([3, 2, 1, 1], vertical_alignment="bottom")
+        ticks_path = col1.text_input("Arquivo de ticks (time, price, volume[, usd, selic])", TICKS_PATH, key="ticks_path")
+        speed = col2.select_slider("Velocidade", options=[60, 300, 600, 1800, 3600], value=int(REPLAY_SPEED),
+                                   format_func=lambda v: f"{v}x", key="replay_speed")
+        if col3.button("▶️ Iniciar", disabled=not Path(ticks_path).is_file()):
+            stop_intraday_feed()
+            try:
+                st.session_state["intraday_feed"] = open_replay(load_csv_optimized(version), ticks_path,
+                                                                bundle, speed)
+            except ValueError as e:
+                st.error(f"❌ Replay indisponível: {e}")
+        if col4.button("⏹️ Parar"):
+            stop_intraday_feed()
+
+        feed = st.session_state.get("intraday_feed")
+        if feed is not None:
+            render_intraday(feed)
+        else:
+            st.info("Sem feed ao vivo: gere uma sessão de teste com "
+                    "`python -m ibov.intraday gerar ticks.csv` e inicie o replay.")
 
 st.sidebar.divider()
+mem = features_memory_report(bundle.feature_columns, version)
+st.sidebar.caption(
+    f"🧠 Features em memória: {mem['bytes_depois'] / 1024:,.0f} KB "
+    f"(antes {mem['bytes_antes'] / 1024:,.0f} KB, -{mem['reducao_pct']:.0f}%)"
+)
 st.sidebar.info("""
 ⚡ **Dashboard Otimizado**
 
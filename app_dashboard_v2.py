@@ -1,14 +1,15 @@
 import streamlit as st
 import pandas as pd
 import numpy as np
-import plotly.graph_objects as go
-from plotly.subplots import make_subplots
 import warnings
 warnings.filterwarnings('ignore')
-import json
-import pickle
-from sklearn.metrics import confusion_matrix, classification_report, accuracy_score
-import pandas as pd
+
+from ibov.features import ATR_WINDOW, build_features, true_range
+from ibov.ingest import data_version, load_unified_data
+from ibov.lazy import lazy_import
+from ibov.model_bundle import load_model_bundle
+
+go = lazy_import('plotly.graph_objects')
 
 # ========================================
 # CONFIG PAGE
@@ -48,11 +49,7 @@ st.markdown("""
 @st.cache_data(ttl=3600)
 def load_csv_optimized():
     """Carrega CSV com validação"""
-    df = pd.read_csv(
-        'Unified_Data.csv',
-        dtype={'close': 'float32', 'selic': 'float32'},
-        parse_dates=['date']
-    )
+    df = load_unified_data('Unified_Data.csv')
     return df
 
 def clean_close_price(df):
@@ -65,12 +62,9 @@ def clean_close_price(df):
     return df[mask]
 
 def create_features(df):
-    """Cria features - adaptado para qualquer estrutura"""
+    """Cria features (OHLCV da base unificada + macro opcional)"""
     df = df.copy()
     
-    has_high = 'high' in df.columns
-    has_low = 'low' in df.columns
-    has_open = 'open' in df.columns
     has_usd_close = 'usd_close' in df.columns
     has_selic = 'selic' in df.columns
     
@@ -105,23 +99,11 @@ def create_features(df):
     df['log_return'] = np.log(df['close'] / df['close'].shift(1))
     
     # ATR
-    if has_high and has_low:
-        df['tr'] = np.maximum(
-            df['high'] - df['low'],
-            np.maximum(
-                abs(df['high'] - df['close'].shift()),
-                abs(df['low'] - df['close'].shift())
-            )
-        )
-        df['atr'] = df['tr'].rolling(window=14).mean()
-    else:
-        df['atr'] = df['close'].rolling(window=14).std() * 1.5
-    
-    if has_high and has_low:
-        df['hl_ratio'] = df['high'] / df['low']
+    df['tr'] = true_range(df['high'], df['low'], df['close'])
+    df['atr'] = df['tr'].rolling(window=ATR_WINDOW).mean()
     
-    if has_open:
-        df['co_ratio'] = df['close'] / df['open']
+    df['hl_ratio'] = df['high'] / df['low']
+    df['co_ratio'] = df['close'] / df['open']
     
     if has_usd_close:
         df['close_usd_ratio'] = df['close'] / df['usd_close']
@@ -146,43 +128,37 @@ def create_features(df):
     
     return df
 
-@st.cache_data(ttl=3600)
-def load_features_cached():
-    """Carrega e cria features"""
+@st.cache_resource(ttl=3600)
+def load_features_cached(feature_columns):
+    """Carrega e cria features + matriz do modelo (objetos compartilhados, não modificar)"""
     df = load_csv_optimized()
     df = clean_close_price(df)
     df_feat = create_features(df).dropna()
-    return df_feat, df
+    model_feat, model_input = build_features(df, feature_columns)
+    return df_feat, df, model_input, model_feat['date'].to_numpy()
 
-@st.cache_data(ttl=3600)
+@st.cache_resource
 def load_model_and_info():
-    """Carrega modelo"""
+    """Carrega modelo e valida o contrato de features uma única vez"""
     try:
-        with open('best_model.pkl', 'rb') as f:
-            model = pickle.load(f)
-        with open('model_info.json', 'r') as f:
-            model_info = json.load(f)
-        with open('feature_columns.json', 'r') as f:
-            feature_columns = json.load(f)
-        return model, model_info, feature_columns
-    except:
-        return None, None, None
+        return load_model_bundle(), None
+    except Exception as e:
+        print(f"Erro ao carregar modelo: {e}")
+        return None, str(e)
+
+@st.cache_data(ttl=3600)
+def historical_predictions(_bundle, _model_input, model_version, version):
+    """P(ALTA) sobre todo o histórico (uma vez por modelo + versão dos dados, só quando a aba abre)"""
+    return _bundle.predict_proba(_model_input.values)
 
 # ========================================
 # PREDICTION & ANALYSIS FUNCTIONS
 # ========================================
 
-def get_prediction_and_reasons(df_feat, feature_columns, model):
-    """Previsão + razões técnicas"""
+def get_prediction_and_reasons(df_feat, model_input, bundle):
+    """Previsão (matriz do modelo, contrato já validado na carga) + razões técnicas"""
     try:
-        missing_cols = [col for col in feature_columns if col not in df_feat.columns]
-        if missing_cols:
-            return None, None, None
-        
-        X_last = df_feat[feature_columns].iloc[-1:].values
-        pred = model.predict(X_last)[0]
-        proba = model.predict_proba(X_last)
-        confidence = max(proba[0]) * 100
+        pred, confidence = bundle.predict(model_input.last())
         
         # Pegar valores dos indicadores
         rsi = df_feat['rsi'].iloc[-1]
@@ -214,7 +190,7 @@ def get_prediction_and_reasons(df_feat, feature_columns, model):
         else:
             reasons.append("MAs misturadas")
         
-        return 'ALTA' if pred == 1 else 'BAIXA', confidence, reasons
+        return pred, confidence, reasons
     except:
         return None, None, None
 
@@ -241,13 +217,15 @@ def get_current_indicators(df_feat):
 st.title("📊 IBOVESPA Prediction Dashboard")
 
 # Carregar dados
-df_feat, df = load_features_cached()
-model, model_info, feature_columns = load_model_and_info()
+bundle, load_error = load_model_and_info()
 
-if model is None:
-    st.error("❌ Erro ao carregar modelo")
+if bundle is None:
+    st.error(f"❌ Erro ao carregar modelo: {load_error}")
     st.stop()
 
+model_info, feature_columns = bundle.info, bundle.feature_columns
+df_feat, df, model_input, model_dates = load_features_cached(feature_columns)
+
 # Sidebar
 st.sidebar.header("⚙️ Filtros & Info")
 
@@ -297,7 +275,7 @@ with st.sidebar.expander("📊 Volatilidade"):
 # ========================================
 
 # Pegar previsão
-pred, conf, reasons = get_prediction_and_reasons(df_feat, feature_columns, model)
+pred, conf, reasons = get_prediction_and_reasons(df_feat, model_input, bundle)
 indicators = get_current_indicators(df_feat)
 
 # TOP METRICS
@@ -344,259 +322,284 @@ if pred:
 
 st.markdown("---")
 
-# TABS
-tab1, tab2, tab3, tab4 = st.tabs(["📈 Análise Técnica", "🎯 Indicadores Atuais", "📊 Performance do Modelo", "📝 Resumo"])
+# TABS (preguiçosas: só a aba aberta executa)
+tab1, tab2, tab3, tab4 = st.tabs(
+    ["📈 Análise Técnica", "🎯 Indicadores Atuais", "📊 Performance do Modelo", "📝 Resumo"],
+    key="main_tab",
+    on_change="rerun"
+)
 
 # ========================================
 # TAB 1: ANÁLISE TÉCNICA (GRÁFICOS)
 # ========================================
 
-with tab1:
-    st.subheader("📈 Série Histórica com Médias Móveis")
-    
-    # Sampling para velocidade
-    sampling_rate = 5
-    df_plot = df_filtered.iloc[::sampling_rate].copy()
-    df_feat_plot = df_feat_filtered.iloc[::sampling_rate].copy()
-    
-    fig1 = go.Figure()
-    
-    # Close
-    fig1.add_trace(go.Scatter(
-        x=df_plot['date'],
-        y=df_plot['close'],
-        mode='lines',
-        name='Preço (Close)',
-        line=dict(color='black', width=2),
-        hovertemplate='%{x|%d/%m/%Y}<br>R$ %{y:,.0f}<extra></extra>'
-    ))
-    
-    # MAs
-    fig1.add_trace(go.Scatter(
-        x=df_feat_plot['date'],
-        y=df_feat_plot['ma10'],
-        mode='lines',
-        name='MA10',
-        line=dict(color='green', width=1),
-        hovertemplate='MA10: %{y:,.0f}<extra></extra>'
-    ))
-    
-    fig1.add_trace(go.Scatter(
-        x=df_feat_plot['date'],
-        y=df_feat_plot['ma20'],
-        mode='lines',
-        name='MA20',
-        line=dict(color='blue', width=1),
-        hovertemplate='MA20: %{y:,.0f}<extra></extra>'
-    ))
-    
-    fig1.add_trace(go.Scatter(
-        x=df_feat_plot['date'],
-        y=df_feat_plot['ma50'],
-        mode='lines',
-        name='MA50',
-        line=dict(color='red', width=1),
-        hovertemplate='MA50: %{y:,.0f}<extra></extra>'
-    ))
-    
-    fig1.update_layout(hovermode='x unified', height=400, title="Série Histórica (últimos dias)")
-    st.plotly_chart(fig1, use_container_width=True)
-    
-    # RSI
-    st.subheader("📊 RSI (Relative Strength Index)")
-    
-    fig2 = go.Figure()
-    
-    fig2.add_trace(go.Scatter(
-        x=df_feat_plot['date'],
-        y=df_feat_plot['rsi'],
-        mode='lines',
-        name='RSI',
-        line=dict(color='purple', width=2),
-        fill='tozeroy',
-        hovertemplate='RSI: %{y:.1f}<extra></extra>'
-    ))
-    
-    # Zonas
-    fig2.add_hline(y=70, line_dash="dash", line_color="red", 
-                   annotation_text="COMPRADO (70)", annotation_position="right")
-    fig2.add_hline(y=30, line_dash="dash", line_color="green", 
-                   annotation_text="VENDIDO (30)", annotation_position="right")
-    fig2.add_hrect(y0=70, y1=100, fillcolor="red", opacity=0.1, annotation_text="Zona Comprada")
-    fig2.add_hrect(y0=0, y1=30, fillcolor="green", opacity=0.1, annotation_text="Zona Vendida")
-    
-    fig2.update_layout(hovermode='x unified', height=300, title="RSI")
-    st.plotly_chart(fig2, use_container_width=True)
-    
-    # MACD
-    st.subheader("📊 MACD (Moving Average Convergence Divergence)")
-    
-    fig3 = go.Figure()
-    
-    fig3.add_trace(go.Scatter(
-        x=df_feat_plot['date'],
-        y=df_feat_plot['macd'],
-        mode='lines',
-        name='MACD',
-        line=dict(color='green', width=2),
-        hovertemplate='MACD: %{y:.0f}<extra></extra>'
-    ))
-    
-    fig3.add_trace(go.Scatter(
-        x=df_feat_plot['date'],
-        y=df_feat_plot['signal'],
-        mode='lines',
-        name='Signal',
-        line=dict(color='red', width=2),
-        hovertemplate='Signal: %{y:.0f}<extra></extra>'
-    ))
-    
-    fig3.add_trace(go.Bar(
-        x=df_feat_plot['date'],
-        y=df_feat_plot['macd_hist'],
-        name='Histogram',
-        marker=dict(color=df_feat_plot['macd_hist'].apply(lambda x: 'green' if x > 0 else 'red')),
-        hovertemplate='Hist: %{y:.0f}<extra></extra>'
-    ))
-    
-    fig3.update_layout(hovermode='x unified', height=300, title="MACD")
-    st.plotly_chart(fig3, use_container_width=True)
+if tab1.open:
+    with tab1:
+        st.subheader("📈 Série Histórica com Médias Móveis")
+
+        # Sampling para velocidade
+        sampling_rate = 5
+        df_plot = df_filtered.iloc[::sampling_rate].copy()
+        df_feat_plot = df_feat_filtered.iloc[::sampling_rate].copy()
+
+        fig1 = go.Figure()
+
+        # Close
+        fig1.add_trace(go.Scatter(
+            x=df_plot['date'],
+            y=df_plot['close'],
+            mode='lines',
+            name='Preço (Close)',
+            line=dict(color='black', width=2),
+            hovertemplate='%{x|%d/%m/%Y}<br>R$ %{y:,.0f}<extra></extra>'
+        ))
+
+        # MAs
+        fig1.add_trace(go.Scatter(
+            x=df_feat_plot['date'],
+            y=df_feat_plot['ma10'],
+            mode='lines',
+            name='MA10',
+            line=dict(color='green', width=1),
+            hovertemplate='MA10: %{y:,.0f}<extra></extra>'
+        ))
+
+        fig1.add_trace(go.Scatter(
+            x=df_feat_plot['date'],
+            y=df_feat_plot['ma20'],
+            mode='lines',
+            name='MA20',
+            line=dict(color='blue', width=1),
+            hovertemplate='MA20: %{y:,.0f}<extra></extra>'
+        ))
+
+        fig1.add_trace(go.Scatter(
+            x=df_feat_plot['date'],
+            y=df_feat_plot['ma50'],
+            mode='lines',
+            name='MA50',
+            line=dict(color='red', width=1),
+            hovertemplate='MA50: %{y:,.0f}<extra></extra>'
+        ))
+
+        fig1.update_layout(hovermode='x unified', height=400, title="Série Histórica (últimos dias)")
+        st.plotly_chart(fig1, use_container_width=True)
+
+        # RSI
+        st.subheader("📊 RSI (Relative Strength Index)")
+
+        fig2 = go.Figure()
+
+        fig2.add_trace(go.Scatter(
+            x=df_feat_plot['date'],
+            y=df_feat_plot['rsi'],
+            mode='lines',
+            name='RSI',
+            line=dict(color='purple', width=2),
+            fill='tozeroy',
+            hovertemplate='RSI: %{y:.1f}<extra></extra>'
+        ))
+
+        # Zonas
+        fig2.add_hline(y=70, line_dash="dash", line_color="red", 
+                       annotation_text="COMPRADO (70)", annotation_position="right")
+        fig2.add_hline(y=30, line_dash="dash", line_color="green", 
+                       annotation_text="VENDIDO (30)", annotation_position="right")
+        fig2.add_hrect(y0=70, y1=100, fillcolor="red", opacity=0.1, annotation_text="Zona Comprada")
+        fig2.add_hrect(y0=0, y1=30, fillcolor="green", opacity=0.1, annotation_text="Zona Vendida")
+
+        fig2.update_layout(hovermode='x unified', height=300, title="RSI")
+        st.plotly_chart(fig2, use_container_width=True)
+
+        # MACD
+        st.subheader("📊 MACD (Moving Average Convergence Divergence)")
+
+        fig3 = go.Figure()
+
+        fig3.add_trace(go.Scatter(
+            x=df_feat_plot['date'],
+            y=df_feat_plot['macd'],
+            mode='lines',
+            name='MACD',
+            line=dict(color='green', width=2),
+            hovertemplate='MACD: %{y:.0f}<extra></extra>'
+        ))
+
+        fig3.add_trace(go.Scatter(
+            x=df_feat_plot['date'],
+            y=df_feat_plot['signal'],
+            mode='lines',
+            name='Signal',
+            line=dict(color='red', width=2),
+            hovertemplate='Signal: %{y:.0f}<extra></extra>'
+        ))
+
+        fig3.add_trace(go.Bar(
+            x=df_feat_plot['date'],
+            y=df_feat_plot['macd_hist'],
+            name='Histogram',
+            marker=dict(color=df_feat_plot['macd_hist'].apply(lambda x: 'green' if x > 0 else 'red')),
+            hovertemplate='Hist: %{y:.0f}<extra></extra>'
+        ))
+
+        fig3.update_layout(hovermode='x unified', height=300, title="MACD")
+        st.plotly_chart(fig3, use_container_width=True)
 
 # ========================================
 # TAB 2: INDICADORES ATUAIS
 # ========================================
 
-with tab2:
-    st.subheader("🎯 Indicadores Técnicos Atuais")
-    
-    col1, col2 = st.columns(2)
-    
-    with col1:
-        st.metric("RSI", f"{indicators['rsi']:.1f}")
-        if indicators['rsi'] > 70:
-            st.warning("⚠️ COMPRADO (potencial venda)")
-        elif indicators['rsi'] < 30:
-            st.success("✅ VENDIDO (potencial compra)")
-        
-        st.metric("MACD", f"{indicators['macd']:.0f}")
-        if indicators['macd'] > indicators['signal']:
-            st.success("✅ BULLISH (MACD > Signal)")
-        else:
-            st.error("❌ BEARISH (MACD < Signal)")
-    
-    with col2:
-        st.metric("Volatilidade", f"{indicators['volatility']:.2f}%")
-        if indicators['volatility'] > 2:
-            st.warning("⚠️ Alta volatilidade")
-        elif indicators['volatility'] < 0.5:
-            st.info("ℹ️ Baixa volatilidade")
-        
-        st.metric("MA10 vs MA20 vs MA50", "")
-        if indicators['ma10'] > indicators['ma20'] > indicators['ma50']:
-            st.success("✅ Tendência de ALTA")
-        elif indicators['ma10'] < indicators['ma20'] < indicators['ma50']:
-            st.error("❌ Tendência de BAIXA")
-        else:
-            st.info("ℹ️ Tendência mista")
-    
-    # Tabela de indicadores
-    st.subheader("📋 Valores Exatos")
-    
-    indicators_df = pd.DataFrame({
-        'Indicador': ['Preço Atual', 'MA10', 'MA20', 'MA50', 'RSI', 'MACD', 'Signal Line', 'Volatilidade', 'Banda Bollinger (Superior)', 'Banda Bollinger (Inferior)'],
-        'Valor': [
-            f"R$ {indicators['close']:.2f}",
-            f"{indicators['ma10']:.2f}",
-            f"{indicators['ma20']:.2f}",
-            f"{indicators['ma50']:.2f}",
-            f"{indicators['rsi']:.2f}",
-            f"{indicators['macd']:.2f}",
-            f"{indicators['signal']:.2f}",
-            f"{indicators['volatility']:.2f}%",
-            f"{indicators['bb_upper']:.2f}",
-            f"{indicators['bb_lower']:.2f}"
-        ]
-    })
-    
-    st.dataframe(indicators_df, use_container_width=True)
+if tab2.open:
+    with tab2:
+        st.subheader("🎯 Indicadores Técnicos Atuais")
+
+        col1, col2 = st.columns(2)
+
+        with col1:
+            st.metric("RSI", f"{indicators['rsi']:.1f}")
+            if indicators['rsi'] > 70:
+                st.warning("⚠️ COMPRADO (potencial venda)")
+            elif indicators['rsi'] < 30:
+                st.success("✅ VENDIDO (potencial compra)")
+
+            st.metric("MACD", f"{indicators['macd']:.0f}")
+            if indicators['macd'] > indicators['signal']:
+                st.success("✅ BULLISH (MACD > Signal)")
+            else:
+                st.error("❌ BEARISH (MACD < Signal)")
+
+        with col2:
+            st.metric("Volatilidade", f"{indicators['volatility']:.2f}%")
+            if indicators['volatility'] > 2:
+                st.warning("⚠️ Alta volatilidade")
+            elif indicators['volatility'] < 0.5:
+                st.info("ℹ️ Baixa volatilidade")
+
+            st.metric("MA10 vs MA20 vs MA50", "")
+            if indicators['ma10'] > indicators['ma20'] > indicators['ma50']:
+                st.success("✅ Tendência de ALTA")
+            elif indicators['ma10'] < indicators['ma20'] < indicators['ma50']:
+                st.error("❌ Tendência de BAIXA")
+            else:
+                st.info("ℹ️ Tendência mista")
+
+        # Tabela de indicadores
+        st.subheader("📋 Valores Exatos")
+
+        indicators_df = pd.DataFrame({
+            'Indicador': ['Preço Atual', 'MA10', 'MA20', 'MA50', 'RSI', 'MACD', 'Signal Line', 'Volatilidade', 'Banda Bollinger (Superior)', 'Banda Bollinger (Inferior)'],
+            'Valor': [
+                f"R$ {indicators['close']:.2f}",
+                f"{indicators['ma10']:.2f}",
+                f"{indicators['ma20']:.2f}",
+                f"{indicators['ma50']:.2f}",
+                f"{indicators['rsi']:.2f}",
+                f"{indicators['macd']:.2f}",
+                f"{indicators['signal']:.2f}",
+                f"{indicators['volatility']:.2f}%",
+                f"{indicators['bb_upper']:.2f}",
+                f"{indicators['bb_lower']:.2f}"
+            ]
+        })
+
+        st.dataframe(indicators_df, use_container_width=True)
 
 # ========================================
 # TAB 3: PERFORMANCE DO MODELO
 # ========================================
 
-with tab3:
-    st.subheader("📊 Performance Histórica do Modelo")
-    
-    # Carregar dados históricos se existem
-    try:
-        # Calcular previsões históricas
-        X_all = df_feat[feature_columns].values
-        y_pred_all = model.predict(X_all)
-        
-        # Se tiver target (assumindo que model_info tem)
-        if 'accuracy' in model_info:
-            st.metric("Acurácia Geral", f"{model_info['accuracy']*100:.1f}%")
-            st.metric("AUC-ROC", f"{model_info.get('auc', 0.5):.2f}")
-        
-        # Métricas por classe (se tiver y_true, seria ideal)
-        col1, col2, col3 = st.columns(3)
-        with col1:
-            st.metric("Precision (ALTA)", f"{model_info.get('precision_high', 0.6):.1%}")
-        with col2:
-            st.metric("Recall (ALTA)", f"{model_info.get('recall_high', 0.6):.1%}")
-        with col3:
-            st.metric("F1-Score", f"{model_info.get('f1', 0.6):.2f}")
-        
-        st.info(f"""
-        **Informações do Modelo:**
-        - Tipo: {model_info.get('model_type', 'Desconhecido')}
-        - Features: {len(feature_columns)} indicadores técnicos
-        - Data de treinamento: {model_info.get('training_date', 'N/A')}
-        """)
-        
-    except Exception as e:
-        st.warning(f"Não foi possível carregar todas as métricas: {e}")
+if tab3.open:
+    with tab3:
+        st.subheader("📊 Performance Histórica do Modelo")
+
+        # Carregar dados históricos se existem
+        try:
+            # Calcular previsões históricas
+            y_pred_all = historical_predictions(
+                bundle, model_input, bundle.version, data_version('Unified_Data.csv')
+            )
+
+            # Se tiver target (assumindo que model_info tem)
+            if 'accuracy' in model_info:
+                st.metric("Acurácia Geral", f"{model_info['accuracy']*100:.1f}%")
+                st.metric("AUC-ROC", f"{model_info.get('auc', 0.5):.2f}")
+
+            # Métricas por classe (se tiver y_true, seria ideal)
+            col1, col2, col3 = st.columns(3)
+            with col1:
+                st.metric("Precision (ALTA)", f"{model_info.get('precision_high', 0.6):.1%}")
+            with col2:
+                st.metric("Recall (ALTA)", f"{model_info.get('recall_high', 0.6):.1%}")
+            with col3:
+                st.metric("F1-Score", f"{model_info.get('f1', 0.6):.2f}")
+
+            # P(ALTA) do modelo no período selecionado
+            fig_proba = go.Figure()
+            fig_proba.add_trace(go.Scatter(
+                x=model_dates[-period:],
+                y=y_pred_all[-period:],
+                mode='lines',
+                name='P(ALTA)',
+                line=dict(color='purple', width=2),
+                hovertemplate='%{x|%d/%m/%Y}<br>P(ALTA): %{y:.1%}<extra></extra>'
+            ))
+            fig_proba.add_hline(y=0.5, line_dash="dash", line_color="gray")
+            fig_proba.update_layout(hovermode='x unified', height=300, yaxis_tickformat='.0%',
+                                    title=f"Probabilidade de ALTA (últimos {period} dias)")
+            st.plotly_chart(fig_proba, use_container_width=True)
+            st.metric("Sinais de ALTA no período", f"{(y_pred_all[-period:] >= 0.5).mean():.0%}")
+
+            st.info(f"""
+            **Informações do Modelo:**
+            - Tipo: {model_info.get('model_type', 'Desconhecido')}
+            - Features: {len(feature_columns)} indicadores técnicos
+            - Data de treinamento: {model_info.get('training_date', 'N/A')}
+            """)
+
+        except Exception as e:
+            st.warning(f"Não foi possível carregar todas as métricas: {e}")
 
 # ========================================
 # TAB 4: RESUMO EXECUTIVO
 # ========================================
 
-with tab4:
-    st.subheader("📝 Resumo Executivo")
-    
-    st.write(f"""
-    ### Status Atual (em {indicators['date'].strftime('%d/%m/%Y')})
-    
-    **Preço:** R$ {indicators['close']:,.2f}  
-    **Variação (período):** {variacao:+.2f}%
-    
-    ### Previsão do Modelo
-    
-    {f"**Previsão:** {pred} com {conf:.0f}% de confiança" if pred else "Erro ao calcular previsão"}
-    
-    ### Interpretação Técnica
-    
-    1. **RSI ({indicators['rsi']:.0f}):** {"Zona de comprado - cuidado com vendas" if indicators['rsi'] > 70 else "Zona de vendido - possível compra" if indicators['rsi'] < 30 else "Neutro"}
-    
-    2. **MACD:** {"Bullish (tendência de alta)" if indicators['macd'] > indicators['signal'] else "Bearish (tendência de baixa)"}
-    
-    3. **Tendência (MAs):** {"Alta" if indicators['ma10'] > indicators['ma20'] > indicators['ma50'] else "Baixa" if indicators['ma10'] < indicators['ma20'] < indicators['ma50'] else "Mista"}
-    
-    4. **Volatilidade ({indicators['volatility']:.2f}%):** {"Alta" if indicators['volatility'] > 2 else "Baixa" if indicators['volatility'] < 0.5 else "Moderada"}
-    
-    ### Aviso Importante
-    
-    ⚠️ Este modelo é uma **ferramenta de análise técnica auxiliar**.  
-    **NÃO use como única base para decisões de investimento.**  
-    Sempre considere:
-    - Análise fundamental da empresa
-    - Análise macroeconômica
-    - Seu perfil de risco
-    - Diversificação de portfólio
-    
-    ✅ **Use para:** Confirmar tendências técnicas  
-    ❌ **Não use para:** Tomar decisões de trading sem análise adicional
-    """)
+if tab4.open:
+    with tab4:
+        st.subheader("📝 Resumo Executivo")
+
+        st.write(f"""
+        ### Status Atual (em {indicators['date'].strftime('%d/%m/%Y')})
+
+        **Preço:** R$ {indicators['close']:,.2f}  
+        **Variação (período):** {variacao:+.2f}%
+
+        ### Previsão do Modelo
+
+        {f"**Previsão:** {pred} com {conf:.0f}% de confiança" if pred else "Erro ao calcular previsão"}
+
+        ### Interpretação Técnica
+
+        1. **RSI ({indicators['rsi']:.0f}):** {"Zona de comprado - cuidado com vendas" if indicators['rsi'] > 70 else "Zona de vendido - possível compra" if indicators['rsi'] < 30 else "Neutro"}
+
+        2. **MACD:** {"Bullish (tendência de alta)" if indicators['macd'] > indicators['signal'] else "Bearish (tendência de baixa)"}
+
+        3. **Tendência (MAs):** {"Alta" if indicators['ma10'] > indicators['ma20'] > indicators['ma50'] else "Baixa" if indicators['ma10'] < indicators['ma20'] < indicators['ma50'] else "Mista"}
+
+        4. **Volatilidade ({indicators['volatility']:.2f}%):** {"Alta" if indicators['volatility'] > 2 else "Baixa" if indicators['volatility'] < 0.5 else "Moderada"}
+
+        ### Aviso Importante
+
+        ⚠️ Este modelo é uma **ferramenta de análise técnica auxiliar**.  
+        **NÃO use como única base para decisões de investimento.**  
+        Sempre considere:
+        - Análise fundamental da empresa
+        - Análise macroeconômica
+        - Seu perfil de risco
+        - Diversificação de portfólio
+
+        ✅ **Use para:** Confirmar tendências técnicas  
+        ❌ **Não use para:** Tomar decisões de trading sem análise adicional
+        """)
 
 st.markdown("---")
 st.caption("Dashboard atualizado em tempo real • Cache: 1 hora • Modelo baseado em indicadores técnicos")
@@ -1,15 +1,16 @@
 import streamlit as st
 import pandas as pd
 import numpy as np
-import plotly.graph_objects as go
-import plotly.express as px
 from datetime import datetime, timedelta
 import traceback
-from sklearn.ensemble import RandomForestClassifier
-from sklearn.preprocessing import StandardScaler
 import warnings
 warnings.filterwarnings('ignore')
 
+from ibov.lazy import lazy_import
+
+go = lazy_import('plotly.graph_objects')
+px = lazy_import('plotly.express')
+
 # ═════════════════════════════════════════════════════════════════════════════
 # 🔧 FUNÇÕES AUXILIARES
 # ═════════════════════════════════════════════════════════════════════════════
@@ -85,6 +86,10 @@ def create_features(df):
 def train_model(df):
     """Treina modelo de classificação"""
     try:
+        # sklearn (~1,5 s de import) só quando o modelo é treinado
+        from sklearn.ensemble import RandomForestClassifier
+        from sklearn.preprocessing import StandardScaler
+
         # Features para treino
         feature_cols = ['sma_5', 'sma_20', 'sma_50', 'rsi', 'macd', 'macd_signal', 
                        'volatility', 'bb_upper', 'bb_lower']
@@ -8,15 +8,18 @@
 # ========================================
 
 import streamlit as st
-import pandas as pd
 import numpy as np
-import plotly.graph_objects as go
-from sklearn.preprocessing import StandardScaler
 import warnings
 warnings.filterwarnings('ignore')
 import json
 import pickle
 
+from ibov.features import ATR_WINDOW, true_range
+from ibov.ingest import load_unified_data
+from ibov.lazy import lazy_import
+
+go = lazy_import('plotly.graph_objects')
+
 # ========================================
 # 1. CARREGAR CSV COM VALIDAÇÃO
 # ========================================
@@ -24,14 +27,7 @@ import pickle
 @st.cache_data(ttl=3600)
 def load_csv_optimized():
     """Carrega CSV e valida colunas"""
-    df = pd.read_csv(
-        'Unified_Data.csv',
-        dtype={
-            'close': 'float32',
-            'selic': 'float32'
-        },
-        parse_dates=['date']
-    )
+    df = load_unified_data('Unified_Data.csv')
     
     # DEBUG: Mostrar colunas disponíveis
     print(f"✅ Colunas encontradas: {df.columns.tolist()}")
@@ -51,14 +47,11 @@ def create_features(df):
     """
     df = df.copy()
     
-    # Verificar quais colunas existem
-    has_high = 'high' in df.columns
-    has_low = 'low' in df.columns
-    has_open = 'open' in df.columns
+    # Verificar quais colunas existem (OHLCV sempre vem da base unificada)
     has_usd_close = 'usd_close' in df.columns
     has_selic = 'selic' in df.columns
     
-    print(f"Colunas disponíveis: high={has_high}, low={has_low}, open={has_open}, usd_close={has_usd_close}, selic={has_selic}")
+    print(f"Colunas disponíveis: usd_close={has_usd_close}, selic={has_selic}")
     
     # ===== MÉDIAS MÓVEIS (sempre possível com 'close') =====
     df['ma5'] = df['close'].rolling(window=5).mean()
@@ -90,31 +83,13 @@ def create_features(df):
     # ===== RETORNO LOGARÍTMICO =====
     df['log_return'] = np.log(df['close'] / df['close'].shift(1))
     
-    # ===== ATR (SÓ SE TIVER high/low) =====
-    if has_high and has_low:
-        df['tr'] = np.maximum(
-            df['high'] - df['low'],
-            np.maximum(
-                abs(df['high'] - df['close'].shift()),
-                abs(df['low'] - df['close'].shift())
-            )
-        )
-        df['atr'] = df['tr'].rolling(window=14).mean()
-        print("✅ ATR calculado (high/low disponíveis)")
-    else:
-        # ATR alternativo usando apenas close
-        df['atr'] = df['close'].rolling(window=14).std() * 1.5
-        print("⚠️  ATR aproximado (high/low não disponíveis)")
-    
-    # ===== RAZÃO HIGH/LOW (SÓ SE TIVER) =====
-    if has_high and has_low:
-        df['hl_ratio'] = df['high'] / df['low']
-        print("✅ HL Ratio calculado")
+    # ===== ATR (true range com high/low/close) =====
+    df['tr'] = true_range(df['high'], df['low'], df['close'])
+    df['atr'] = df['tr'].rolling(window=ATR_WINDOW).mean()
     
-    # ===== RAZÃO CLOSE/OPEN (SÓ SE TIVER) =====
-    if has_open:
-        df['co_ratio'] = df['close'] / df['open']
-        print("✅ CO Ratio calculado")
+    # ===== RAZÕES HIGH/LOW E CLOSE/OPEN =====
+    df['hl_ratio'] = df['high'] / df['low']
+    df['co_ratio'] = df['close'] / df['open']
     
     # ===== USD CLOSE (SÓ SE TIVER) =====
     if has_usd_close:
@@ -0,0 +1,7 @@
+"""
+Código compartilhado pelos dashboards do IBOVESPA (Tech Challenge Fase 4).
+
+Os scripts ``app*.py`` na raiz continuam sendo os pontos de entrada do
+Streamlit; este pacote concentra a ingestão, as features e o modelo para
+que todos usem a mesma implementação.
+"""
@@ -0,0 +1,71 @@
+"""
+Ajuste do ARIMA(1,0,0) dos log-returns no calendário de pregões da B3.
+
+O notebook monta a série com ``asfreq("B").ffill()``: cada feriado em dia
+de semana vira uma linha copiada do pregão anterior, com log-return repetido,
+que o ARIMA lê como observação (117 linhas inventadas desde 2016). Aqui a
+série vem de ``b3_calendar().conform``: um passo por pregão, feriados fora
+e pregão sem dado como NaN (observação ausente para o statsmodels).
+
+O ``.pkl`` (joblib, como no notebook) e o formato rápido ao lado dele
+(``ibov.artifacts``) são regravados juntos; os resíduos exportados alimentam
+o bootstrap do fan chart (``ibov.scenarios``).
+
+Uso:
+    python -m ibov.arima [modelo.pkl]   # padrão: model/modelo_ibov.pkl
+"""
+
+import sys
+import warnings
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from ibov.artifacts import artifact_dir, export_arima, file_sha256
+from ibov.trading_calendar import b3_calendar
+
+ARIMA_PATH = Path('model/modelo_ibov.pkl')
+ORDER = (1, 0, 0)
+
+
+def log_return_series(df: pd.DataFrame) -> pd.Series:
+    """Log-returns do fechamento indexados pelos pregões (``freq`` do calendário da B3)"""
+    close = df.set_index('date')['close'].astype(np.float64)
+    returns = np.log(close).diff().dropna().rename('log_return')
+    return b3_calendar().conform(returns)
+
+
+def fit_arima(series: pd.Series):
+    """ARIMA(1,0,0) com constante, como o modelo final do notebook"""
+    from statsmodels.tsa.arima.model import ARIMA  # só no ajuste
+
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore', FutureWarning)
+        return ARIMA(series, order=ORDER).fit()
+
+
+def save_arima(results, path=ARIMA_PATH) -> Path:
+    """Grava o ``.pkl`` e exporta o formato rápido com o hash dele"""
+    import joblib  # só no ajuste
+
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    joblib.dump(results, path)
+    return export_arima(results, artifact_dir(path), file_sha256(path))
+
+
+if __name__ == '__main__':
+    if len(sys.argv) > 2:
+        print(__doc__)
+        sys.exit(1)
+    from ibov.ingest import UNIFIED_PATH, load_unified_data
+
+    path = Path(sys.argv[1]) if len(sys.argv) > 1 else ARIMA_PATH
+    series = log_return_series(load_unified_data(UNIFIED_PATH))
+    results = fit_arima(series)
+    folder = save_arima(results, path)
+    params = results.params
+    print(f"✅ {path} + {folder}/: {int(results.nobs)} pregões "
+          f"({series.index[0]:%d/%m/%Y} a {series.index[-1]:%d/%m/%Y}, {int(series.isna().sum())} sem dado)")
+    print(f"   const {params['const']:+.6f} | ar.L1 {params['ar.L1']:+.4f} | sigma2 {params['sigma2']:.3e}")
@@ -0,0 +1,315 @@
+"""
+Formato rápido e seguro para os artefatos de modelo.
+
+Em vez de ``pickle.load``/``joblib.load`` (que reconstroem o grafo de
+objetos inteiro, importam sklearn/statsmodels e executam código arbitrário
+do arquivo), cada modelo vira uma pasta com:
+
+    header.json      # tipo, hiperparâmetros, classes, nomes das features
+    <array>.npy      # parâmetros numéricos, abertos com mmap_mode='r'
+
+A carga fria é só ler um JSON pequeno e mapear os .npy em memória; a
+inferência é feita em NumPy puro (``TreeEnsemble``, ``ArimaParams``).
+
+Uso:
+    python -m ibov.artifacts export best_model.pkl          # → best_model/
+    python -m ibov.artifacts export model/modelo_ibov.pkl   # → model/modelo_ibov/
+"""
+
+import hashlib
+import json
+import os
+import shutil
+import sys
+from pathlib import Path
+from typing import Optional
+
+import numpy as np
+
+FORMAT_VERSION = 1
+HEADER_FILE = 'header.json'
+
+
+def artifact_dir(path) -> Path:
+    """Pasta do formato rápido correspondente a um ``.pkl`` (mesmo nome, sem sufixo)"""
+    path = Path(path)
+    return path.with_suffix('') if path.suffix else path
+
+
+def file_sha256(path) -> str:
+    h = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def has_artifact(path) -> bool:
+    """
+    Existe pasta no formato rápido para ``path`` e ela corresponde ao ``.pkl``?
+
+    Se o ``.pkl`` foi substituído depois da exportação (hash diferente), a
+    pasta é ignorada para nunca servir um modelo desatualizado.
+    """
+    header_path = artifact_dir(path) / HEADER_FILE
+    if not header_path.exists():
+        return False
+    path = Path(path)
+    if path.is_file():
+        with open(header_path, 'r') as f:
+            source = json.load(f).get('source_sha256')
+        return source is None or source == file_sha256(path)
+    return True
+
+
+def replace_dir(src: Path, dst: Path) -> None:
+    """
+    Troca a pasta ``dst`` por ``src`` (renomeia a antiga para o lado antes de remover).
+
+    Não é atômica: entre os dois ``os.rename`` ``dst`` não existe. Serve para
+    o formato rápido ao lado do ``.pkl`` (sem a pasta, a carga usa o pickle);
+    estado lido por outros processos usa estados versionados + ponteiro
+    (``ibov.online``, ``ibov.registry``).
+    """
+    old = None
+    if dst.exists():
+        old = dst.with_name(f'.{dst.name}.old-{os.getpid()}')
+        os.rename(dst, old)
+    os.rename(src, dst)
+    if old is not None:
+        shutil.rmtree(old, ignore_errors=True)
+
+
+def write_arrays(folder: Path, header: dict, arrays: dict, source_sha256: Optional[str] = None) -> Path:
+    """Grava ``arrays`` (nome → array) como ``.npy`` e o ``header.json`` que os lista"""
+    folder.mkdir(parents=True, exist_ok=True)
+    for name, values in arrays.items():
+        np.save(folder / f'{name}.npy', np.ascontiguousarray(values), allow_pickle=False)
+    header = dict(header, format_version=FORMAT_VERSION, arrays=sorted(arrays),
+                  source_sha256=source_sha256)
+    with open(folder / HEADER_FILE, 'w') as f:
+        json.dump(header, f, indent=2)
+    return folder
+
+
+def read_arrays(folder: Path):
+    """
+    ``(header, arrays)`` de uma pasta gravada por ``write_arrays``; os arrays
+    são mapeados em memória (somente leitura).
+    """
+    with open(folder / HEADER_FILE, 'r') as f:
+        header = json.load(f)
+    if header.get('format_version') != FORMAT_VERSION:
+        raise ValueError(f"Versão de formato não suportada em {folder}: {header.get('format_version')}")
+    arrays = {name: np.load(folder / f'{name}.npy', mmap_mode='r', allow_pickle=False)
+              for name in header['arrays']}
+    return header, arrays
+
+
+# =========================
+# ENSEMBLES DE ÁRVORES (sklearn)
+# =========================
+
+class TreeEnsemble:
+    """
+    Ensemble de árvores em arrays planos (todas as árvores concatenadas).
+
+    Expõe a mesma interface usada pelos apps (``predict_proba``,
+    ``predict``, ``classes_``, ``n_features_in_``, ``feature_names_in_``)
+    sem importar sklearn.
+    """
+
+    def __init__(self, header: dict, arrays: dict):
+        self.header = header
+        self.kind = header['kind']
+        self.classes_ = np.asarray(header['classes'])
+        self.n_features_in_ = header['n_features']
+        if header.get('feature_names') is not None:
+            self.feature_names_in_ = np.asarray(header['feature_names'], dtype=object)
+        self.learning_rate = header.get('learning_rate', 1.0)
+        self.init_raw = header.get('init_raw', 0.0)
+        self.max_depth = header['max_depth']
+
+        self.roots = arrays['roots']
+        self.feature = arrays['feature']
+        self.threshold = arrays['threshold']
+        self.left = arrays['left']
+        self.right = arrays['right']
+        self.value = arrays['value']
+        # Amostras de treino (ponderadas) por nó; ausente em artefatos antigos
+        self.cover = arrays.get('cover')
+
+    def leaves(self, X: np.ndarray) -> np.ndarray:
+        """Nó-folha alcançado por cada amostra em cada árvore (amostras × árvores)"""
+        # Mesmo critério do sklearn: X em float32 comparado com limiar float64
+        X = np.asarray(X, dtype=np.float32)
+        rows = np.arange(X.shape[0])[:, None]
+        nodes = np.broadcast_to(self.roots, (X.shape[0], len(self.roots))).copy()
+        for _ in range(self.max_depth):
+            left = self.left[nodes]
+            internal = left >= 0
+            if not internal.any():
+                break
+            go_left = X[rows, self.feature[nodes]] <= self.threshold[nodes]
+            nodes = np.where(internal, np.where(go_left, left, self.right[nodes]), nodes)
+        return nodes
+
+    def decision_function(self, X: np.ndarray) -> np.ndarray:
+        """Log-odds (gradient boosting) ou P(classe 1) média (random forest)"""
+        leaf_values = self.value[self.leaves(X)]
+        if self.kind == 'gradient_boosting':
+            return self.init_raw + self.learning_rate * leaf_values.sum(axis=1)
+        return leaf_values.mean(axis=1)
+
+    def predict_proba(self, X: np.ndarray) -> np.ndarray:
+        score = self.decision_function(X)
+        p1 = 1.0 / (1.0 + np.exp(-score)) if self.kind == 'gradient_boosting' else score
+        return np.column_stack([1.0 - p1, p1])
+
+    def predict(self, X: np.ndarray) -> np.ndarray:
+        return self.classes_[self.predict_proba(X).argmax(axis=1)]
+
+
+def tree_ensemble_arrays(model):
+    """``(header, arrays)`` de um GradientBoostingClassifier / RandomForestClassifier binário"""
+    kind = type(model).__name__
+    if kind == 'GradientBoostingClassifier':
+        if model.n_trees_per_iteration_ != 1:
+            raise ValueError("Somente classificação binária é suportada")
+        trees = [est.tree_ for est in model.estimators_[:, 0]]
+        # Score inicial (prior do DummyClassifier) no espaço de log-odds
+        init_raw = float(model._raw_predict_init(np.zeros((1, model.n_features_in_), dtype=np.float32))[0, 0])
+        header = {'kind': 'gradient_boosting', 'learning_rate': float(model.learning_rate),
+                  'init_raw': init_raw}
+        leaf_value = lambda t: t.value[:, 0, 0]
+    elif kind in ('RandomForestClassifier', 'ExtraTreesClassifier'):
+        if len(model.classes_) != 2:
+            raise ValueError("Somente classificação binária é suportada")
+        trees = [est.tree_ for est in model.estimators_]
+        header = {'kind': 'random_forest'}
+        # Fração da classe 1 em cada folha (o sklearn faz a média dessas frações)
+        leaf_value = lambda t: t.value[:, 0, 1] / t.value[:, 0, :].sum(axis=1)
+    else:
+        raise TypeError(f"Modelo não suportado no formato rápido: {kind}")
+
+    offsets = np.cumsum([0] + [t.node_count for t in trees])
+    shift = lambda a, off: np.where(a >= 0, a + off, -1)
+
+    arrays = {
+        'roots': offsets[:-1].astype(np.int32),
+        'feature': np.concatenate([np.maximum(t.feature, 0) for t in trees]).astype(np.int32),
+        'threshold': np.concatenate([t.threshold for t in trees]).astype(np.float64),
+        'left': np.concatenate([shift(t.children_left, o) for t, o in zip(trees, offsets)]).astype(np.int32),
+        'right': np.concatenate([shift(t.children_right, o) for t, o in zip(trees, offsets)]).astype(np.int32),
+        'value': np.concatenate([leaf_value(t) for t in trees]).astype(np.float64),
+        'cover': np.concatenate([t.weighted_n_node_samples for t in trees]).astype(np.float64),
+    }
+    names = getattr(model, 'feature_names_in_', None)
+    header.update({
+        'estimator': kind,
+        'classes': np.asarray(model.classes_).tolist(),
+        'n_features': int(model.n_features_in_),
+        'feature_names': None if names is None else [str(n) for n in names],
+        'n_trees': len(trees),
+        'max_depth': int(max(t.max_depth for t in trees)),
+    })
+    return header, arrays
+
+
+def tree_ensemble(model) -> TreeEnsemble:
+    """Mesma conversão em memória (sem gravar), para inferência/atribuição em NumPy"""
+    return TreeEnsemble(*tree_ensemble_arrays(model))
+
+
+def export_tree_ensemble(model, folder, source_sha256: Optional[str] = None) -> Path:
+    """Exporta GradientBoostingClassifier / RandomForestClassifier binário"""
+    header, arrays = tree_ensemble_arrays(model)
+    return write_arrays(Path(folder), header, arrays, source_sha256)
+
+
+# =========================
+# ARIMA (statsmodels)
+# =========================
+
+class ArimaParams:
+    """
+    ARIMA(1,0,0) com constante a partir dos parâmetros exportados.
+
+    ``const`` é a média do processo (convenção do statsmodels), então a
+    previsão de um passo é ``const + phi * (y_t - const)``.
+    """
+
+    def __init__(self, header: dict, arrays: dict):
+        self.header = header
+        self.order = tuple(header['order'])
+        self.const = header['params']['const']
+        self.phi = header['params']['ar.L1']
+        self.sigma2 = header['params']['sigma2']
+        self.last_value = header['last_value']
+        self.last_date = header.get('last_date')
+        self.resid = arrays.get('resid')
+
+    def predict(self, X) -> np.ndarray:
+        """Próximo log-return dado o último observado (uma linha por amostra)"""
+        last = np.asarray(X, dtype=np.float64)[:, -1]
+        return self.const + self.phi * (last - self.const)
+
+    def forecast(self, steps: int = 1) -> np.ndarray:
+        """Previsão de ``steps`` passos a partir do fim da série de treino"""
+        decay = self.phi ** np.arange(1, steps + 1)
+        return self.const + decay * (self.last_value - self.const)
+
+
+def export_arima(results, folder, source_sha256: Optional[str] = None) -> Path:
+    """Exporta um ``ARIMAResults`` (ordem (1,0,0), tendência 'c')"""
+    order = tuple(results.model.order)
+    if order != (1, 0, 0) or results.model.trend != 'c':
+        raise ValueError(f"Somente ARIMA(1,0,0) com constante é suportado (recebido {order})")
+    endog = np.asarray(results.model.endog, dtype=np.float64).ravel()
+    index = getattr(results.model, '_index', None)
+    header = {
+        'kind': 'arima',
+        'order': list(order),
+        'params': {k: float(v) for k, v in results.params.items()},
+        'last_value': float(endog[-1]),
+        'last_date': str(index[-1].date()) if index is not None and hasattr(index[-1], 'date') else None,
+        'nobs': int(results.nobs),
+    }
+    resid = np.asarray(results.resid, dtype=np.float64)
+    return write_arrays(Path(folder), header, {'resid': resid}, source_sha256)
+
+
+# =========================
+# CARGA
+# =========================
+
+LOADERS = {
+    'gradient_boosting': TreeEnsemble,
+    'random_forest': TreeEnsemble,
+    'arima': ArimaParams,
+}
+
+
+def load_artifact(path):
+    """Carrega um artefato no formato rápido (pasta ou ``.pkl`` com pasta irmã)"""
+    header, arrays = read_arrays(artifact_dir(path))
+    return LOADERS[header['kind']](header, arrays)
+
+
+def export(pkl_path) -> Path:
+    """Converte um ``.pkl`` existente para o formato rápido ao lado dele"""
+    import joblib  # só na exportação
+
+    model = joblib.load(pkl_path)
+    folder = artifact_dir(pkl_path)
+    source = file_sha256(pkl_path)
+    if hasattr(model, 'estimators_'):
+        return export_tree_ensemble(model, folder, source)
+    return export_arima(model, folder, source)
+
+
+if __name__ == '__main__':
+    if len(sys.argv) != 3 or sys.argv[1] != 'export':
+        print(__doc__)
+        sys.exit(1)
+    print(f"✅ Exportado para {export(sys.argv[2])}/")
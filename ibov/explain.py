@@ -0,0 +1,305 @@
+"""
+Atribuição por feature (TreeSHAP) para os ensembles de árvores.
+
+Para cada linha, ``φ_j`` é a contribuição da feature ``j`` para o score
+do modelo: ``base + Σ_j φ_j`` reproduz exatamente o ``decision_function``
+(log-odds no gradient boosting, P(ALTA) média na random forest). O
+algoritmo é o TreeSHAP "path-dependent" (Lundberg et al., 2018): em cada
+árvore, os caminhos raiz → folha carregam os pesos de Shapley das
+features já vistas, e a fração de amostras de treino de cada nó (cover)
+faz o papel da distribuição de fundo.
+
+A recursão percorre cada nó uma única vez com *todas* as linhas ao mesmo
+tempo, e os pesos de Shapley de cada folha são calculados por padrão de
+caminho distinto, não por linha: o histórico inteiro sai em uma passada
+por árvore, em NumPy puro.
+
+O resultado é gravado em ``.cache/explain/<hash do modelo + matriz>/`` e
+mapeado em memória: o painel de razões só faz a busca da linha.
+Artefatos antigos sem ``cover.npy`` usam as contagens das próprias linhas
+explicadas (+1 por folha).
+
+Uso:
+    python -m ibov.explain [n]   # atribuições do best_model na base atual e as n maiores da última linha
+"""
+
+import hashlib
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+from dataclasses import dataclass
+from datetime import datetime
+from pathlib import Path
+
+import numpy as np
+
+from ibov.artifacts import HEADER_FILE, TreeEnsemble, file_sha256, read_arrays, tree_ensemble, write_arrays
+
+EXPLAIN_CACHE_DIR = Path('.cache') / 'explain'
+KEEP_EXPLANATIONS = 5
+TOP_DRIVERS = 5
+# Caminhos com até 2^10 padrões são enumerados; acima disso, só os padrões presentes
+MAX_ENUMERATED_PATH = 10
+TREE_ARRAYS = ('roots', 'feature', 'threshold', 'left', 'right', 'value', 'cover')
+# Campos do header que descrevem o arquivo, não o modelo
+BOOKKEEPING_KEYS = ('format_version', 'arrays', 'source_sha256')
+
+
+def as_tree_ensemble(model):
+    """``TreeEnsemble`` do modelo (artefato ou sklearn GB/RF), ou ``None`` se não for de árvores"""
+    if isinstance(model, TreeEnsemble):
+        return model
+    try:
+        return tree_ensemble(model)
+    except (TypeError, ValueError, AttributeError):
+        return None
+
+
+def node_cover(ensemble: TreeEnsemble, X: np.ndarray) -> np.ndarray:
+    """Cover de cada nó estimado pelas linhas de ``X`` (uma pseudo-amostra por folha)"""
+    is_leaf = ensemble.left < 0
+    cover = is_leaf.astype(np.float64)
+    cover += np.bincount(ensemble.leaves(X).ravel(), minlength=len(cover))
+    # Filhos sempre têm índice maior que o pai: acumula de baixo para cima
+    for node in np.flatnonzero(~is_leaf)[::-1]:
+        cover[node] = cover[ensemble.left[node]] + cover[ensemble.right[node]]
+    return cover
+
+
+# =========================
+# TREESHAP VETORIZADO
+# =========================
+# Na folha, os pesos de Shapley do caminho só dependem das frações "zero"
+# (cover, iguais para todas as linhas) e do padrão 0/1 de cada linha
+# ("segue ou não os ramos de cada feature do caminho"). A recursão leva
+# esse padrão para todas as linhas de uma vez; na folha, os pesos são
+# calculados uma vez por padrão distinto (poucos) e espalhados nas linhas.
+
+def _path_weights(Z: np.ndarray, P: np.ndarray) -> np.ndarray:
+    """Pesos do caminho (EXTEND aplicado a cada elemento) para cada coluna de padrões ``P``"""
+    W = np.zeros((len(Z) + 1, P.shape[1]))
+    W[0] = 1.0                          # elemento fictício da raiz (zero = one = 1)
+    for depth in range(1, len(Z) + 1):
+        zero, one = Z[depth - 1], P[depth - 1]
+        for i in range(depth - 1, -1, -1):
+            W[i + 1] += one * W[i] * (i + 1) / (depth + 1)
+            W[i] = zero * W[i] * (depth - i) / (depth + 1)
+    return W
+
+
+def _unwound_sums(W: np.ndarray, Z: np.ndarray, P: np.ndarray) -> np.ndarray:
+    """Soma dos pesos do caminho sem cada elemento ``k`` (UNWOUND-SUM, todos os ``k`` juntos)"""
+    depth = len(W) - 1
+    one, zero = P.astype(bool), Z[:, None]
+    nxt = np.broadcast_to(W[depth], P.shape)
+    total = np.zeros(P.shape)
+    for i in range(depth - 1, -1, -1):
+        w_one = nxt * (depth + 1) / (i + 1)
+        total += np.where(one, w_one, W[i] * (depth + 1) / (zero * (depth - i)))
+        nxt = np.where(one, W[i] - w_one * zero * (depth - i) / (depth + 1), nxt)
+    return total
+
+
+def _leaf_shap(phi: np.ndarray, D: list, Z: np.ndarray, O: np.ndarray, value: float) -> None:
+    """Soma em ``phi`` (features × linhas) a contribuição de uma folha"""
+    if not D:
+        return
+    bits = np.arange(len(D))[:, None]
+    codes = (O.astype(np.int64) << bits).sum(axis=0)
+    if len(D) <= MAX_ENUMERATED_PATH:
+        patterns, rows = np.arange(1 << len(D)), codes
+    else:
+        patterns, rows = np.unique(codes, return_inverse=True)
+    P = (patterns[None, :] >> bits) & 1
+    table = _unwound_sums(_path_weights(Z, P), Z, P) * (P - Z[:, None]) * value
+    phi[D] += table[:, rows]
+
+
+def _tree_shap(ensemble: TreeEnsemble, cover: np.ndarray, X: np.ndarray, root: int, phi: np.ndarray) -> float:
+    """Soma em ``phi`` as atribuições de uma árvore; devolve o valor esperado dela"""
+    left, right, feature, threshold, value = (ensemble.left, ensemble.right, ensemble.feature,
+                                              ensemble.threshold, ensemble.value)
+    expected = 0.0
+
+    def recurse(node, D, Z, O):
+        nonlocal expected
+        if left[node] < 0:
+            expected += cover[node] / cover[root] * value[node]
+            _leaf_shap(phi, D, Z, O, value[node])
+            return
+        j = int(feature[node])
+        goes_left = X[:, j] <= threshold[node]
+        incoming_zero, incoming_one = 1.0, True
+        if j in D:
+            # Feature repetida no caminho: os ramos se combinam num elemento só
+            k = D.index(j)
+            incoming_zero, incoming_one = Z[k], O[k]
+            D, Z, O = D[:k] + D[k + 1:], np.delete(Z, k), np.delete(O, k, axis=0)
+        for child, follows in ((left[node], goes_left), (right[node], ~goes_left)):
+            recurse(child, D + [j], np.append(Z, cover[child] / cover[node] * incoming_zero),
+                    np.vstack([O, (incoming_one & follows)[None]]))
+
+    recurse(root, [], np.empty(0), np.empty((0, len(X)), dtype=bool))
+    return expected
+
+
+def tree_shap(ensemble: TreeEnsemble, X: np.ndarray):
+    """
+    Atribuições de todas as linhas de ``X`` no espaço do ``decision_function``.
+
+    Returns:
+        (φ linhas × features, valor base)
+    """
+    # Mesmo critério de ``TreeEnsemble.leaves``: X em float32 contra limiar float64
+    X = np.asarray(X, dtype=np.float32)
+    cover = ensemble.cover if ensemble.cover is not None else node_cover(ensemble, X)
+    phi = np.zeros((ensemble.n_features_in_, len(X)))
+    with np.errstate(divide='ignore', invalid='ignore'):
+        expected = sum(_tree_shap(ensemble, cover, X, int(root), phi) for root in ensemble.roots)
+    phi = phi.T
+    if ensemble.kind == 'gradient_boosting':
+        return phi * ensemble.learning_rate, ensemble.init_raw + ensemble.learning_rate * expected
+    n_trees = len(ensemble.roots)
+    return phi / n_trees, expected / n_trees
+
+
+# =========================
+# CACHE POR VERSÃO DO MODELO
+# =========================
+
+@dataclass(frozen=True)
+class Attributions:
+    """φ de cada linha histórica (mapeado em memória) + valor base"""
+
+    values: np.ndarray      # linhas × features, a favor de ALTA
+    base: float
+    dates: np.ndarray
+    feature_columns: tuple
+    space: str              # 'log-odds' (gradient boosting) ou 'probabilidade' (random forest)
+
+    def row(self, date=None) -> np.ndarray:
+        """φ da última linha, ou do pregão ``date``"""
+        if date is None:
+            return self.values[-1]
+        return self.values[int(np.searchsorted(self.dates, np.datetime64(date, 'ns')))]
+
+
+def explanation_key(ensemble: TreeEnsemble, X: np.ndarray) -> str:
+    """
+    Hash do modelo inteiro (todos os arrays e escalares do header: tipo,
+    learning_rate, init_raw, ...), da matriz explicada e deste código.
+    """
+    header = {k: v for k, v in ensemble.header.items() if k not in BOOKKEEPING_KEYS}
+    digest = hashlib.sha1(json.dumps(header, sort_keys=True, default=str).encode())
+    digest.update(file_sha256(__file__).encode())
+    for name in TREE_ARRAYS:
+        array = getattr(ensemble, name)
+        digest.update(name.encode())
+        if array is not None:
+            array = np.ascontiguousarray(array)
+            digest.update(array.dtype.str.encode() + str(array.shape).encode() + array.tobytes())
+    X = np.ascontiguousarray(X)
+    digest.update(X.dtype.str.encode() + str(X.shape).encode() + X.tobytes())
+    return digest.hexdigest()[:16]
+
+
+def _open(folder: Path):
+    try:
+        header, arrays = read_arrays(folder)
+    except (OSError, KeyError, ValueError):
+        return None
+    return Attributions(arrays['values'], header['base'], arrays['dates'].view(header['date_dtype']),
+                        tuple(header['feature_columns']), header['space'])
+
+
+def prune_explanations(cache_dir=EXPLAIN_CACHE_DIR, keep: int = KEEP_EXPLANATIONS) -> None:
+    """Mantém só as ``keep`` entradas mais recentes do cache"""
+    entries = sorted((p for p in Path(cache_dir).iterdir()
+                      if not p.name.startswith('.') and (p / HEADER_FILE).exists()),
+                     key=lambda p: p.stat().st_mtime_ns, reverse=True)
+    for old in entries[keep:]:
+        shutil.rmtree(old, ignore_errors=True)
+
+
+def cached_attributions(bundle, X: np.ndarray, dates: np.ndarray, cache_dir=EXPLAIN_CACHE_DIR):
+    """
+    Atribuições do modelo do ``bundle`` para todas as linhas de ``X`` (na
+    ordem do modelo); calculadas e gravadas na primeira chamada para o par
+    modelo + matriz. ``None`` se o modelo não for um ensemble de árvores.
+    """
+    ensemble = as_tree_ensemble(bundle.model)
+    if ensemble is None:
+        return None
+    folder = Path(cache_dir) / explanation_key(ensemble, X)
+    cached = _open(folder)
+    if cached is not None:
+        return cached
+
+    values, base = tree_shap(ensemble, X)
+    if bundle.positive_index == 0:
+        values, base = -values, -base
+    dates = np.asarray(dates)
+    header = {
+        'base': float(base),
+        'feature_columns': list(bundle.feature_columns),
+        'space': 'log-odds' if ensemble.kind == 'gradient_boosting' else 'probabilidade',
+        'model_version': bundle.version,
+        'date_dtype': str(dates.dtype),
+        'created': datetime.now().isoformat(),
+    }
+    folder.parent.mkdir(parents=True, exist_ok=True)
+    tmp = Path(tempfile.mkdtemp(prefix=f'.{folder.name}.', dir=folder.parent))
+    try:
+        write_arrays(tmp, header, {'values': values.astype(np.float32), 'dates': dates.view('int64')})
+        os.rename(tmp, folder)
+    except OSError:
+        shutil.rmtree(tmp, ignore_errors=True)
+        if not (folder / HEADER_FILE).exists():
+            raise
+    prune_explanations(cache_dir)
+    return _open(folder)
+
+
+def top_drivers(attributions: Attributions, x: np.ndarray, date=None, n: int = TOP_DRIVERS) -> list:
+    """As ``n`` maiores contribuições em módulo: ``[(feature, valor, φ), ...]``"""
+    phi = attributions.row(date)
+    order = np.argsort(-np.abs(phi))[:n]
+    return [(attributions.feature_columns[j], float(x[j]), float(phi[j])) for j in order]
+
+
+def describe_drivers(attributions: Attributions, x: np.ndarray, date=None, n: int = TOP_DRIVERS) -> list:
+    """Textos do painel de razões, da maior para a menor contribuição"""
+    reasons = []
+    for name, value, phi in top_drivers(attributions, x, date, n):
+        side = 'ALTA' if phi > 0 else 'BAIXA'
+        size = f"{phi:+.3f} log-odds" if attributions.space == 'log-odds' else f"{phi * 100:+.1f} p.p."
+        reasons.append(f"{name} = {value:,.4g} → pesa para {side} ({size})")
+    return reasons
+
+
+if __name__ == '__main__':
+    from ibov.features import compute_features
+    from ibov.ingest import UNIFIED_PATH, load_unified_data
+    from ibov.model_bundle import load_model_bundle
+
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else TOP_DRIVERS
+    bundle = load_model_bundle()
+    ensemble = as_tree_ensemble(bundle.model)
+    if ensemble is None:
+        print(f"❌ {type(bundle.model).__name__} não é um ensemble de árvores")
+        sys.exit(1)
+    _, df_feat, matrix = compute_features(load_unified_data(UNIFIED_PATH), bundle.feature_columns)
+
+    start = time.perf_counter()
+    attributions = cached_attributions(bundle, matrix.values, df_feat['date'].to_numpy())
+    seconds = time.perf_counter() - start
+    error = np.abs(attributions.base + attributions.values.sum(axis=1)
+                   - ensemble.decision_function(matrix.values)).max()
+    print(f"✅ {len(matrix)} linhas × {len(bundle.feature_columns)} features em {seconds:.2f}s "
+          f"(erro máximo de soma {error:.1e} {attributions.space})")
+    print(f"🎯 Razões em {str(attributions.dates[-1])[:10]}:")
+    for reason in describe_drivers(attributions, matrix.last()[0], n=n):
+        print(f"   - {reason}")
@@ -0,0 +1,225 @@
+"""
+Feature store em memória compartilhada para várias réplicas do Streamlit.
+
+Com N réplicas do dashboard na mesma máquina, cada processo guardava a
+própria cópia de ``df``, ``df_feat`` e da matriz do modelo nos caches do
+Streamlit. Aqui um único processo (o refresher) calcula as features e
+publica um snapshot em arquivos ``.npy`` num diretório em tmpfs
+(``/dev/shm``); as réplicas abrem os arquivos com ``mmap`` e montam os
+DataFrames como views sobre as mesmas páginas. A memória do snapshot fica
+uma vez no page cache, não importa quantas réplicas o leiam. O modelo já
+segue o mesmo princípio (formato rápido de ``ibov.artifacts``, mapeado em
+memória).
+
+Cada snapshot é identificado pela versão do CSV (``data_version``) e pelas
+colunas do modelo; ele é gravado num diretório temporário e publicado com
+``os.rename`` (atômico), então uma réplica nunca vê um snapshot pela metade.
+Snapshots antigos são removidos; réplicas que ainda os mapeiam continuam
+lendo normalmente (o arquivo só some de fato quando o último mmap fecha).
+
+Estrutura:
+
+    $IBOV_FEATURE_STORE (padrão /dev/shm/ibov-features)/
+        <versão dos dados>-<hash das colunas>/
+            header.json
+            raw_date.npy  raw_floats.npy                               # df
+            feat_index.npy  feat_date.npy  feat_floats.npy  feat_flags.npy  # df_feat
+            matrix.npy                                                 # entrada do modelo
+
+Uso:
+    python -m ibov.feature_store publish          # snapshot da base atual
+    python -m ibov.feature_store watch [segundos] # republica quando o CSV muda
+"""
+
+import hashlib
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+from dataclasses import dataclass
+from datetime import datetime
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from ibov.features import (FLAG_COLUMNS, FLAG_DTYPE, FLOAT_DTYPE, FeatureMatrix, compute_features,
+                           read_feature_columns)
+from ibov.ingest import UNIFIED_PATH, data_version, load_unified_data
+
+HEADER_FILE = 'header.json'
+KEEP_SNAPSHOTS = 3
+
+
+def default_store() -> Path:
+    """``$IBOV_FEATURE_STORE``, ou ``/dev/shm/ibov-features`` (tmpfs), ou o diretório temporário"""
+    if os.environ.get('IBOV_FEATURE_STORE'):
+        return Path(os.environ['IBOV_FEATURE_STORE'])
+    shm = Path('/dev/shm')
+    return (shm if shm.is_dir() else Path(tempfile.gettempdir())) / 'ibov-features'
+
+
+def snapshot_key(version: str, feature_columns) -> str:
+    digest = hashlib.sha1(','.join(feature_columns).encode()).hexdigest()[:10]
+    return f"{version}-{digest}"
+
+
+# =========================
+# GRAVAÇÃO (refresher)
+# =========================
+
+def _split_columns(frame: pd.DataFrame):
+    floats = [c for c in frame.columns if c != 'date' and c not in FLAG_COLUMNS]
+    flags = [c for c in frame.columns if c in FLAG_COLUMNS]
+    return floats, flags
+
+
+def _save_frame(folder: Path, prefix: str, frame: pd.DataFrame, with_index: bool) -> dict:
+    """Colunas float32/int8 em blocos (colunas × linhas); devolve a descrição para o header"""
+    floats, flags = _split_columns(frame)
+    dates = frame['date'].to_numpy()
+    np.save(folder / f'{prefix}_date.npy', dates.view('int64'))
+    np.save(folder / f'{prefix}_floats.npy', np.ascontiguousarray(frame[floats].to_numpy(dtype=FLOAT_DTYPE).T))
+    if flags:
+        np.save(folder / f'{prefix}_flags.npy', np.ascontiguousarray(frame[flags].to_numpy(dtype=FLAG_DTYPE).T))
+    if with_index:
+        np.save(folder / f'{prefix}_index.npy', frame.index.to_numpy(dtype='int64'))
+    return {'columns': list(frame.columns), 'floats': floats, 'flags': flags, 'rows': len(frame),
+            'date_dtype': str(dates.dtype)}
+
+
+def publish(df: pd.DataFrame, df_feat: pd.DataFrame, matrix: FeatureMatrix, version: str,
+            store=None, keep: int = KEEP_SNAPSHOTS) -> Path:
+    """
+    Publica ``df``/``df_feat``/``matrix`` como snapshot de ``version``.
+
+    Se outro refresher já publicou a mesma chave, o snapshot existente é mantido.
+    """
+    store = Path(store or default_store())
+    store.mkdir(parents=True, exist_ok=True)
+    final = store / snapshot_key(version, matrix.columns)
+    if (final / HEADER_FILE).exists():
+        return final
+
+    tmp = Path(tempfile.mkdtemp(prefix=f'.{final.name}.', dir=store))
+    try:
+        header = {
+            'data_version': version,
+            'feature_columns': list(matrix.columns),
+            'raw': _save_frame(tmp, 'raw', df, with_index=False),
+            'feat': _save_frame(tmp, 'feat', df_feat, with_index=True),
+            'created': datetime.now().isoformat(),
+        }
+        np.save(tmp / 'matrix.npy', matrix.values)
+        with open(tmp / HEADER_FILE, 'w') as f:
+            json.dump(header, f, indent=2)
+        os.rename(tmp, final)
+    except OSError:
+        shutil.rmtree(tmp, ignore_errors=True)
+        if not (final / HEADER_FILE).exists():
+            raise
+    prune(store, keep)
+    return final
+
+
+def prune(store=None, keep: int = KEEP_SNAPSHOTS) -> None:
+    """Mantém só os ``keep`` snapshots mais recentes (por data de publicação)"""
+    store = Path(store or default_store())
+    # Diretórios ".<chave>.*" são gravações em andamento
+    snapshots = sorted((p for p in store.iterdir()
+                        if not p.name.startswith('.') and (p / HEADER_FILE).exists()),
+                       key=lambda p: p.stat().st_mtime_ns, reverse=True)
+    for old in snapshots[keep:]:
+        shutil.rmtree(old, ignore_errors=True)
+
+
+def publish_from_csv(data_path=UNIFIED_PATH, feature_columns_list=None, store=None) -> list:
+    """Lê a base, calcula e publica um snapshot para cada conjunto de colunas"""
+    version = data_version(data_path)
+    raw = load_unified_data(data_path)
+    published = []
+    for feature_columns in feature_columns_list:
+        df, df_feat, matrix = compute_features(raw, feature_columns)
+        published.append(publish(df, df_feat, matrix, version, store))
+    return published
+
+
+# =========================
+# LEITURA (réplicas)
+# =========================
+
+@dataclass(frozen=True)
+class Snapshot:
+    """DataFrames e matriz do modelo sobre arquivos mapeados em memória (somente leitura)"""
+
+    df: pd.DataFrame
+    df_feat: pd.DataFrame
+    matrix: FeatureMatrix
+    header: dict
+
+
+def _load_frame(folder: Path, prefix: str, spec: dict, with_index: bool) -> pd.DataFrame:
+    """Monta o DataFrame como views sobre os .npy (um bloco por dtype, sem cópia)"""
+    load = lambda name: np.load(folder / f'{prefix}_{name}.npy', mmap_mode='r')
+    parts = [pd.DataFrame({'date': load('date').view(spec['date_dtype'])}, copy=False)]
+    parts.append(pd.DataFrame(load('floats').T, columns=spec['floats'], copy=False))
+    if spec['flags']:
+        parts.append(pd.DataFrame(load('flags').T, columns=spec['flags'], copy=False))
+    frame = pd.concat(parts, axis=1)[spec['columns']]
+    if with_index:
+        frame.index = pd.Index(load('index'))
+    return frame
+
+
+def open_snapshot(version: str, feature_columns, store=None):
+    """
+    Snapshot publicado para ``version`` + ``feature_columns``, ou ``None``
+    se o refresher ainda não publicou (o chamador calcula localmente).
+    """
+    folder = Path(store or default_store()) / snapshot_key(version, feature_columns)
+    try:
+        with open(folder / HEADER_FILE, 'r') as f:
+            header = json.load(f)
+        if header['feature_columns'] != list(feature_columns):
+            return None
+        df = _load_frame(folder, 'raw', header['raw'], with_index=False)
+        df_feat = _load_frame(folder, 'feat', header['feat'], with_index=True)
+        matrix = FeatureMatrix.__new__(FeatureMatrix)
+        matrix.columns = tuple(feature_columns)
+        matrix.values = np.load(folder / 'matrix.npy', mmap_mode='r')
+        matrix._position = {name: j for j, name in enumerate(matrix.columns)}
+    except (OSError, KeyError, ValueError):
+        # Snapshot removido pelo prune entre o header e os .npy: trata como ausente
+        return None
+    return Snapshot(df, df_feat, matrix, header)
+
+
+def _feature_column_sets() -> list:
+    """Colunas do modelo principal e dos horizontes (sem repetir)"""
+    sets = [tuple(read_feature_columns('feature_columns.json'))]
+    meta = Path('horizon_models') / 'horizons.json'
+    if meta.exists():
+        with open(meta, 'r') as f:
+            sets.append(tuple(json.load(f)['feature_columns']))
+    return list(dict.fromkeys(sets))
+
+
+if __name__ == '__main__':
+    command = sys.argv[1] if len(sys.argv) > 1 else ''
+    if command not in ('publish', 'watch'):
+        print(__doc__)
+        sys.exit(1)
+
+    column_sets = _feature_column_sets()
+    last = None
+    while True:
+        version = data_version(UNIFIED_PATH)
+        if version != last:
+            for path in publish_from_csv(UNIFIED_PATH, column_sets):
+                print(f"✅ snapshot {path}")
+            last = version
+        if command == 'publish':
+            break
+        time.sleep(float(sys.argv[2]) if len(sys.argv) > 2 else 30)
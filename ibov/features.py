@@ -0,0 +1,527 @@
+"""
+Features técnicas compartilhadas pelos dashboards, em layout compacto.
+
+- Indicadores contínuos: calculados em float64 (precisão das janelas) e
+  armazenados em float32.
+- Sinais binários (``sinal_*``, ``selic_subindo``, ...): int8.
+- Entrada do modelo: uma única matriz 2-D float32 C-contígua
+  (``FeatureMatrix``), pré-alocada na ordem de ``feature_columns.json`` e
+  preenchida diretamente por ``create_features``. É o formato que as
+  árvores do sklearn já usam internamente, então ``model.predict`` recebe
+  uma view sem cópia nem reindexação de colunas.
+
+Uso:
+    python -m ibov.features [linhas_por_bloco]   # confere o modo em blocos x série inteira (padrão 101)
+"""
+
+import json
+import sys
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+# Colunas carregadas da base unificada
+BASE_COLUMNS = ('date', 'close', 'open', 'high', 'low', 'volume', 'usd_close', 'selic')
+
+# Sinais 0/1 (int8)
+FLAG_COLUMNS = (
+    'sinal_t1', 'sinal_t2', 'sinal_t3', 'sinal_t5', 'sinal_t10',
+    'sinal_usd_up', 'selic_subindo',
+    'sinal_ma5_ma20', 'close_acima_ma5', 'close_acima_ma20',
+)
+
+SIGNAL_HORIZONS = (1, 2, 3, 5, 10)
+RETURN_LAGS = range(1, 11)
+MA_WINDOWS = (5, 10, 20, 50)
+ATR_WINDOW = 14
+VOLUME_WINDOW = 20
+
+# Todas as colunas produzidas por create_features
+FEATURE_NAMES = (
+    BASE_COLUMNS
+    + ('returns', 'log_return')
+    + tuple(f'sinal_t{h}' for h in SIGNAL_HORIZONS)
+    + tuple(f'returns_lag{lag}' for lag in RETURN_LAGS)
+    + tuple(f'ma{w}' for w in MA_WINDOWS)
+    + ('sinal_ma5_ma20', 'close_acima_ma5', 'close_acima_ma20',
+       'volatility', 'rsi', 'macd', 'signal', 'macd_hist',
+       'bb_upper', 'bb_lower',
+       'tr', 'atr', 'price_range', 'volume_change', 'volume_ratio',
+       'sinal_usd_up', 'usd_change', 'selic_subindo', 'selic_change')
+)
+
+FLOAT_DTYPE = np.float32
+FLAG_DTYPE = np.int8
+
+
+class FeatureMatrix:
+    """
+    Matriz de entrada do modelo (linhas × features) pré-alocada.
+
+    C-contígua, float32 e com as colunas exatamente na ordem do modelo;
+    ``create_features`` escreve cada feature direto na sua coluna.
+    """
+
+    def __init__(self, n_rows: int, columns):
+        self.columns = tuple(columns)
+        unknown = [c for c in self.columns if c not in FEATURE_NAMES or c == 'date']
+        if unknown:
+            raise ValueError(f"Features sem implementação em create_features: {unknown}")
+        self.values = np.empty((n_rows, len(self.columns)), dtype=FLOAT_DTYPE, order='C')
+        self._position = {name: j for j, name in enumerate(self.columns)}
+
+    def __len__(self) -> int:
+        return self.values.shape[0]
+
+    def __contains__(self, name) -> bool:
+        return name in self._position
+
+    def write(self, name: str, values) -> None:
+        self.values[:, self._position[name]] = values
+
+    def take(self, rows: np.ndarray) -> 'FeatureMatrix':
+        """Mantém só as linhas selecionadas (máscara booleana), compactando uma vez"""
+        if rows.all():
+            return self
+        out = FeatureMatrix.__new__(FeatureMatrix)
+        out.columns = self.columns
+        out.values = np.ascontiguousarray(self.values[rows])
+        out._position = self._position
+        return out
+
+    def last(self, n: int = 1) -> np.ndarray:
+        """Últimas ``n`` linhas como view (sem cópia), prontas para ``model.predict``"""
+        return self.values[-n:]
+
+
+def _flag(cond) -> np.ndarray:
+    """Converte uma comparação (NaN → False) em int8"""
+    return np.asarray(cond, dtype=bool).astype(FLAG_DTYPE)
+
+
+# =========================
+# JANELAS MÓVEIS
+# =========================
+# Cada janela é reduzida de forma independente (sem soma corrente como o
+# ``rolling`` do pandas, cujo resultado depende de onde a série começa), então
+# o valor em t só depende das linhas [t - janela + 1, t]: processar a série
+# inteira ou em blocos com aquecimento dá exatamente os mesmos bytes.
+
+_BLOCK_ROWS = 1 << 15
+
+
+class _Groups:
+    """Séries contíguas (um ativo após o outro) dentro do mesmo DataFrame"""
+
+    def __init__(self, starts, n_rows: int):
+        self.starts = np.asarray(starts, dtype=np.int64)
+        lengths = np.diff(np.append(self.starts, n_rows))
+        self.ids = np.repeat(np.arange(len(self.starts)), lengths)
+        self.first = self.starts[self.ids]          # primeira linha do ativo de cada linha
+        self.pos = np.arange(n_rows) - self.first   # posição da linha dentro do ativo
+
+
+def _lag(x: pd.Series, k: int, groups: Optional[_Groups] = None) -> pd.Series:
+    """``x.shift(k)`` sem atravessar a fronteira entre ativos"""
+    out = x.shift(k)
+    return out if groups is None else out.mask(groups.pos < k)
+
+
+def _rolling(x, window: int, min_periods: Optional[int] = None, std: bool = False,
+             groups: Optional[_Groups] = None) -> np.ndarray:
+    """
+    Média (ou desvio padrão amostral) móvel ignorando NaN, como o
+    ``rolling(window, min_periods).mean()/.std()`` do pandas.
+
+    As somas são feitas sobre views das janelas, em blocos de ``_BLOCK_ROWS``
+    linhas: a memória temporária é limitada a ``_BLOCK_ROWS × window``
+    independentemente do tamanho da série. Com ``groups``, cada ativo recebe
+    o próprio preenchimento inicial e a janela nunca entra no ativo anterior.
+    """
+    x = np.asarray(x, dtype='float64')
+    n_rows = len(x)
+    min_periods = window if min_periods is None else min_periods
+    valid = ~np.isnan(x)
+    # Contagem de valores válidos por janela: diferença de soma acumulada (inteiros, exata)
+    seen = np.concatenate([[0], np.cumsum(valid)])
+    lo = np.arange(1, n_rows + 1) - window
+    lo = np.maximum(lo, 0 if groups is None else groups.first)
+    count = seen[1:] - seen[lo]
+    ok = count >= min_periods
+    if std:
+        ok &= count > 1
+
+    filled = np.where(valid, x, 0.0)
+    mask = valid.astype('float64') if std else None
+    rows = None
+    if groups is not None and len(groups.starts) > 1:
+        # window - 1 zeros antes de cada ativo: a janela da linha t é a linha t + ativo * (window - 1)
+        at = np.repeat(groups.starts, window - 1)
+        filled = np.insert(filled, at, 0.0)
+        mask = None if mask is None else np.insert(mask, at, 0.0)
+        rows = np.arange(n_rows) + groups.ids * (window - 1)
+    else:
+        filled = np.concatenate([np.zeros(window - 1), filled])
+        mask = None if mask is None else np.concatenate([np.zeros(window - 1), mask])
+    windows = np.lib.stride_tricks.sliding_window_view(filled, window)
+    masks = None if mask is None else np.lib.stride_tricks.sliding_window_view(mask, window)
+
+    out = np.empty(n_rows)
+    for start in range(0, n_rows, _BLOCK_ROWS):
+        stop = min(start + _BLOCK_ROWS, n_rows)
+        take = slice(start, stop) if rows is None else rows[start:stop]
+        block = windows[take]
+        n = np.maximum(count[start:stop], 1)
+        mean = block.sum(axis=1) / n
+        if std:
+            dev = (block - mean[:, None]) * masks[take]
+            np.multiply(dev, dev, out=dev)
+            mean = np.sqrt(dev.sum(axis=1) / np.maximum(n - 1, 1))
+        out[start:stop] = mean
+    out[~ok] = np.nan
+    return out
+
+
+def rolling_mean(values, window: int, starts=None) -> np.ndarray:
+    """Média móvel de ``values`` (por ativo se ``starts`` for dado), mesmo kernel de ``create_features``"""
+    groups = None if starts is None else _Groups(starts, len(values))
+    return _rolling(values, window, groups=groups)
+
+
+def _ewm(x: pd.Series, span: int, state: dict, name: str, skip: int,
+         groups: Optional[_Groups] = None) -> pd.Series:
+    """
+    EWM (``adjust=False``) de ``x`` continuando de ``state[name]``.
+
+    Sem estado é o ``ewm`` do pandas sobre a série inteira. Com estado, as
+    ``skip`` primeiras linhas (aquecimento do bloco) ficam NaN e o valor
+    anterior entra como primeira observação: a recursão do pandas
+    (``y_t = (1 - a) * y_{t-1} + a * x_t``) continua bit a bit. Com
+    ``groups`` a recursão reinicia em cada ativo (``groupby().ewm()``).
+
+    Entradas NaN não interrompem a recursão, mas o pandas (``ignore_na=False``)
+    multiplica o peso do valor anterior por ``1 - a`` a cada uma; por isso o
+    estado guarda também quantos NaN terminaram o bloco (``state[name + '_gap']``),
+    repetidos após a semente para o peso decair igual à série inteira.
+    """
+    if groups is not None:
+        mean = x.groupby(groups.ids).ewm(span=span, adjust=False).mean()
+        return pd.Series(mean.to_numpy(), index=x.index)
+    gap_name = name + '_gap'
+    if state is None or name not in state:
+        new = x.to_numpy()
+        out = x.ewm(span=span, adjust=False).mean()
+        gap = 0
+    else:
+        new = x.to_numpy()[skip:]
+        gap = state.get(gap_name, 0)
+        seeded = np.concatenate([[state[name]], np.full(gap, np.nan), new])
+        tail = pd.Series(seeded).ewm(span=span, adjust=False).mean().to_numpy()[1 + gap:]
+        out = pd.Series(np.concatenate([np.full(skip, np.nan), tail]), index=x.index)
+    if state is not None and len(out):
+        observed = np.flatnonzero(~np.isnan(new))
+        state[name] = float(out.iloc[-1])
+        state[gap_name] = len(new) - 1 - int(observed[-1]) if len(observed) else gap + len(new)
+    return out
+
+
+def _rsi(close: pd.Series, period: int = 14, groups: Optional[_Groups] = None) -> np.ndarray:
+    delta = close - _lag(close, 1, groups)
+    gain = _rolling(delta.where(delta > 0, 0), period, groups=groups)
+    loss = _rolling(-delta.where(delta < 0, 0), period, groups=groups)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        rs = gain / loss
+        return 100 - (100 / (1 + rs))
+
+
+def true_range(high, low, close, prev_close=None) -> np.ndarray:
+    """
+    True range: max(high - low, |high - close[t-1]|, |low - close[t-1]|).
+
+    No primeiro pregão (sem fechamento anterior) vale ``high - low``.
+    ``prev_close`` substitui o ``close[t-1]`` (ex.: já defasado por ativo).
+    """
+    high, low, close = (np.asarray(a, dtype='float64') for a in (high, low, close))
+    if prev_close is None:
+        prev_close = np.empty_like(close)
+        prev_close[0] = np.nan
+        prev_close[1:] = close[:-1]
+    else:
+        prev_close = np.asarray(prev_close, dtype='float64')
+    # fmax ignora o NaN do primeiro pregão
+    return np.fmax(high - low, np.fmax(np.abs(high - prev_close), np.abs(low - prev_close)))
+
+
+def _feature_columns(df: pd.DataFrame, ewm_state: Optional[dict] = None, skip: int = 0,
+                     starts=None) -> dict:
+    """
+    Todas as colunas de ``FEATURE_NAMES`` em float64/bool, na ordem de saída.
+
+    ``starts``: primeira linha de cada ativo quando ``df`` empilha vários
+    (painel); defasagens, janelas e EWM não atravessam de um ativo para outro.
+    """
+    groups = None if starts is None else _Groups(starts, len(df))
+    lag = lambda x, k: _lag(x, k, groups)
+    close = df['close'].astype('float64')
+    high = df['high'].astype('float64')
+    low = df['low'].astype('float64')
+    volume = df['volume'].astype('float64')
+    usd = df['usd_close'].astype('float64')
+    selic = df['selic'].astype('float64')
+
+    cols = {'date': df['date'].to_numpy()}
+    cols['close'] = close
+    cols['open'] = df['open']
+    cols['high'] = high
+    cols['low'] = low
+    cols['volume'] = volume
+    cols['usd_close'] = usd
+    cols['selic'] = selic
+
+    # Retornos e direção passada
+    returns = close / lag(close, 1) - 1
+    cols['returns'] = returns
+    cols['log_return'] = np.log(close / lag(close, 1))
+    for h in SIGNAL_HORIZONS:
+        cols[f'sinal_t{h}'] = _flag(close > lag(close, h))
+    for k in RETURN_LAGS:
+        cols[f'returns_lag{k}'] = lag(returns, k)
+
+    # Médias móveis
+    for window in MA_WINDOWS:
+        cols[f'ma{window}'] = _rolling(close, window, groups=groups)
+    cols['sinal_ma5_ma20'] = _flag(cols['ma5'] > cols['ma20'])
+    cols['close_acima_ma5'] = _flag(close > cols['ma5'])
+    cols['close_acima_ma20'] = _flag(close > cols['ma20'])
+
+    # Volatilidade (desvio padrão dos retornos) e RSI
+    cols['volatility'] = _rolling(returns, 20, std=True, groups=groups)
+    cols['rsi'] = _rsi(close, groups=groups)
+
+    # MACD (EWM: único estado que atravessa os blocos no modo em blocos)
+    exp1 = _ewm(close, 12, ewm_state, 'exp12', skip, groups)
+    exp2 = _ewm(close, 26, ewm_state, 'exp26', skip, groups)
+    cols['macd'] = exp1 - exp2
+    cols['signal'] = _ewm(cols['macd'], 9, ewm_state, 'signal', skip, groups)
+    cols['macd_hist'] = cols['macd'] - cols['signal']
+
+    # Bandas de Bollinger
+    bb_std = _rolling(close, 20, std=True, groups=groups)
+    cols['bb_upper'] = cols['ma20'] + bb_std * 2
+    cols['bb_lower'] = cols['ma20'] - bb_std * 2
+
+    # Amplitude (OHLC verdadeiro) e volume
+    tr = true_range(high, low, close, lag(close, 1))
+    cols['tr'] = tr
+    cols['atr'] = _rolling(tr, ATR_WINDOW, groups=groups)
+    cols['price_range'] = (high - low) / close
+    # Pregões sem volume divulgado ficam NaN sem contaminar a janela inteira
+    cols['volume_change'] = volume / lag(volume, 1) - 1
+    cols['volume_ratio'] = volume / _rolling(volume, VOLUME_WINDOW, min_periods=VOLUME_WINDOW // 2, groups=groups)
+
+    # Dólar e Selic
+    cols['sinal_usd_up'] = _flag(usd > lag(usd, 1))
+    cols['usd_change'] = usd / lag(usd, 1) - 1
+    cols['selic_subindo'] = _flag(selic > lag(selic, 1))
+    cols['selic_change'] = selic - lag(selic, 1)
+    return cols
+
+
+def _pack(cols: dict, index, matrix: Optional[FeatureMatrix] = None, skip: int = 0) -> pd.DataFrame:
+    """Converte as colunas (a partir da linha ``skip``) para float32/int8 num único DataFrame"""
+    out = {}
+    for name, values in cols.items():
+        if name == 'date':
+            out[name] = values[skip:]
+        elif name in FLAG_COLUMNS:
+            out[name] = np.asarray(values, dtype=FLAG_DTYPE)[skip:]
+        else:
+            out[name] = np.asarray(values, dtype=FLOAT_DTYPE)[skip:]
+        if matrix is not None and name in matrix:
+            matrix.write(name, out[name])
+    return pd.DataFrame(out, index=index[skip:])
+
+
+def create_features(df: pd.DataFrame, matrix: Optional[FeatureMatrix] = None, starts=None) -> pd.DataFrame:
+    """
+    Cria as features do modelo (``feature_columns.json``) e os indicadores
+    exibidos nos dashboards.
+
+    O DataFrame é montado de uma vez a partir de arrays já tipados, então
+    o pandas guarda um bloco float32 e um bloco int8 (sem cópias por coluna).
+    Se ``matrix`` for passada, as features do modelo também são escritas nela.
+    ``starts`` (primeira linha de cada ativo) ativa o modo painel de ``ibov.panel``.
+    """
+    return _pack(_feature_columns(df, starts=starts), df.index, matrix)
+
+
+def valid_rows(df_feat: pd.DataFrame, matrix: Optional[FeatureMatrix] = None) -> np.ndarray:
+    """
+    Linhas utilizáveis: com fechamento e sem NaN nas features do modelo.
+
+    Colunas só de exibição (volume, ``ma50``, ...) não entram: um pregão sem
+    volume divulgado continua na base e pode ser a linha da previsão.
+    """
+    valid = df_feat['close'].notna().to_numpy()
+    if matrix is not None:
+        valid = valid & ~np.isnan(matrix.values).any(axis=1)
+    return valid
+
+
+def build_features(df: pd.DataFrame, feature_columns):
+    """
+    Features nas linhas válidas (``valid_rows``) + matriz do modelo
+    alinhada às mesmas linhas.
+
+    Returns:
+        (df_feat, FeatureMatrix)
+    """
+    matrix = FeatureMatrix(len(df), feature_columns)
+    df_feat = create_features(df, matrix)
+    valid = valid_rows(df_feat, matrix)
+    return df_feat[valid], matrix.take(valid)
+
+
+# =========================
+# MODO EM BLOCOS
+# =========================
+
+# Maior janela (ma50); cobre também os lags (até 11 pregões), a volatilidade
+# (21), o ATR (15) e o volume (20). A EWM do MACD vem do estado, não do aquecimento.
+WARMUP_ROWS = max(MA_WINDOWS)
+
+
+class FeatureStream:
+    """
+    ``create_features`` em blocos com memória limitada.
+
+    Cada bloco é processado junto com as últimas ``WARMUP_ROWS`` linhas de
+    entrada do bloco anterior (aquecimento das janelas) e com o último valor
+    de cada EWM; a saída concatenada é idêntica, byte a byte, à de
+    ``create_features`` sobre a série inteira. A memória de pico é a de um
+    bloco, não a da série.
+
+        stream = FeatureStream(feature_columns)
+        for chunk in read_unified_chunks(path, 1_000_000):
+            df_feat, matrix = stream.push(chunk)
+    """
+
+    def __init__(self, feature_columns=None):
+        self.feature_columns = None if feature_columns is None else tuple(feature_columns)
+        self.tail = None
+        self.ewm_state = {}
+
+    def push(self, chunk: pd.DataFrame):
+        """
+        Features das linhas de ``chunk`` (em ordem de data, após o bloco anterior).
+
+        Returns:
+            (df_feat, FeatureMatrix | None), com as mesmas linhas de ``chunk``
+            (incluindo as de aquecimento com NaN no início da série).
+        """
+        skip = 0 if self.tail is None else len(self.tail)
+        work = chunk if self.tail is None else pd.concat([self.tail, chunk])
+        matrix = None
+        if self.feature_columns is not None:
+            matrix = FeatureMatrix(len(chunk), self.feature_columns)
+        cols = _feature_columns(work, self.ewm_state, skip)
+        df_feat = _pack(cols, work.index, matrix, skip)
+        self.tail = work.iloc[-WARMUP_ROWS:]
+        return df_feat, matrix
+
+    def push_valid(self, chunk: pd.DataFrame):
+        """Como ``push``, mas só com as linhas válidas (mesmo filtro de ``build_features``)"""
+        df_feat, matrix = self.push(chunk)
+        valid = valid_rows(df_feat, matrix)
+        return df_feat[valid], (None if matrix is None else matrix.take(valid))
+
+
+def stream_matches(df: pd.DataFrame, chunk_rows: int, feature_columns=None) -> bool:
+    """``FeatureStream`` em blocos de ``chunk_rows`` linhas reproduz ``create_features`` (DataFrame e matriz)"""
+    matrix = None if feature_columns is None else FeatureMatrix(len(df), feature_columns)
+    expected = create_features(df, matrix)
+    stream = FeatureStream(feature_columns)
+    parts = [stream.push(df.iloc[i:i + chunk_rows]) for i in range(0, len(df), chunk_rows)]
+    if not pd.concat([p for p, _ in parts]).equals(expected):
+        return False
+    return matrix is None or np.array_equal(np.concatenate([m.values for _, m in parts]), matrix.values,
+                                            equal_nan=True)
+
+
+def clean_close_outliers(close: pd.Series) -> pd.Series:
+    """Fechamentos fora de [Q1 - 1.5·IQR, Q3 + 1.5·IQR] viram NaN (mesmo índice)"""
+    q1, q3 = close.quantile(0.25), close.quantile(0.75)
+    iqr = q3 - q1
+    return close.where(~((close < q1 - 1.5 * iqr) | (close > q3 + 1.5 * iqr)))
+
+
+def compute_features(df: pd.DataFrame, feature_columns):
+    """
+    Pipeline comum a dashboard, feature store e treino: fechamentos fora
+    do IQR viram NaN e as features são calculadas sobre a base limpa.
+
+    Returns:
+        (df, df_feat, FeatureMatrix)
+    """
+    df = df.copy()
+    df['close'] = clean_close_outliers(df['close'])
+    df_feat, matrix = build_features(df, feature_columns)
+    return df, df_feat, matrix
+
+
+def read_feature_columns(path='feature_columns.json') -> list:
+    """Lê ``feature_columns.json`` (lista pura ou ``{"feature_columns": [...]}``)"""
+    with open(path, 'r') as f:
+        data = json.load(f)
+    if isinstance(data, dict):
+        data = data['feature_columns']
+    return list(data)
+
+
+def to_model_matrix(df_feat: pd.DataFrame, feature_columns) -> np.ndarray:
+    """Matriz (linhas × features) float32 C-contígua na ordem do modelo"""
+    return np.ascontiguousarray(df_feat[list(feature_columns)].to_numpy(dtype=FLOAT_DTYPE))
+
+
+def memory_report(df_feat: pd.DataFrame) -> dict:
+    """
+    Compara o uso de memória do layout compacto com o layout padrão
+    (float64/int64 em todas as colunas numéricas).
+    """
+    usage = df_feat.memory_usage(index=True, deep=True)
+    compact = int(usage.sum())
+
+    numeric = df_feat.select_dtypes(include='number').columns
+    wide = compact - int(usage[numeric].sum()) + len(df_feat) * 8 * len(numeric)
+
+    return {
+        'linhas': len(df_feat),
+        'colunas': df_feat.shape[1],
+        'bytes_antes': wide,
+        'bytes_depois': compact,
+        'reducao_pct': (1 - compact / wide) * 100 if wide else 0.0,
+    }
+
+
+if __name__ == '__main__':
+    from ibov.ingest import UNIFIED_PATH, load_unified_data
+
+    chunk_rows = int(sys.argv[1]) if len(sys.argv) > 1 else 101
+    df = load_unified_data(UNIFIED_PATH)
+    # Fechamentos NaN (como os de clean_close_outliers) no fim de um bloco e
+    # no início do seguinte, e um bloco inteiro sem fechamento
+    gaps = df.copy()
+    gaps.loc[chunk_rows - 1:chunk_rows, 'close'] = np.nan
+    gaps.loc[3 * chunk_rows - 1:4 * chunk_rows + 1, 'close'] = np.nan
+    cases = {
+        'base': df,
+        'sem outliers (IQR)': df.assign(close=clean_close_outliers(df['close'])),
+        'NaN na fronteira dos blocos': gaps,
+    }
+    columns = read_feature_columns()
+    results = {label: stream_matches(frame, chunk_rows, columns) for label, frame in cases.items()}
+    for label, ok in results.items():
+        print(f"{'✅' if ok else '❌'} {label}: blocos de {chunk_rows} linhas "
+              f"{'idênticos a' if ok else 'diferentes de'} create_features")
+    sys.exit(0 if all(results.values()) else 1)
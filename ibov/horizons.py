@@ -0,0 +1,217 @@
+"""
+Previsão de direção em vários horizontes (t+1, t+5, t+10 pregões).
+
+Um classificador por horizonte, todos treinados sobre a mesma
+``FeatureMatrix`` de ``compute_features`` (pipeline do dashboard, com a
+limpeza de fechamentos por IQR, que é a matriz que os pontua). Na inferência as árvores dos
+horizontes são empilhadas num único ensemble (``StackedEnsemble``): uma
+travessia vetorizada calcula as folhas de todos os horizontes de uma vez e
+cada horizonte é só uma soma por segmento (``np.add.reduceat``). Adicionar
+horizontes aumenta o número de árvores, não o número de passadas.
+
+Estrutura em disco (formato rápido de ``ibov.artifacts``):
+
+    horizon_models/
+        horizons.json       # horizontes, feature_columns, métricas de teste
+        t1/  t5/  t10/      # header.json + .npy de cada classificador
+
+Uso:
+    python -m ibov.horizons train            # treina com Unified_Data.csv
+"""
+
+import json
+import sys
+from dataclasses import dataclass
+from datetime import datetime
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from ibov.artifacts import TreeEnsemble, export_tree_ensemble, load_artifact
+from ibov.features import compute_features, read_feature_columns
+from ibov.model_bundle import FEATURE_COLUMNS_PATH, FeatureSchemaError
+
+HORIZONS = (1, 5, 10)
+HORIZON_DIR = Path('horizon_models')
+META_FILE = 'horizons.json'
+
+
+def horizon_name(h: int) -> str:
+    return f't{h}'
+
+
+def direction_targets(close: pd.Series, horizons=HORIZONS) -> pd.DataFrame:
+    """
+    Alvo de cada horizonte: fechamento em t+h acima do de t (1) ou não (0).
+
+    As últimas ``h`` linhas ficam NaN (futuro ainda desconhecido).
+    """
+    close = close.astype('float64')
+    out = {}
+    for h in horizons:
+        future = close.shift(-h)
+        out[horizon_name(h)] = (future > close).astype('float64').where(future.notna())
+    return pd.DataFrame(out, index=close.index)
+
+
+# =========================
+# INFERÊNCIA EM LOTE
+# =========================
+
+class StackedEnsemble:
+    """
+    Vários ``TreeEnsemble`` binários concatenados em um só.
+
+    ``predict_proba(X)`` devolve P(ALTA) com shape (linhas × horizontes).
+    """
+
+    def __init__(self, ensembles):
+        kinds = {e.kind for e in ensembles}
+        if len(kinds) != 1:
+            raise ValueError(f"Ensembles de tipos diferentes não podem ser empilhados: {sorted(kinds)}")
+        self.kind = kinds.pop()
+        self.n_features_in_ = ensembles[0].n_features_in_
+        if any(e.n_features_in_ != self.n_features_in_ for e in ensembles):
+            raise ValueError("Todos os horizontes devem usar as mesmas features")
+
+        node_offsets = np.cumsum([0] + [len(e.feature) for e in ensembles])
+        shift = lambda a, off: np.where(a >= 0, a + off, -1)
+        arrays = {
+            'roots': np.concatenate([e.roots + off for e, off in zip(ensembles, node_offsets)]),
+            'feature': np.concatenate([e.feature for e in ensembles]),
+            'threshold': np.concatenate([e.threshold for e in ensembles]),
+            'left': np.concatenate([shift(e.left, off) for e, off in zip(ensembles, node_offsets)]),
+            'right': np.concatenate([shift(e.right, off) for e, off in zip(ensembles, node_offsets)]),
+            'value': np.concatenate([e.value for e in ensembles]),
+        }
+        header = {'kind': self.kind, 'classes': [0, 1], 'n_features': self.n_features_in_,
+                  'max_depth': max(e.max_depth for e in ensembles)}
+        self.trees = TreeEnsemble(header, arrays)
+
+        n_trees = np.array([len(e.roots) for e in ensembles])
+        self.starts = np.concatenate([[0], np.cumsum(n_trees)[:-1]])
+        self.n_trees = n_trees
+        self.init_raw = np.array([e.init_raw for e in ensembles])
+        self.learning_rate = np.array([e.learning_rate for e in ensembles])
+        self.positive = [list(e.classes_).index(1) for e in ensembles]
+
+    def predict_proba(self, X: np.ndarray) -> np.ndarray:
+        leaf_values = self.trees.value[self.trees.leaves(X)]
+        totals = np.add.reduceat(leaf_values, self.starts, axis=1)
+        if self.kind == 'gradient_boosting':
+            p1 = 1.0 / (1.0 + np.exp(-(self.init_raw + self.learning_rate * totals)))
+        else:
+            p1 = totals / self.n_trees
+        # Classe positiva fora da posição 1 → P(ALTA) é o complemento
+        flip = np.array([i != 1 for i in self.positive])
+        return np.where(flip, 1.0 - p1, p1)
+
+
+@dataclass(frozen=True)
+class HorizonModel:
+    """Classificadores por horizonte + contrato de features"""
+
+    horizons: tuple
+    feature_columns: tuple
+    ensemble: StackedEnsemble
+    info: dict
+
+    def predict_proba(self, X: np.ndarray) -> np.ndarray:
+        """P(ALTA) por linha e horizonte (linhas × horizontes)"""
+        return self.ensemble.predict_proba(X)
+
+    def predict(self, X_row: np.ndarray) -> dict:
+        """
+        Previsão da última linha para todos os horizontes.
+
+        Returns:
+            {h: ('ALTA' | 'BAIXA', confiança em %)}
+        """
+        p_up = self.predict_proba(X_row)[-1]
+        return {h: ('ALTA' if p >= 0.5 else 'BAIXA', max(p, 1 - p) * 100)
+                for h, p in zip(self.horizons, p_up.tolist())}
+
+
+def load_horizon_model(folder=HORIZON_DIR) -> HorizonModel:
+    """Carrega e valida os classificadores de ``folder``"""
+    folder = Path(folder)
+    with open(folder / META_FILE, 'r') as f:
+        info = json.load(f)
+    horizons = tuple(info['horizons'])
+    feature_columns = tuple(info['feature_columns'])
+
+    ensembles = [load_artifact(folder / horizon_name(h)) for h in horizons]
+    for h, e in zip(horizons, ensembles):
+        if e.n_features_in_ != len(feature_columns):
+            raise FeatureSchemaError(
+                f"Horizonte t+{h} espera {e.n_features_in_} features, {META_FILE} lista {len(feature_columns)}"
+            )
+        names = getattr(e, 'feature_names_in_', None)
+        if names is not None and tuple(names) != feature_columns:
+            raise FeatureSchemaError(f"Horizonte t+{h}: ordem das features difere de {META_FILE}")
+    return HorizonModel(horizons, feature_columns, StackedEnsemble(ensembles), info)
+
+
+# =========================
+# TREINO
+# =========================
+
+def train_horizon_models(df: pd.DataFrame, feature_columns, horizons=HORIZONS,
+                         folder=HORIZON_DIR, test_size: float = 0.2) -> dict:
+    """
+    Treina um ``GradientBoostingClassifier`` por horizonte sobre a mesma
+    matriz de features (``compute_features``, como na inferência) e exporta
+    tudo para ``folder``.
+
+    A divisão treino/teste é temporal; as ``h`` linhas antes do teste são
+    descartadas do treino para o alvo de t+h não olhar para o período de teste.
+    """
+    from sklearn.ensemble import GradientBoostingClassifier  # só no treino
+    from sklearn.metrics import accuracy_score, roc_auc_score
+
+    _, df_feat, matrix = compute_features(df, feature_columns)
+    targets = direction_targets(df_feat['close'], horizons)
+    X = pd.DataFrame(matrix.values, columns=matrix.columns)
+    split = int(len(X) * (1 - test_size))
+
+    folder = Path(folder)
+    metrics = {}
+    for h in horizons:
+        y = targets[horizon_name(h)].to_numpy()
+        train = np.arange(len(X)) < split - h
+        test = (np.arange(len(X)) >= split) & ~np.isnan(y)
+        train &= ~np.isnan(y)
+
+        model = GradientBoostingClassifier(random_state=42)
+        model.fit(X[train], y[train].astype(int))
+        proba = model.predict_proba(X[test])[:, 1]
+        metrics[horizon_name(h)] = {
+            'accuracy': float(accuracy_score(y[test], proba >= 0.5)),
+            'roc_auc': float(roc_auc_score(y[test], proba)),
+            'n_train': int(train.sum()),
+            'n_test': int(test.sum()),
+        }
+        export_tree_ensemble(model, folder / horizon_name(h))
+
+    info = {
+        'horizons': list(horizons),
+        'feature_columns': list(matrix.columns),
+        'model_name': 'Gradient Boosting',
+        'metrics': metrics,
+        'training_date': datetime.now().isoformat(),
+    }
+    with open(folder / META_FILE, 'w') as f:
+        json.dump(info, f, indent=2)
+    return info
+
+
+if __name__ == '__main__':
+    if sys.argv[1:] != ['train']:
+        print(__doc__)
+        sys.exit(1)
+    from ibov.ingest import UNIFIED_PATH, load_unified_data
+
+    info = train_horizon_models(load_unified_data(UNIFIED_PATH), read_feature_columns(FEATURE_COLUMNS_PATH))
+    for name, m in info['metrics'].items():
+        print(f"✅ {name}: acurácia {m['accuracy']:.3f} | ROC-AUC {m['roc_auc']:.3f}")
@@ -0,0 +1,198 @@
+"""
+Leitura dos exports do Investing.com e montagem da base unificada.
+
+Substitui o ``pd.merge(..., how='inner')`` do notebook: o calendário é o
+do IBOVESPA e as séries macro entram via join as-of (``ibov.asof``), então
+um pregão sem cotação do dólar não é mais descartado.
+
+Do IBOVESPA vem o OHLCV completo (``Abertura``, ``Máxima``, ``Mínima``,
+``Último``, ``Vol.``): preços em float32 e volume como inteiro no CSV
+(``8,81B`` → 8810000000), carregados em float32 por ``load_unified_data``.
+
+Uso:
+    python -m ibov.ingest            # regrava Unified_Data.csv
+"""
+
+import os
+from pathlib import Path
+from typing import Iterable, Optional
+
+import pandas as pd
+
+from ibov.asof import AsofSeries, asof_join
+from ibov.trading_calendar import b3_calendar
+
+# =========================
+# CAMINHOS
+# =========================
+DATA_DIR = Path("data")
+IBOV_PATH = DATA_DIR / "Dados Históricos - Ibovespa 2005-2025.csv"
+USD_PATH = DATA_DIR / "USD_BRL Dados Históricos.csv"
+UNIFIED_PATH = Path("Unified_Data.csv")
+
+# Dólar: aceita até uma semana sem cotação (feriados nos EUA/Brasil)
+USD_MAX_STALENESS = pd.Timedelta(days=7)
+
+# Colunas do export do Investing.com → nomes da base unificada
+OHLCV_COLUMNS = {
+    'Último': 'close',
+    'Abertura': 'open',
+    'Máxima': 'high',
+    'Mínima': 'low',
+    'Vol.': 'volume',
+}
+VOLUME_SUFFIXES = {'K': 1e3, 'M': 1e6, 'B': 1e9}
+
+UNIFIED_DTYPES = {
+    'close': 'float32',
+    'open': 'float32',
+    'high': 'float32',
+    'low': 'float32',
+    'volume': 'float32',
+    'usd_close': 'float32',
+    'selic': 'float32',
+}
+
+
+def read_investing_csv(path, value_name: str = 'close') -> pd.DataFrame:
+    """
+    Lê um export do Investing.com (``Data`` em dd.mm.aaaa, números pt-BR).
+
+    Returns:
+        DataFrame ``date``, ``<value_name>`` em ordem crescente de data.
+    """
+    df = pd.read_csv(
+        path,
+        usecols=['Data', 'Último'],
+        dtype={'Data': str},
+        thousands='.',
+        decimal=',',
+        encoding='utf-8-sig',
+    )
+    df['date'] = pd.to_datetime(df['Data'], format='%d.%m.%Y', errors='coerce')
+    df[value_name] = pd.to_numeric(df['Último'], errors='coerce').astype('float64')
+    df = df.dropna(subset=['date', value_name])
+    return df[['date', value_name]].sort_values('date', ignore_index=True)
+
+
+def parse_volume(raw: pd.Series) -> pd.Series:
+    """
+    Volume do Investing.com (``8,81B``, ``146,14M``, ``950,3K``) em unidades.
+
+    Vetorizado: separa o sufixo, converte a mantissa pt-BR e multiplica.
+    Vazio/``-`` vira NaN (pregões sem volume divulgado).
+    """
+    raw = raw.astype('string').str.strip()
+    suffix = raw.str[-1]
+    scale = suffix.map(VOLUME_SUFFIXES).astype('float64')
+    mantissa = raw.where(scale.isna(), raw.str[:-1])
+    scale = scale.fillna(1.0)
+    mantissa = mantissa.str.replace('.', '', regex=False).str.replace(',', '.', regex=False)
+    return pd.to_numeric(mantissa, errors='coerce').astype('float64') * scale
+
+
+def read_investing_ohlcv(path) -> pd.DataFrame:
+    """
+    Lê o OHLCV de um export do Investing.com.
+
+    Returns:
+        DataFrame ``date, close, open, high, low, volume`` em ordem crescente.
+    """
+    df = pd.read_csv(
+        path,
+        usecols=['Data', *OHLCV_COLUMNS],
+        dtype={'Data': str, 'Vol.': str},
+        thousands='.',
+        decimal=',',
+        encoding='utf-8-sig',
+    )
+    df['date'] = pd.to_datetime(df['Data'], format='%d.%m.%Y', errors='coerce')
+    for raw, name in OHLCV_COLUMNS.items():
+        if name == 'volume':
+            df[name] = parse_volume(df[raw])
+        else:
+            df[name] = pd.to_numeric(df[raw], errors='coerce').astype('float64')
+    df = df.dropna(subset=['date', 'close'])
+    return df[['date', *OHLCV_COLUMNS.values()]].sort_values('date', ignore_index=True)
+
+
+def data_version(path=UNIFIED_PATH) -> str:
+    """
+    Identificador barato da versão de um arquivo de dados (mtime + tamanho).
+
+    Usado como chave dos caches do Streamlit: regravar o CSV (ex.:
+    ``python -m ibov.ingest``) invalida tudo que foi derivado dele.
+    """
+    st = os.stat(path)
+    return f"{st.st_mtime_ns:x}-{st.st_size:x}"
+
+
+def load_unified_data(path=UNIFIED_PATH) -> pd.DataFrame:
+    """Carrega a base unificada (OHLCV + macro) em float32 e em ordem crescente de data"""
+    df = pd.read_csv(path, dtype=UNIFIED_DTYPES, parse_dates=['date'])
+    return df.sort_values('date', ignore_index=True)
+
+
+def read_unified_chunks(path=UNIFIED_PATH, chunk_rows: int = 1_000_000):
+    """
+    Lê a base unificada em blocos de ``chunk_rows`` linhas (mesmos dtypes de
+    ``load_unified_data``), para o modo em blocos de ``ibov.features``.
+
+    O arquivo precisa estar em ordem crescente de data (como grava
+    ``python -m ibov.ingest``); o índice continua de um bloco para o outro.
+    """
+    last = None
+    with pd.read_csv(path, dtype=UNIFIED_DTYPES, parse_dates=['date'], chunksize=chunk_rows) as reader:
+        for chunk in reader:
+            dates = chunk['date'].to_numpy()
+            if (last is not None and dates[0] < last) or (dates[1:] < dates[:-1]).any():
+                raise ValueError(f"{path} não está em ordem crescente de data")
+            last = dates[-1]
+            yield chunk
+
+
+def load_selic_steps(path=UNIFIED_PATH) -> AsofSeries:
+    """Selic como função degrau (só as datas de decisão do Copom)"""
+    df = pd.read_csv(path, usecols=['date', 'selic'], parse_dates=['date'])
+    return AsofSeries.from_series(df.set_index('date')['selic'], steps=True)
+
+
+def default_exog(usd_path=USD_PATH) -> list:
+    """Séries macro padrão da base: dólar (export do Investing.com) + Selic"""
+    usd = read_investing_csv(usd_path, 'usd_close')
+    return [
+        AsofSeries.from_series(usd.set_index('date')['usd_close'],
+                               max_staleness=USD_MAX_STALENESS),
+        load_selic_steps(),
+    ]
+
+
+def build_unified_data(ibov_path=IBOV_PATH, usd_path=USD_PATH,
+                       exog: Optional[Iterable[AsofSeries]] = None,
+                       start: str = '2016-01-01') -> pd.DataFrame:
+    """
+    Monta a base ``date, close, open, high, low, volume, usd_close, selic, ...``
+    no calendário do IBOVESPA.
+
+    Args:
+        exog: séries macro adicionais; por padrão dólar + Selic.
+        start: primeira data mantida (o notebook usa 2016 em diante).
+    """
+    ibov = read_investing_ohlcv(ibov_path)
+    ibov = ibov[ibov['date'] >= pd.Timestamp(start)].reset_index(drop=True)
+    # Linhas em dias sem pregão (cópias do dia anterior no export) ficam de fora
+    ibov = b3_calendar().align(ibov)
+
+    if exog is None:
+        exog = default_exog(usd_path)
+
+    aligned = asof_join(ibov['date'], exog)
+    return pd.concat([ibov, aligned.drop(columns='date')], axis=1)
+
+
+if __name__ == '__main__':
+    df = build_unified_data()
+    # Volume é contagem: inteiro no CSV (Int64 mantém os pregões sem volume)
+    df['volume'] = df['volume'].round().astype('Int64')
+    df.to_csv(UNIFIED_PATH, index=False)
+    print(f"✅ {UNIFIED_PATH}: {len(df)} linhas ({df['date'].min().date()} até {df['date'].max().date()})")
@@ -0,0 +1,530 @@
+"""
+Modo intradiário: features e probabilidade do modelo atualizadas a cada tick.
+
+Durante o pregão, a linha de hoje é provisória: o fechamento é o último
+preço, máxima/mínima e volume acumulam desde a abertura. ``create_features``
+recalcularia o histórico inteiro a cada tick; aqui só a linha de hoje muda.
+Na abertura de cada pregão, as partes fechadas de cada janela (as
+``janela - 1`` linhas anteriores: somas, média e soma dos quadrados dos
+desvios) e o estado das EWM do MACD são calculados uma vez. A cada tick,
+cada indicador (MAs, Bollinger, RSI, volatilidade, MACD, ATR, ...) é uma
+combinação desse resumo com o preço atual, em O(1).
+
+Os ticks vêm de um gerador assíncrono; ``replay_ticks`` lê um CSV
+(``time, price, volume[, usd, selic]``) no ritmo original acelerado, no lugar de um
+feed ao vivo. ``LiveFeed`` consome os ticks e publica o último estado no
+máximo a cada ``throttle`` segundos: os ticks intermediários só atualizam as
+features, e o modelo roda uma vez por publicação, não por tick.
+
+O dólar entra pelo campo ``usd`` do tick, quando existe; senão fica o valor
+do último pregão fechado. A Selic de cada pregão vem do campo ``selic`` do
+tick ou das decisões do Copom na base (``selic``, como no ``asof_join``);
+sem nenhuma das duas, ``selic``, ``selic_subindo`` e ``selic_change`` ficam
+NaN e ``LiveFeed`` não calcula a probabilidade, em vez de repetir a taxa de
+outro pregão.
+
+Uso:
+    python -m ibov.intraday gerar ticks.csv [aaaa-mm-dd] [n_ticks]  # sessão sintética a partir do OHLC de um pregão da base
+    python -m ibov.intraday ticks.csv [velocidade]                  # replay com atualizações limitadas (padrão 600x)
+"""
+
+import asyncio
+import sys
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass, replace
+from pathlib import Path
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+from ibov.asof import AsofSeries
+from ibov.features import (
+    ATR_WINDOW, FEATURE_NAMES, FLAG_COLUMNS, MA_WINDOWS, RETURN_LAGS, SIGNAL_HORIZONS,
+    VOLUME_WINDOW, WARMUP_ROWS, FeatureStream, true_range,
+)
+
+THROTTLE_SECONDS = 0.5      # intervalo mínimo entre publicações
+REPLAY_SPEED = 600.0        # replay 600x mais rápido que o pregão (~40 s por sessão)
+MAX_POINTS = 2000           # publicações guardadas para o gráfico
+RSI_PERIOD = 14
+MACD_SPANS = {'exp12': 12, 'exp26': 26, 'signal': 9}
+# Pregões fechados guardados: maior janela + 1 (diferenças e defasagens)
+HISTORY_ROWS = WARMUP_ROWS + 1
+
+
+@dataclass(frozen=True)
+class Tick:
+    """Negócio (ou cotação) do índice"""
+
+    time: pd.Timestamp
+    price: float
+    volume: float = 0.0             # volume do tick (o da sessão é a soma)
+    usd: float = float('nan')       # dólar no momento, se o feed trouxer
+    selic: float = float('nan')     # Selic vigente, se o feed trouxer
+
+
+@dataclass(frozen=True)
+class IntradaySnapshot:
+    """Estado da linha de hoje após um tick (não modificar)"""
+
+    time: pd.Timestamp
+    session: pd.Timestamp           # data do pregão em andamento
+    n_ticks: int                    # ticks do pregão até aqui
+    features: dict                  # nome → valor (mesmos nomes de create_features)
+    proba: float = float('nan')     # P(ALTA no próximo fechamento), preenchida na publicação
+
+
+# =========================
+# FONTE DE TICKS
+# =========================
+
+def read_ticks(path) -> pd.DataFrame:
+    """CSV de ticks (``time, price, volume`` e, opcionalmente, ``usd`` e ``selic``) em ordem de tempo"""
+    ticks = pd.read_csv(path, parse_dates=['time'])
+    missing = {'time', 'price'} - set(ticks.columns)
+    if missing:
+        raise ValueError(f"Arquivo de ticks sem as colunas {sorted(missing)}: {path}")
+    if 'volume' not in ticks:
+        ticks['volume'] = 0.0
+    for name in ('usd', 'selic'):
+        if name not in ticks:
+            ticks[name] = np.nan
+    return ticks.sort_values('time', kind='stable').reset_index(drop=True)
+
+
+async def replay_ticks(path, speed: float = REPLAY_SPEED):
+    """
+    Gerador assíncrono com os ticks de ``path``, espaçados pelo intervalo
+    original dividido por ``speed`` (``speed=0``: sem espera).
+    """
+    ticks = read_ticks(path)
+    times = ticks['time'].to_numpy()
+    prices = ticks['price'].to_numpy(dtype=np.float64)
+    volumes = ticks['volume'].to_numpy(dtype=np.float64)
+    usds = ticks['usd'].to_numpy(dtype=np.float64)
+    selics = ticks['selic'].to_numpy(dtype=np.float64)
+    gaps = np.diff(times, prepend=times[:1]) / np.timedelta64(1, 's')
+    for i in range(len(ticks)):
+        if speed and gaps[i] > 0:
+            await asyncio.sleep(gaps[i] / speed)
+        yield Tick(pd.Timestamp(times[i]), prices[i], volumes[i], usds[i], selics[i])
+
+
+# =========================
+# FEATURES INCREMENTAIS
+# =========================
+
+class _OpenWindow:
+    """
+    Janela móvel cujas ``window - 1`` primeiras posições são pregões fechados
+    e a última é o valor provisório de hoje; NaN é ignorado como no
+    ``rolling`` de ``ibov.features``.
+    """
+
+    def __init__(self, closed, window: int, min_periods: Optional[int] = None):
+        closed = np.asarray(closed, dtype=np.float64)
+        closed = closed[max(len(closed) - (window - 1), 0):]
+        closed = closed[~np.isnan(closed)]
+        self.min_periods = window if min_periods is None else min_periods
+        self.count = len(closed)
+        self.total = float(closed.sum())
+        self.center = float(closed.mean()) if self.count else 0.0
+        self.m2 = float(((closed - self.center) ** 2).sum())
+
+    def mean(self, x: float) -> float:
+        if np.isnan(x):
+            n, total = self.count, self.total
+        else:
+            n, total = self.count + 1, self.total + x
+        return total / n if n >= max(self.min_periods, 1) else np.nan
+
+    def std(self, x: float) -> float:
+        """Desvio padrão amostral (fusão de Welford das linhas fechadas com ``x``)"""
+        if np.isnan(x):
+            n, m2 = self.count, self.m2
+        else:
+            n = self.count + 1
+            m2 = self.m2 + (x - self.center) ** 2 * self.count / n
+        return np.sqrt(m2 / (n - 1)) if n >= max(self.min_periods, 2) else np.nan
+
+
+def _ewm_step(previous: float, x: float, span: int, gap: int = 0) -> float:
+    """
+    Um passo da EWM ``adjust=False`` (mesma recursão do pandas); ``gap``
+    entradas NaN desde ``previous`` decaem o peso dele como no pandas.
+    """
+    alpha = 2.0 / (span + 1)
+    weight = (1 - alpha) ** (gap + 1)
+    return (weight * previous + alpha * x) / (weight + alpha)
+
+
+class IntradayFeatures:
+    """
+    Features da linha do pregão em andamento, atualizadas tick a tick.
+
+    ``history`` é a base unificada (``BASE_COLUMNS``) até o último pregão
+    fechado. Ela é percorrida uma vez (``FeatureStream``) para obter o estado
+    das EWM; depois só as últimas ``HISTORY_ROWS`` linhas são mantidas. Um
+    tick de data posterior fecha o pregão em andamento e abre o seguinte.
+    ``selic`` (decisões do Copom, ``selic_steps``) dá a taxa de cada pregão
+    aberto quando os ticks não trazem o campo ``selic``.
+
+        live = IntradayFeatures(history, feature_columns, selic_steps(df))
+        snapshot = live.update(tick)
+        row = live.model_row()      # 1 × features, float32, na ordem do modelo
+    """
+
+    def __init__(self, history: pd.DataFrame, feature_columns=None, selic: Optional[AsofSeries] = None):
+        if history.empty:
+            raise ValueError("Histórico vazio: o modo intradiário precisa dos pregões anteriores")
+        self.feature_columns = None if feature_columns is None else tuple(feature_columns)
+        if self.feature_columns is not None:
+            unknown = [c for c in self.feature_columns if c not in FEATURE_NAMES or c == 'date']
+            if unknown:
+                raise ValueError(f"Features sem implementação no modo intradiário: {unknown}")
+        stream = FeatureStream()
+        stream.push(history)
+        self.ewm = {name: stream.ewm_state[name] for name in MACD_SPANS}
+        # NaN no fim do histórico (ver ``_ewm``): só afetam o primeiro pregão
+        self.ewm_gap = {name: stream.ewm_state.get(name + '_gap', 0) for name in MACD_SPANS}
+        self.selic_source = selic
+        self.bars = history[['date', 'close', 'open', 'high', 'low', 'volume', 'usd_close', 'selic']] \
+            .tail(HISTORY_ROWS).reset_index(drop=True)
+        self.session = None
+        self.snapshot = None
+        self._start_session()
+
+    # ----- abertura e fechamento do pregão -----
+
+    def _start_session(self) -> None:
+        """Resume as partes fechadas de cada janela (O(janela), uma vez por pregão)"""
+        bars = self.bars
+        close = bars['close'].to_numpy(dtype=np.float64)
+        volume = bars['volume'].to_numpy(dtype=np.float64)
+        returns = close[1:] / close[:-1] - 1
+        delta = np.diff(close)
+        tr = true_range(bars['high'], bars['low'], close)
+
+        self.prev_close = close[-1]
+        self.prev_volume = volume[-1]
+        self.prev_usd = float(bars['usd_close'].iloc[-1])
+        self.prev_selic = float(bars['selic'].iloc[-1])
+        # close[t - h] para cada horizonte (t = hoje, close[-1] = ontem)
+        self.reference = {h: close[-h] if h <= len(close) else np.nan for h in SIGNAL_HORIZONS}
+        self.return_lags = {k: returns[-k] if k <= len(returns) else np.nan for k in RETURN_LAGS}
+        self.ma = {w: _OpenWindow(close, w) for w in MA_WINDOWS}
+        self.bb = _OpenWindow(close, 20)
+        self.volatility = _OpenWindow(returns, 20)
+        self.gain = _OpenWindow(np.where(delta > 0, delta, 0.0), RSI_PERIOD)
+        self.loss = _OpenWindow(np.where(delta < 0, -delta, 0.0), RSI_PERIOD)
+        self.atr = _OpenWindow(tr, ATR_WINDOW)
+        self.volume_window = _OpenWindow(volume, VOLUME_WINDOW, VOLUME_WINDOW // 2)
+
+        self.n_ticks = 0
+        self.open = self.high = self.low = np.nan
+        self.volume = 0.0
+        self.usd = self.prev_usd
+        self.selic = np.nan
+
+    def _close_session(self) -> None:
+        """Acrescenta o pregão em andamento às barras fechadas e avança as EWM"""
+        f = self.snapshot.features
+        self.ewm = self._ewm_today
+        self.ewm_gap = dict.fromkeys(MACD_SPANS, 0)
+        bar = pd.DataFrame([{
+            'date': self.session, 'close': f['close'], 'open': f['open'], 'high': f['high'],
+            'low': f['low'], 'volume': f['volume'], 'usd_close': f['usd_close'], 'selic': f['selic'],
+        }]).astype(self.bars.dtypes.to_dict())
+        self.bars = pd.concat([self.bars, bar], ignore_index=True).tail(HISTORY_ROWS).reset_index(drop=True)
+        self._start_session()
+
+    # ----- tick -----
+
+    def update(self, tick: Tick) -> IntradaySnapshot:
+        """Incorpora ``tick`` e devolve o novo estado da linha de hoje (O(1))"""
+        session = tick.time.normalize()
+        if self.session is None:
+            if session <= self.bars['date'].iloc[-1]:
+                raise ValueError(f"Tick de {tick.time} não é posterior ao último pregão do histórico")
+            self.session = session
+        elif session != self.session:
+            if session < self.session:
+                raise ValueError(f"Tick fora de ordem: {tick.time} antes do pregão {self.session:%d/%m/%Y}")
+            self._close_session()
+            self.session = session
+
+        price = float(tick.price)
+        if self.n_ticks == 0:
+            self.open = self.high = self.low = price
+            self.selic = self._session_selic()
+        else:
+            self.high = max(self.high, price)
+            self.low = min(self.low, price)
+        self.n_ticks += 1
+        if not np.isnan(tick.volume):
+            self.volume += float(tick.volume)
+        if not np.isnan(tick.usd):
+            self.usd = float(tick.usd)
+        if not np.isnan(tick.selic):
+            self.selic = float(tick.selic)
+
+        self.snapshot = IntradaySnapshot(tick.time, self.session, self.n_ticks, self._features(price))
+        return self.snapshot
+
+    def _session_selic(self) -> float:
+        """Selic vigente no pregão em andamento pelas decisões do Copom (NaN sem fonte)"""
+        if self.selic_source is None:
+            return np.nan
+        return float(self.selic_source.align(np.array([self.session.to_datetime64()]))[0])
+
+    def _features(self, close: float) -> dict:
+        """Linha de hoje com o fechamento provisório ``close`` (mesmas fórmulas de ``_feature_columns``)"""
+        prev = self.prev_close
+        f = {'date': self.session, 'close': close, 'open': self.open, 'high': self.high,
+             'low': self.low, 'volume': self.volume, 'usd_close': self.usd, 'selic': self.selic}
+
+        ret = close / prev - 1
+        f['returns'] = ret
+        f['log_return'] = np.log(close / prev)
+        for h in SIGNAL_HORIZONS:
+            f[f'sinal_t{h}'] = close > self.reference[h]
+        for k in RETURN_LAGS:
+            f[f'returns_lag{k}'] = self.return_lags[k]
+
+        for w in MA_WINDOWS:
+            f[f'ma{w}'] = self.ma[w].mean(close)
+        f['sinal_ma5_ma20'] = f['ma5'] > f['ma20']
+        f['close_acima_ma5'] = close > f['ma5']
+        f['close_acima_ma20'] = close > f['ma20']
+
+        f['volatility'] = self.volatility.std(ret)
+        gain, loss = self.gain.mean(max(close - prev, 0.0)), self.loss.mean(max(prev - close, 0.0))
+        with np.errstate(divide='ignore', invalid='ignore'):
+            f['rsi'] = 100 - 100 / (1 + np.float64(gain) / loss)
+
+        ewm, gap = self.ewm, self.ewm_gap
+        exp12 = _ewm_step(ewm['exp12'], close, MACD_SPANS['exp12'], gap['exp12'])
+        exp26 = _ewm_step(ewm['exp26'], close, MACD_SPANS['exp26'], gap['exp26'])
+        f['macd'] = exp12 - exp26
+        f['signal'] = _ewm_step(ewm['signal'], f['macd'], MACD_SPANS['signal'], gap['signal'])
+        self._ewm_today = {'exp12': exp12, 'exp26': exp26, 'signal': f['signal']}
+        f['macd_hist'] = f['macd'] - f['signal']
+
+        bb_std = self.bb.std(close)
+        f['bb_upper'] = f['ma20'] + bb_std * 2
+        f['bb_lower'] = f['ma20'] - bb_std * 2
+
+        tr = max(self.high - self.low, abs(self.high - prev), abs(self.low - prev))
+        f['tr'] = tr
+        f['atr'] = self.atr.mean(tr)
+        f['price_range'] = (self.high - self.low) / close
+        f['volume_change'] = self.volume / self.prev_volume - 1
+        f['volume_ratio'] = self.volume / self.volume_window.mean(self.volume)
+
+        f['sinal_usd_up'] = self.usd > self.prev_usd
+        f['usd_change'] = self.usd / self.prev_usd - 1
+        # Taxa desconhecida (de hoje ou de ontem): NaN, e o modelo não roda
+        known = not (np.isnan(self.selic) or np.isnan(self.prev_selic))
+        f['selic_subindo'] = self.selic > self.prev_selic if known else np.nan
+        f['selic_change'] = self.selic - self.prev_selic
+        for name in FLAG_COLUMNS:
+            f[name] = int(f[name]) if not pd.isna(f[name]) else np.nan
+        return f
+
+    def model_row(self, snapshot: Optional[IntradaySnapshot] = None) -> np.ndarray:
+        """Linha 1 × features (float32, ordem do modelo) do estado atual ou de ``snapshot``"""
+        f = (snapshot or self.snapshot).features
+        return np.array([[f[name] for name in self.feature_columns]], dtype=np.float32)
+
+
+# =========================
+# PUBLICAÇÃO LIMITADA
+# =========================
+
+class LiveFeed:
+    """
+    Consome um gerador assíncrono de ticks e publica o estado mais recente a
+    cada ``throttle`` segundos (só se houve tick novo) e ao fim dos ticks.
+
+    Cada publicação calcula P(ALTA) com ``bundle`` (quando dado), guarda o
+    snapshot em ``latest``/``published`` e chama os ``on_update``. O
+    dashboard lê ``latest`` no mesmo intervalo; ``start`` roda o feed numa
+    thread de fundo com o próprio event loop.
+    """
+
+    def __init__(self, features: IntradayFeatures, bundle=None, throttle: float = THROTTLE_SECONDS,
+                 on_update=None, max_points: int = MAX_POINTS):
+        self.features = features
+        self.bundle = bundle
+        self.throttle = throttle
+        self.on_update = list(on_update or [])
+        self.latest = None
+        self.published = deque(maxlen=max_points)
+        self.n_ticks = 0
+        self.error = None
+        self.done = False
+        self._pending = None
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _publish(self) -> None:
+        snapshot = self._pending
+        if snapshot is None or snapshot is self.latest:
+            return
+        if self.bundle is not None:
+            row = self.features.model_row(snapshot)
+            if not np.isnan(row).any():
+                snapshot = replace(snapshot, proba=float(self.bundle.predict_proba(row)[-1]))
+        self._pending = self.latest = snapshot
+        self.published.append(snapshot)
+        for callback in self.on_update:
+            callback(snapshot)
+
+    async def run(self, ticks) -> None:
+        """Consome ``ticks`` até o fim (ou ``stop``), publicando no ritmo de ``throttle``"""
+        async def consume():
+            async for tick in ticks:
+                if self._stop.is_set():
+                    break
+                self._pending = self.features.update(tick)
+                self.n_ticks += 1
+
+        consumer = asyncio.create_task(consume())
+        try:
+            while not consumer.done():
+                await asyncio.wait({consumer}, timeout=self.throttle)
+                self._publish()
+            consumer.result()
+        finally:
+            self._publish()
+            self.done = True
+
+    def start(self, ticks) -> 'LiveFeed':
+        """Roda ``run(ticks)`` numa thread de fundo"""
+        def target():
+            try:
+                asyncio.run(self.run(ticks))
+            except Exception as e:
+                self.error = e
+                print(f"⚠️  Feed intradiário interrompido: {e}")
+
+        if self._thread is None:
+            self._thread = threading.Thread(target=target, name='intraday-feed', daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._stop.set()
+
+    def frame(self) -> pd.DataFrame:
+        """Publicações até aqui (tempo, preço, indicadores exibidos e P(ALTA))"""
+        columns = ('close', 'ma20', 'bb_upper', 'bb_lower', 'rsi', 'macd', 'signal')
+        rows = [(s.time, *(s.features[c] for c in columns), s.proba) for s in list(self.published)]
+        return pd.DataFrame(rows, columns=('time', *columns, 'proba'))
+
+
+def selic_steps(df: pd.DataFrame) -> AsofSeries:
+    """Selic da base como função degrau (taxa de cada pregão por as-of)"""
+    return AsofSeries.from_series(df.set_index('date')['selic'], steps=True)
+
+
+def history_before(df: pd.DataFrame, ticks_path) -> pd.DataFrame:
+    """Pregões da base anteriores ao primeiro tick do arquivo"""
+    first = read_ticks(ticks_path)['time'].iloc[0].normalize()
+    return df[df['date'] < first].reset_index(drop=True)
+
+
+def open_replay(df: pd.DataFrame, ticks_path, bundle=None, speed: float = REPLAY_SPEED,
+                throttle: float = THROTTLE_SECONDS) -> LiveFeed:
+    """Feed de replay de ``ticks_path`` sobre a base ``df``, já rodando em segundo plano"""
+    features = IntradayFeatures(history_before(df, ticks_path),
+                                None if bundle is None else bundle.feature_columns, selic_steps(df))
+    return LiveFeed(features, bundle, throttle).start(replay_ticks(ticks_path, speed))
+
+
+# =========================
+# SESSÃO SINTÉTICA
+# =========================
+
+def synthetic_session(bar: pd.Series, n_ticks: int = 2000, seed: int = 0,
+                      open_time: str = '10:00:00', close_time: str = '17:00:00') -> pd.DataFrame:
+    """
+    Ticks de uma sessão que reproduzem o OHLC e o volume de ``bar``.
+
+    O caminho é abertura → máxima → mínima → fechamento (ou com a mínima
+    antes), cada trecho uma ponte browniana limitada a [mínima, máxima]:
+    o último tick reproduz exatamente a linha do pregão na base.
+    """
+    rng = np.random.default_rng(seed)
+    o, h, l, c = (float(bar[k]) for k in ('open', 'high', 'low', 'close'))
+    stops = (o, h, l, c) if rng.random() < 0.5 else (o, l, h, c)
+    # Trechos com tamanho proporcional ao deslocamento (ao menos 2 ticks cada)
+    moves = np.abs(np.diff(stops)) + (h - l) * 0.05 + 1e-9
+    sizes = np.maximum((moves / moves.sum() * (n_ticks - 1)).astype(int), 2)
+    legs = []
+    for (a, b), size in zip(zip(stops, stops[1:]), sizes):
+        t = np.linspace(0, 1, size + 1)[1:]
+        walk = np.cumsum(rng.normal(0, 1, size))
+        bridge = walk - t * walk[-1]
+        legs.append(a + (b - a) * t + bridge * (h - l) * 0.02)
+    prices = np.clip(np.concatenate([[o], *legs]), l, h)
+    prices[-1] = c
+
+    day = pd.Timestamp(bar['date']).normalize()
+    times = pd.date_range(day + pd.Timedelta(open_time), day + pd.Timedelta(close_time), periods=len(prices))
+    volume = float(bar['volume']) if not np.isnan(bar['volume']) else 0.0
+    weights = rng.random(len(prices))
+    ticks = pd.DataFrame({'time': times, 'price': prices, 'volume': volume * weights / weights.sum()})
+    ticks['usd'] = float(bar['usd_close'])
+    ticks['selic'] = float(bar['selic'])
+    return ticks
+
+
+if __name__ == '__main__':
+    from ibov.features import create_features
+    from ibov.ingest import UNIFIED_PATH, load_unified_data
+
+    df = load_unified_data(UNIFIED_PATH)
+    if len(sys.argv) in (3, 4, 5) and sys.argv[1] == 'gerar':
+        day = pd.Timestamp(sys.argv[3]) if len(sys.argv) > 3 else df['date'].iloc[-1]
+        rows = df[df['date'] == day]
+        if rows.empty:
+            print(f"❌ {day:%d/%m/%Y} não é um pregão da base")
+            sys.exit(1)
+        ticks = synthetic_session(rows.iloc[0], int(sys.argv[4]) if len(sys.argv) > 4 else 2000)
+        ticks.to_csv(sys.argv[2], index=False)
+        print(f"✅ {sys.argv[2]}: {len(ticks)} ticks sintéticos do pregão de {day:%d/%m/%Y}")
+        sys.exit(0)
+    if len(sys.argv) not in (2, 3) or not Path(sys.argv[1]).exists():
+        print(__doc__)
+        sys.exit(1)
+
+    from ibov.model_bundle import load_model_bundle
+
+    bundle = load_model_bundle()
+    speed = float(sys.argv[2]) if len(sys.argv) > 2 else REPLAY_SPEED
+
+    def show(s):
+        f = s.features
+        print(f"   {s.time:%H:%M:%S} | {f['close']:>10,.2f} ({f['returns']:+.2%}) | RSI {f['rsi']:5.1f} | "
+              f"MACD {f['macd']:8.1f} / {f['signal']:8.1f} | MA20 {f['ma20']:,.0f} | "
+              f"BB [{f['bb_lower']:,.0f}, {f['bb_upper']:,.0f}] | P(ALTA) {s.proba:.1%}")
+
+    features = IntradayFeatures(history_before(df, sys.argv[1]), bundle.feature_columns, selic_steps(df))
+    feed = LiveFeed(features, bundle, on_update=[show])
+    start = time.perf_counter()
+    asyncio.run(feed.run(replay_ticks(sys.argv[1], speed)))
+    elapsed = time.perf_counter() - start
+    print(f"✅ {feed.n_ticks} ticks, {len(feed.published)} publicações em {elapsed:.1f}s")
+
+    # Fim do replay x create_features sobre a base com o pregão fechado
+    session = feed.latest.session
+    if session in set(df['date']):
+        expected = create_features(df[df['date'] <= session]).iloc[-1]
+        got = feed.latest.features
+        diff = max(abs(float(got[c]) - float(expected[c])) / max(abs(float(expected[c])), 1.0)
+                   for c in bundle.feature_columns)
+        print(f"   Último tick x create_features ({session:%d/%m/%Y}): maior diferença relativa {diff:.1e}")
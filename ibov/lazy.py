@@ -0,0 +1,45 @@
+"""
+Imports preguiçosos das bibliotecas pesadas dos dashboards.
+
+Plotly, matplotlib, joblib e sklearn custam de dezenas de ms a mais de 1 s
+para importar, e o Streamlit paga esse custo na primeira execução de cada
+processo (cold start do container). Com ``lazy_import`` o módulo é
+registrado em ``sys.modules`` mas só é executado no primeiro acesso a um
+atributo; se a aba/caminho que usa a biblioteca não roda, ela nunca é
+carregada.
+
+    go = lazy_import('plotly.graph_objects')
+    make_subplots = lazy_function('plotly.subplots', 'make_subplots')
+
+Para medir o efeito:
+
+    python -X importtime -m streamlit run app_dashboard_OTIMIZADO.py 2> importtime.log
+"""
+
+import importlib
+import importlib.util
+import sys
+
+
+def lazy_import(name: str):
+    """Módulo ``name`` cuja execução fica adiada até o primeiro uso"""
+    if name in sys.modules:
+        return sys.modules[name]
+    spec = importlib.util.find_spec(name)
+    if spec is None:
+        raise ModuleNotFoundError(f"No module named '{name}'", name=name)
+    loader = importlib.util.LazyLoader(spec.loader)
+    spec.loader = loader
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    loader.exec_module(module)
+    return module
+
+
+def lazy_function(module_name: str, attr: str):
+    """Função ``module_name.attr`` importada só na primeira chamada"""
+    def call(*args, **kwargs):
+        return getattr(importlib.import_module(module_name), attr)(*args, **kwargs)
+
+    call.__name__ = call.__qualname__ = attr
+    return call
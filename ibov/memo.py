@@ -0,0 +1,83 @@
+"""
+Memo da previsão do próximo pregão, compartilhado entre sessões.
+
+A previsão só muda quando muda o modelo ou a última linha da matriz de
+features (um pregão novo), mas cada rerun de cada sessão refazia
+``predict_proba`` e as razões sobre a mesma linha. Aqui o resultado fica
+guardado por (versão + hash do conteúdo do modelo, hash da linha): no
+caminho quente, o custo é o hash de ~100 bytes e uma comparação. O modelo
+entra pelo conteúdo (``bundle.fingerprint``), não pela identidade do
+objeto: depois de um hot-swap o ``id()`` do modelo antigo pode ser reusado.
+
+Cada "vaga" (o modelo servido: batch, online, ...) guarda uma entrada só;
+modelo ou linha diferente substitui a anterior, então nada se acumula.
+Num miss, o cálculo roda uma vez sob trava: sessões simultâneas esperam e
+recebem o mesmo resultado.
+"""
+
+import hashlib
+import threading
+from dataclasses import dataclass
+
+import numpy as np
+
+
+@dataclass(frozen=True)
+class Prediction:
+    """Previsão memorizada (não modificar)"""
+
+    label: str              # 'ALTA' | 'BAIXA'
+    confidence: float       # em %
+    proba: tuple            # (P(BAIXA), P(ALTA))
+    reasons: tuple
+    key: tuple              # ((versão, hash do modelo), hash da linha)
+
+
+def row_digest(row: np.ndarray) -> str:
+    """Hash do conteúdo da linha de entrada (dtype e valores)"""
+    row = np.ascontiguousarray(row)
+    return hashlib.blake2b(row.dtype.str.encode() + row.tobytes(), digest_size=16).hexdigest()
+
+
+def model_key(bundle) -> tuple:
+    """Versão do bundle + hash do conteúdo do modelo (também para bundles sem versão)"""
+    return bundle.version, bundle.fingerprint
+
+
+class PredictionMemo:
+    """Uma previsão por vaga, válida enquanto modelo e linha não mudarem"""
+
+    def __init__(self):
+        self._entries = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def predict(self, bundle, row: np.ndarray, reasons=None, slot: str = 'default') -> Prediction:
+        """
+        Previsão para ``row`` (última linha, já na ordem do modelo).
+
+        ``reasons()`` só é chamada num miss e devolve a lista de razões.
+        """
+        key = (model_key(bundle), row_digest(row))
+        entry = self._entries.get(slot)
+        if entry is not None and entry.key == key:
+            self.hits += 1
+            return entry
+
+        with self._lock:
+            entry = self._entries.get(slot)
+            if entry is not None and entry.key == key:
+                self.hits += 1
+                return entry
+            label, confidence = bundle.predict(row)
+            p_up = confidence / 100 if label == 'ALTA' else 1 - confidence / 100
+            entry = Prediction(label, confidence, (1 - p_up, p_up),
+                               tuple(reasons() if reasons is not None else ()), key)
+            self._entries[slot] = entry
+            self.misses += 1
+        return entry
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
@@ -0,0 +1,169 @@
+"""
+Carga do modelo + contrato de features, validado uma única vez.
+
+``load_model_bundle`` confere ``best_model.pkl`` contra
+``feature_columns.json`` e ``model_info.json`` (quantidade, ordem e tipos
+das features, classes do classificador) e devolve um ``ModelBundle`` com o
+plano de colunas já compilado. No caminho quente (a cada rerun) não há
+mais validação nem busca de colunas por nome: ``bundle.predict`` recebe a
+linha da ``FeatureMatrix`` e chama ``predict_proba`` uma vez.
+"""
+
+import hashlib
+import json
+import pickle
+from dataclasses import dataclass, field
+from typing import Optional
+
+import numpy as np
+
+from ibov.artifacts import file_sha256, has_artifact, load_artifact
+from ibov.features import FEATURE_NAMES, FLAG_COLUMNS, FLAG_DTYPE, FLOAT_DTYPE, read_feature_columns
+
+MODEL_PATH = 'best_model.pkl'
+MODEL_INFO_PATH = 'model_info.json'
+FEATURE_COLUMNS_PATH = 'feature_columns.json'
+
+
+class FeatureSchemaError(ValueError):
+    """Modelo, feature_columns.json e model_info.json não são compatíveis"""
+
+
+@dataclass(frozen=True)
+class ModelBundle:
+    """Modelo validado + metadados + plano de colunas compilado"""
+
+    model: object
+    info: dict
+    feature_columns: tuple
+    dtypes: tuple
+    positive_index: int
+    version: Optional[str] = None
+    fingerprint: Optional[str] = None   # hash do conteúdo do modelo (chave de memo/caches)
+    _plans: dict = field(default_factory=dict, init=False, repr=False, compare=False)
+
+    @property
+    def n_features(self) -> int:
+        return len(self.feature_columns)
+
+    def column_plan(self, source_columns) -> Optional[np.ndarray]:
+        """
+        Índices das features do modelo dentro de ``source_columns``.
+
+        Retorna ``None`` quando a origem já está na ordem do modelo (caso da
+        ``FeatureMatrix`` construída com ``bundle.feature_columns``): aí a
+        linha é usada como view, sem indexação.
+        """
+        source_columns = tuple(source_columns)
+        if source_columns not in self._plans:
+            if source_columns == self.feature_columns:
+                plan = None
+            else:
+                position = {name: j for j, name in enumerate(source_columns)}
+                missing = [c for c in self.feature_columns if c not in position]
+                if missing:
+                    raise FeatureSchemaError(f"Colunas faltando para o modelo: {missing}")
+                plan = np.array([position[c] for c in self.feature_columns], dtype=np.intp)
+            self._plans[source_columns] = plan
+        return self._plans[source_columns]
+
+    def predict_proba(self, X: np.ndarray) -> np.ndarray:
+        """Probabilidade de ALTA para cada linha de ``X`` (já na ordem do modelo)"""
+        return self.model.predict_proba(X)[:, self.positive_index]
+
+    def predict(self, X_row: np.ndarray):
+        """
+        Previsão para uma linha já na ordem do modelo.
+
+        Returns:
+            ('ALTA' | 'BAIXA', confiança em %)
+        """
+        p_up = float(self.predict_proba(X_row)[-1])
+        label = 'ALTA' if p_up >= 0.5 else 'BAIXA'
+        return label, max(p_up, 1 - p_up) * 100
+
+
+def _feature_dtype(name: str):
+    return FLAG_DTYPE if name in FLAG_COLUMNS else FLOAT_DTYPE
+
+
+def model_fingerprint(model) -> str:
+    """Hash do conteúdo do modelo em memória (pickle), para bundles sem arquivo de origem"""
+    return hashlib.sha256(pickle.dumps(model, protocol=pickle.HIGHEST_PROTOCOL)).hexdigest()
+
+
+def validate_bundle(model, info: dict, feature_columns, fingerprint: Optional[str] = None) -> ModelBundle:
+    """
+    Aplica todas as checagens de contrato e compila o bundle.
+
+    ``fingerprint`` identifica o conteúdo do modelo (ex.: sha256 do ``.pkl``);
+    sem ele, é o hash do modelo serializado.
+    """
+    feature_columns = tuple(feature_columns)
+
+    duplicated = sorted({c for c in feature_columns if feature_columns.count(c) > 1})
+    if duplicated:
+        raise FeatureSchemaError(f"feature_columns.json tem colunas duplicadas: {duplicated}")
+
+    unknown = [c for c in feature_columns if c not in FEATURE_NAMES or c == 'date']
+    if unknown:
+        raise FeatureSchemaError(f"Features sem implementação em create_features: {unknown}")
+
+    n_model = getattr(model, 'n_features_in_', None)
+    if n_model is not None and n_model != len(feature_columns):
+        raise FeatureSchemaError(
+            f"O modelo espera {n_model} features, feature_columns.json tem {len(feature_columns)}"
+        )
+
+    names_in = getattr(model, 'feature_names_in_', None)
+    if names_in is not None and tuple(names_in) != feature_columns:
+        diff = [(i, a, b) for i, (a, b) in enumerate(zip(names_in, feature_columns)) if a != b]
+        raise FeatureSchemaError(
+            "Ordem/nomes das features do modelo diferem de feature_columns.json "
+            f"(primeira diferença na posição {diff[0][0]}: '{diff[0][1]}' vs '{diff[0][2]}')"
+            if diff else "Nomes das features do modelo diferem de feature_columns.json"
+        )
+
+    expected_count = info.get('feature_count')
+    if expected_count is not None and expected_count != len(feature_columns):
+        raise FeatureSchemaError(
+            f"model_info.json declara {expected_count} features, feature_columns.json tem {len(feature_columns)}"
+        )
+
+    if not hasattr(model, 'predict_proba'):
+        raise FeatureSchemaError(f"{type(model).__name__} não tem predict_proba")
+    classes = list(getattr(model, 'classes_', [0, 1]))
+    if len(classes) != 2 or 1 not in classes:
+        raise FeatureSchemaError(f"Esperado classificador binário 0/1, classes = {classes}")
+
+    info = dict(info)
+    info.setdefault('feature_count', len(feature_columns))
+
+    return ModelBundle(
+        model=model,
+        info=info,
+        feature_columns=feature_columns,
+        dtypes=tuple(np.dtype(_feature_dtype(c)) for c in feature_columns),
+        positive_index=classes.index(1),
+        version=info.get('training_date'),
+        fingerprint=fingerprint or model_fingerprint(model),
+    )
+
+
+def load_model_bundle(model_path=MODEL_PATH, info_path=MODEL_INFO_PATH,
+                      columns_path=FEATURE_COLUMNS_PATH) -> ModelBundle:
+    """
+    Carrega e valida modelo + model_info.json + feature_columns.json.
+
+    Usa o formato rápido (``best_model/`` com header.json + .npy mapeados)
+    quando ele existe e corresponde ao ``.pkl``; senão faz o unpickle.
+    """
+    if has_artifact(model_path):
+        model = load_artifact(model_path)
+    else:
+        with open(model_path, 'rb') as f:
+            model = pickle.load(f)
+    with open(info_path, 'r') as f:
+        info = json.load(f)
+    # O formato rápido só é usado quando corresponde ao .pkl: o hash do .pkl identifica os dois
+    return validate_bundle(model, info, read_feature_columns(columns_path), file_sha256(model_path))
@@ -0,0 +1,280 @@
+"""
+Modelo online: regressão logística por SGD com atualização diária.
+
+O ``best_model.pkl`` só aprende com um retreino completo. Aqui o estado do
+modelo (pesos + média/variância das features, padronização de Welford) é
+atualizado linha a linha: a cada pregão novo, a linha de ontem ganha
+rótulo (o fechamento de hoje) e vira um passo de SGD, em microssegundos.
+Como a taxa de aprendizado é constante, pregões recentes pesam mais que os
+antigos (o modelo acompanha mudanças de regime).
+
+A métrica é prequencial: cada linha é prevista antes de ser aprendida, então
+``accuracy`` em ``header.json`` é sempre fora da amostra.
+
+O estado fica no formato de ``ibov.artifacts`` (``header.json`` + ``.npy``) e
+o modelo tem a interface de classificador (``predict_proba``, ``classes_``,
+``n_features_in_``): entra no ``ModelBundle`` e no dashboard como o batch.
+
+Cada atualização grava um estado novo e só então troca o ponteiro
+``CURRENT`` via ``os.replace`` (como em ``ibov.registry``): quem lê sempre
+encontra um estado completo, nunca uma pasta no meio da troca.
+
+Estrutura:
+
+    online_model/
+        CURRENT                         # id do estado ativo (uma linha)
+        states/
+            20260110-183012-123456/     # um por atualização (os KEEP_STATES mais recentes)
+                header.json     # hiperparâmetros, feature_columns, último pregão aprendido, métricas
+                coef.npy  mean.npy  m2.npy
+
+Uso:
+    python -m ibov.online init      # treino inicial + passagem prequencial no holdout
+    python -m ibov.online update    # aprende os pregões rotulados desde a última atualização
+"""
+
+import os
+import shutil
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+from ibov.artifacts import read_arrays, write_arrays
+from ibov.features import read_feature_columns
+from ibov.model_bundle import FEATURE_COLUMNS_PATH, ModelBundle, validate_bundle
+
+ONLINE_DIR = Path('online_model')
+POINTER_FILE = 'CURRENT'
+STATES_DIR = 'states'
+KEEP_STATES = 3     # estados antigos mantidos (leitores que ainda apontam para eles)
+ALPHA = 1e-4        # regularização L2
+ETA0 = 0.01         # taxa de aprendizado (constante)
+INITIAL_EPOCHS = 5
+
+
+class OnlineLogistic:
+    """
+    Regressão logística com padronização incremental e passos de SGD.
+
+    ``partial_fit`` atualiza média/variância e depois dá um passo por linha,
+    na ordem recebida (ordem temporal).
+    """
+
+    kind = 'online_logistic'
+
+    def __init__(self, header: dict, arrays: dict):
+        self.header = header
+        self.alpha = header['alpha']
+        self.eta0 = header['eta0']
+        self.intercept = header['intercept']
+        self.count = header['count']
+        self.n_updates = header['n_updates']
+        self.hits = header['hits']
+        self.feature_names_in_ = np.array(header['feature_columns'], dtype=object)
+        self.n_features_in_ = len(self.feature_names_in_)
+        self.classes_ = np.array([0, 1])
+        # Cópias graváveis (os .npy do artefato vêm mapeados somente leitura)
+        self.coef = np.array(arrays['coef'], dtype=np.float64)
+        self.mean = np.array(arrays['mean'], dtype=np.float64)
+        self.m2 = np.array(arrays['m2'], dtype=np.float64)
+
+    @classmethod
+    def new(cls, feature_columns, alpha: float = ALPHA, eta0: float = ETA0) -> 'OnlineLogistic':
+        n = len(feature_columns)
+        header = {'kind': cls.kind, 'alpha': alpha, 'eta0': eta0, 'intercept': 0.0, 'count': 0,
+                  'n_updates': 0, 'hits': 0, 'feature_columns': list(feature_columns), 'last_date': None}
+        return cls(header, {'coef': np.zeros(n), 'mean': np.zeros(n), 'm2': np.zeros(n)})
+
+    @property
+    def accuracy(self) -> float:
+        """Acurácia prequencial (previsão feita antes de cada passo)"""
+        return self.hits / self.n_updates if self.n_updates else float('nan')
+
+    def _scale(self, X: np.ndarray) -> np.ndarray:
+        std = np.sqrt(self.m2 / max(self.count, 1))
+        return (X - self.mean) / np.where(std > 0, std, 1.0)
+
+    def _step(self, x: np.ndarray, y: int) -> None:
+        z = float(x @ self.coef) + self.intercept
+        p = 1.0 / (1.0 + np.exp(-z))
+        g = p - y
+        self.coef -= self.eta0 * (g * x + self.alpha * self.coef)
+        self.intercept -= self.eta0 * g
+
+    def fit_initial(self, X: np.ndarray, y: np.ndarray, epochs: int = INITIAL_EPOCHS) -> 'OnlineLogistic':
+        """Estado inicial: estatísticas do bloco inteiro + ``epochs`` passadas em ordem temporal"""
+        X = np.asarray(X, dtype=np.float64)
+        self.count = len(X)
+        self.mean = X.mean(axis=0)
+        self.m2 = ((X - self.mean) ** 2).sum(axis=0)
+        Xs = self._scale(X)
+        for _ in range(epochs):
+            for x, target in zip(Xs, y):
+                self._step(x, int(target))
+        return self
+
+    def partial_fit(self, X: np.ndarray, y: np.ndarray) -> 'OnlineLogistic':
+        """Aprende as linhas de ``X`` uma a uma (prevê, atualiza estatísticas, dá o passo)"""
+        for x, target in zip(np.asarray(X, dtype=np.float64), y):
+            target = int(target)
+            self.hits += int((self.predict_proba(x[None, :])[0, 1] >= 0.5) == target)
+            self.n_updates += 1
+            # Welford
+            self.count += 1
+            delta = x - self.mean
+            self.mean += delta / self.count
+            self.m2 += delta * (x - self.mean)
+            self._step(self._scale(x), target)
+        return self
+
+    def predict_proba(self, X: np.ndarray) -> np.ndarray:
+        z = self._scale(np.asarray(X, dtype=np.float64)) @ self.coef + self.intercept
+        p = 1.0 / (1.0 + np.exp(-z))
+        return np.column_stack([1.0 - p, p])
+
+    def predict(self, X: np.ndarray) -> np.ndarray:
+        return (self.predict_proba(X)[:, 1] >= 0.5).astype(int)
+
+
+# =========================
+# PERSISTÊNCIA
+# =========================
+
+def save_online_model(model: OnlineLogistic, folder=ONLINE_DIR, last_date=None) -> Path:
+    """
+    Grava o estado em ``states/<id>`` (pasta temporária + ``os.rename``) e
+    depois aponta ``CURRENT`` para ele com ``os.replace``.
+    """
+    folder = Path(folder)
+    states = folder / STATES_DIR
+    states.mkdir(parents=True, exist_ok=True)
+    now = datetime.now()
+    header = dict(model.header, intercept=model.intercept, count=model.count,
+                  n_updates=model.n_updates, hits=model.hits, accuracy=model.accuracy,
+                  updated=now.isoformat())
+    if last_date is not None:
+        header['last_date'] = str(pd.Timestamp(last_date).date())
+    state_id = now.strftime('%Y%m%d-%H%M%S-%f')
+    tmp = Path(tempfile.mkdtemp(prefix=f'.{state_id}.', dir=states))
+    try:
+        write_arrays(tmp, header, {'coef': model.coef, 'mean': model.mean, 'm2': model.m2})
+        os.rename(tmp, states / state_id)
+    except OSError:
+        shutil.rmtree(tmp, ignore_errors=True)
+        raise
+
+    fd, pointer = tempfile.mkstemp(prefix=f'.{POINTER_FILE}-', dir=folder)
+    with os.fdopen(fd, 'w') as f:
+        f.write(state_id + '\n')
+    os.replace(pointer, folder / POINTER_FILE)
+    prune_online_states(folder)
+    model.header = header
+    return states / state_id
+
+
+def prune_online_states(folder=ONLINE_DIR, keep: int = KEEP_STATES) -> None:
+    """Remove os estados além dos ``keep`` mais recentes (nunca o ativo)"""
+    current = online_stamp(folder)
+    states = sorted((p for p in (Path(folder) / STATES_DIR).iterdir() if not p.name.startswith('.')),
+                    key=lambda p: p.name, reverse=True)
+    for old in states[keep:]:
+        if old.name != current:
+            shutil.rmtree(old, ignore_errors=True)
+
+
+def online_stamp(folder=ONLINE_DIR):
+    """Id do estado ativo: muda a cada atualização (chave de cache); ``None`` sem modelo online"""
+    try:
+        return (Path(folder) / POINTER_FILE).read_text().strip() or None
+    except FileNotFoundError:
+        return None
+
+
+def load_online_model(folder=ONLINE_DIR, attempts: int = 3) -> OnlineLogistic:
+    """Estado apontado por ``CURRENT``"""
+    for attempt in range(attempts):
+        state_id = online_stamp(folder)
+        if state_id is None:
+            raise FileNotFoundError(f"Sem modelo online em {folder}")
+        try:
+            header, arrays = read_arrays(Path(folder) / STATES_DIR / state_id)
+            return OnlineLogistic(header, arrays)
+        except FileNotFoundError:
+            # Estado removido por prune_online_states depois da leitura do ponteiro: relê o ponteiro
+            if attempt == attempts - 1 or online_stamp(folder) == state_id:
+                raise
+
+
+def load_online_bundle(folder=ONLINE_DIR) -> ModelBundle:
+    """Modelo online validado como ``ModelBundle`` (mesmo contrato do batch)"""
+    model = load_online_model(folder)
+    info = {
+        'model_name': 'SGD Online',
+        'accuracy': model.accuracy,
+        'n_updates': model.n_updates,
+        'last_date': model.header.get('last_date'),
+        'training_date': model.header.get('updated'),
+    }
+    return validate_bundle(model, info, model.header['feature_columns'])
+
+
+# =========================
+# TREINO E ATUALIZAÇÃO
+# =========================
+
+def init_online(design, holdout: Optional[float] = None, folder=ONLINE_DIR) -> OnlineLogistic:
+    """
+    Treino inicial no período de desenvolvimento e passagem prequencial
+    (``partial_fit``) no holdout: a acurácia registrada é comparável à do batch.
+    """
+    from ibov.training import HOLDOUT
+
+    dev = int(len(design.y) * (1 - (HOLDOUT if holdout is None else holdout)))
+    model = OnlineLogistic.new(design.feature_columns)
+    model.fit_initial(design.X[:dev], design.y[:dev])
+    model.partial_fit(design.X[dev:], design.y[dev:])
+    save_online_model(model, folder, design.dates[-1])
+    return model
+
+
+def update_online(design, folder=ONLINE_DIR):
+    """
+    Aprende as linhas rotuladas posteriores ao último pregão aprendido.
+
+    Returns:
+        (modelo, linhas novas)
+    """
+    model = load_online_model(folder)
+    if tuple(model.header['feature_columns']) != tuple(design.feature_columns):
+        raise ValueError("Colunas do modelo online diferem das da matriz de treino")
+    last = model.header.get('last_date')
+    new = np.flatnonzero(design.dates > np.datetime64(last)) if last else np.arange(len(design.y))
+    if len(new):
+        model.partial_fit(design.X[new], design.y[new])
+        save_online_model(model, folder, design.dates[new[-1]])
+    return model, len(new)
+
+
+if __name__ == '__main__':
+    command = sys.argv[1] if len(sys.argv) > 1 else ''
+    if command not in ('init', 'update'):
+        print(__doc__)
+        sys.exit(1)
+    from ibov.training import cached_design
+
+    design, _ = cached_design(feature_columns=read_feature_columns(FEATURE_COLUMNS_PATH))
+    start = time.perf_counter()
+    if command == 'init':
+        model = init_online(design)
+        print(f"✅ Modelo online inicial | acurácia prequencial no holdout {model.accuracy:.3f} "
+              f"({model.n_updates} pregões) | {time.perf_counter() - start:.2f}s")
+    else:
+        model, n_new = update_online(design)
+        print(f"✅ {n_new} pregão(ões) aprendido(s) em {(time.perf_counter() - start) * 1000:.2f} ms | "
+              f"último: {model.header['last_date']} | acurácia prequencial {model.accuracy:.3f}")
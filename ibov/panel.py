@@ -0,0 +1,156 @@
+"""
+Painel multiativo: vários exports do Investing.com em formato longo.
+
+Uma pasta com exports (IBOV, IBrX, índices setoriais, ações) vira um único
+DataFrame ``asset, date, close, open, high, low, volume, usd_close, selic``
+com os ativos empilhados (cada um em ordem de data). As features saem de uma
+só chamada a ``create_features`` em modo agrupado: defasagens, janelas e
+EWM respeitam a fronteira entre ativos, e as linhas de cada ativo são
+idênticas, byte a byte, às do ativo processado sozinho. O custo cresce com
+o número de linhas, sem laço Python por ativo; o modelo pontua o último
+pregão de todos os ativos em uma única chamada.
+
+Uso:
+    python -m ibov.panel [pasta]      # previsão multi-horizonte por ativo
+"""
+
+import re
+import sys
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+from ibov.asof import asof_join
+from ibov.features import FeatureMatrix, create_features, valid_rows
+from ibov.ingest import DATA_DIR, UNIFIED_DTYPES, USD_PATH, default_exog, read_investing_ohlcv
+
+PANEL_PATTERN = '*Dados Históricos*.csv'
+# Exports que entram como macro (join as-of), não como ativo do painel
+MACRO_FILES = (USD_PATH.name,)
+
+
+def asset_name(path) -> str:
+    """``PETR4 Dados Históricos.csv`` → ``PETR4``; ``Dados Históricos - Ibovespa 2005-2025`` → ``Ibovespa``"""
+    name = Path(path).stem.replace('Dados Históricos', '')
+    name = re.sub(r'\s*\d{4}-\d{4}\s*$', '', name)
+    return name.strip(' -_') or Path(path).stem
+
+
+@dataclass(frozen=True)
+class Panel:
+    """Ativos empilhados em formato longo + fronteiras de cada ativo"""
+
+    frame: pd.DataFrame
+    assets: tuple
+    starts: np.ndarray      # primeira linha de cada ativo em ``frame``
+
+    def __len__(self) -> int:
+        return len(self.frame)
+
+    def asset(self, name: str) -> pd.DataFrame:
+        """Linhas de um ativo (view por fatia, sem filtro booleano)"""
+        i = self.assets.index(name)
+        stop = self.starts[i + 1] if i + 1 < len(self.starts) else len(self.frame)
+        return self.frame.iloc[self.starts[i]:stop]
+
+
+def load_panel(folder=DATA_DIR, pattern: str = PANEL_PATTERN, exclude=MACRO_FILES,
+               exog=None, start: Optional[str] = None) -> Panel:
+    """
+    Lê todos os exports de ``folder`` e alinha dólar/Selic no calendário de cada ativo.
+
+    Args:
+        exog: séries macro (``AsofSeries``); por padrão dólar + Selic.
+        start: primeira data mantida (todas as datas por padrão).
+    """
+    paths = sorted(p for p in Path(folder).glob(pattern) if p.name not in exclude)
+    if not paths:
+        raise FileNotFoundError(f"Nenhum export '{pattern}' em {folder}")
+
+    frames, names = [], []
+    for path in paths:
+        df = read_investing_ohlcv(path)
+        if start is not None:
+            df = df[df['date'] >= pd.Timestamp(start)]
+        if len(df):
+            frames.append(df)
+            names.append(asset_name(path))
+    if len(set(names)) != len(names):
+        raise ValueError(f"Ativos com o mesmo nome em {folder}: {names}")
+
+    lengths = np.array([len(df) for df in frames])
+    frame = pd.concat(frames, ignore_index=True)
+    frame.insert(0, 'asset', pd.Categorical.from_codes(np.repeat(np.arange(len(names)), lengths), names))
+
+    # Macro: um join as-of sobre as datas distintas, depois indexação por linha
+    if exog is None:
+        usd_path = Path(folder) / USD_PATH.name
+        exog = default_exog(usd_path if usd_path.exists() else USD_PATH)
+    calendar = np.unique(frame['date'].to_numpy())
+    aligned = asof_join(calendar, exog)
+    rows = np.searchsorted(calendar, frame['date'].to_numpy())
+    for name in aligned.columns.drop('date'):
+        frame[name] = aligned[name].to_numpy()[rows]
+
+    frame = frame.astype({c: t for c, t in UNIFIED_DTYPES.items() if c in frame})
+    starts = np.concatenate([[0], np.cumsum(lengths)[:-1]])
+    return Panel(frame, tuple(names), starts)
+
+
+def panel_features(panel: Panel, feature_columns=None):
+    """
+    Features de todos os ativos em uma passada (mesmas colunas de ``create_features``
+    mais ``asset``).
+
+    Returns:
+        (df_feat, FeatureMatrix | None) com todas as linhas do painel
+    """
+    matrix = None if feature_columns is None else FeatureMatrix(len(panel), feature_columns)
+    df_feat = create_features(panel.frame, matrix, starts=panel.starts)
+    df_feat.insert(0, 'asset', panel.frame['asset'].to_numpy())
+    return df_feat, matrix
+
+
+def latest_valid_rows(panel: Panel, df_feat: pd.DataFrame, matrix: Optional[FeatureMatrix] = None) -> np.ndarray:
+    """Última linha válida (``valid_rows``) de cada ativo (ativos sem nenhuma ficam de fora)"""
+    valid = np.flatnonzero(valid_rows(df_feat, matrix))
+    ids = np.searchsorted(panel.starts, valid, side='right') - 1
+    is_last = np.append(ids[1:] != ids[:-1], True)
+    return valid[is_last]
+
+
+def score_latest(model, panel: Panel, df_feat: pd.DataFrame, matrix: FeatureMatrix) -> pd.DataFrame:
+    """
+    Previsão do último pregão de cada ativo com uma única chamada ao modelo.
+
+    ``model``: ``HorizonModel`` (uma coluna de P(ALTA) por horizonte) ou
+    classificador binário com ``predict_proba``/``classes_``.
+    """
+    rows = latest_valid_rows(panel, df_feat, matrix)
+    proba = model.predict_proba(matrix.values[rows])
+
+    out = pd.DataFrame({
+        'asset': df_feat['asset'].to_numpy()[rows],
+        'date': df_feat['date'].to_numpy()[rows],
+        'close': df_feat['close'].to_numpy()[rows],
+    })
+    horizons = getattr(model, 'horizons', None)
+    if horizons is not None:
+        for j, h in enumerate(horizons):
+            out[f'p_alta_t{h}'] = proba[:, j]
+    else:
+        out['p_alta'] = proba[:, list(model.classes_).index(1)]
+    return out
+
+
+if __name__ == '__main__':
+    from ibov.horizons import load_horizon_model
+
+    model = load_horizon_model()
+    panel = load_panel(sys.argv[1] if len(sys.argv) > 1 else DATA_DIR)
+    df_feat, matrix = panel_features(panel, model.feature_columns)
+    print(f"✅ {len(panel.assets)} ativos, {len(panel)} linhas")
+    print(score_latest(model, panel, df_feat, matrix).to_string(index=False, float_format='%.3f'))
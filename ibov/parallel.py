@@ -0,0 +1,320 @@
+"""
+Execução paralela (pool de processos) das features do painel multiativo.
+
+Os arrays de preço do ``Panel`` vão uma única vez para memória
+compartilhada (``multiprocessing.shared_memory``); cada processo recebe só
+o nome do bloco e o intervalo de linhas do seu shard (ativos inteiros),
+monta as features com ``create_features`` em modo agrupado e escreve o
+resultado direto nas linhas correspondentes de um bloco de saída também
+compartilhado. Nada de DataFrame é serializado em nenhuma direção, e a
+junção é determinística: cada shard tem linhas fixas na saída, então o
+resultado não depende da ordem em que os processos terminam e é idêntico,
+byte a byte, ao de ``panel_features``.
+
+Grades de parâmetros (ex.: janelas de médias móveis) usam o mesmo painel
+compartilhado: ``parallel_grid`` devolve um resultado por conjunto de
+parâmetros, na ordem da grade.
+
+Uma série única não é dividida: a EWM do MACD é sequencial no tempo (para
+isso há o modo em blocos, ``FeatureStream``).
+
+Uso:
+    python -m ibov.parallel bench [pasta] [repeticoes] [processos]   # escalonamento 1..N
+"""
+
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+from multiprocessing.shared_memory import SharedMemory
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+from ibov.features import FEATURE_NAMES, FLAG_COLUMNS, FLAG_DTYPE, FLOAT_DTYPE, FeatureMatrix, create_features
+
+# Colunas de entrada do painel (float32, uma linha por coluna no bloco compartilhado)
+INPUT_COLUMNS = ('close', 'open', 'high', 'low', 'volume', 'usd_close', 'selic')
+OUTPUT_FLOATS = tuple(c for c in FEATURE_NAMES if c != 'date' and c not in FLAG_COLUMNS)
+OUTPUT_FLAGS = tuple(c for c in FEATURE_NAMES if c in FLAG_COLUMNS)
+
+_ALIGN = 64
+
+# Shards por processo: blocos menores equilibram ativos de tamanhos diferentes
+SHARDS_PER_WORKER = 4
+
+
+def default_workers() -> int:
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:  # Windows/macOS
+        return os.cpu_count() or 1
+
+
+# =========================
+# MEMÓRIA COMPARTILHADA
+# =========================
+
+class SharedArrays:
+    """
+    Vários arrays num único bloco de memória compartilhada.
+
+    ``spec`` (nome do bloco + shape/dtype de cada array) é o que vai
+    para os processos; ``attach(spec)`` devolve views sobre o mesmo bloco.
+    """
+
+    def __init__(self, layout: dict, shm: Optional[SharedMemory] = None, owner: bool = False):
+        self.layout = layout
+        offsets, size = {}, 0
+        for name, (shape, dtype) in layout.items():
+            offsets[name] = size
+            nbytes = np.dtype(dtype).itemsize * int(np.prod(shape))
+            size += -(-nbytes // _ALIGN) * _ALIGN   # cada array alinhado em 64 bytes
+        if shm is None:
+            shm = SharedMemory(create=True, size=max(size, 1))
+            owner = True
+        self.shm = shm
+        self.owner = owner
+        self.arrays = {name: np.ndarray(shape, dtype=dtype, buffer=shm.buf, offset=offsets[name])
+                       for name, (shape, dtype) in layout.items()}
+
+    @property
+    def spec(self) -> tuple:
+        return self.shm.name, self.layout
+
+    @classmethod
+    def attach(cls, spec) -> 'SharedArrays':
+        name, layout = spec
+        return cls(layout, SharedMemory(name=name))
+
+    def __getitem__(self, name) -> np.ndarray:
+        return self.arrays[name]
+
+    def close(self) -> None:
+        self.arrays = {}
+        self.shm.close()
+        if self.owner:
+            self.shm.unlink()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def share_panel(panel) -> SharedArrays:
+    """Copia datas, preços e fronteiras dos ativos do painel para memória compartilhada"""
+    n_rows = len(panel)
+    shared = SharedArrays({
+        'date': ((n_rows,), 'int64'),
+        'values': ((len(INPUT_COLUMNS), n_rows), FLOAT_DTYPE),
+        'starts': ((len(panel.starts),), 'int64'),
+    })
+    shared['date'][:] = panel.frame['date'].to_numpy(dtype='datetime64[ns]').view('int64')
+    for i, name in enumerate(INPUT_COLUMNS):
+        shared['values'][i] = panel.frame[name].to_numpy(dtype=FLOAT_DTYPE)
+    shared['starts'][:] = panel.starts
+    return shared
+
+
+def _frame(shared: SharedArrays, lo: int, hi: int) -> pd.DataFrame:
+    """Linhas [lo, hi) do painel compartilhado como DataFrame de entrada de ``create_features``"""
+    cols = {'date': shared['date'][lo:hi].view('datetime64[ns]')}
+    for i, name in enumerate(INPUT_COLUMNS):
+        cols[name] = shared['values'][i, lo:hi]
+    return pd.DataFrame(cols, index=pd.RangeIndex(lo, hi))
+
+
+def shard_bounds(starts: np.ndarray, n_rows: int, n_shards: int) -> np.ndarray:
+    """Cortes [0, ..., n_rows] em fronteiras de ativo, com ~n_rows/n_shards linhas por shard"""
+    edges = np.append(starts, n_rows)
+    cuts = edges[np.searchsorted(starts, np.linspace(0, n_rows, n_shards + 1)[1:-1])]
+    return np.unique(np.concatenate([[0], cuts, [n_rows]]))
+
+
+# =========================
+# WORKERS
+# =========================
+
+def _features_shard(in_spec, out_spec, lo: int, hi: int, feature_columns) -> int:
+    shared = SharedArrays.attach(in_spec)
+    out = SharedArrays.attach(out_spec)
+    try:
+        starts = shared['starts']
+        local = starts[(starts >= lo) & (starts < hi)] - lo
+        matrix = None if feature_columns is None else FeatureMatrix(hi - lo, feature_columns)
+        df_feat = create_features(_frame(shared, lo, hi), matrix, starts=local)
+        for i, name in enumerate(OUTPUT_FLOATS):
+            out['floats'][i, lo:hi] = df_feat[name].to_numpy()
+        for i, name in enumerate(OUTPUT_FLAGS):
+            out['flags'][i, lo:hi] = df_feat[name].to_numpy()
+        if matrix is not None:
+            out['matrix'][lo:hi] = matrix.values
+        return hi - lo
+    finally:
+        shared.close()
+        out.close()
+
+
+def _grid_task(in_spec, func, params: dict):
+    shared = SharedArrays.attach(in_spec)
+    try:
+        return func(_frame(shared, 0, len(shared['date'])), shared['starts'].copy(), **params)
+    finally:
+        shared.close()
+
+
+def _executor(workers: int):
+    # spawn: mesmo comportamento em Linux/Windows e seguro com threads no processo pai
+    return ProcessPoolExecutor(max_workers=workers, mp_context=get_context('spawn'))
+
+
+# =========================
+# API
+# =========================
+
+def parallel_features(panel, feature_columns=None, workers: Optional[int] = None, executor=None):
+    """
+    Mesmo resultado de ``panel_features(panel, feature_columns)``, com os
+    shards (grupos de ativos) distribuídos entre ``workers`` processos.
+
+    ``executor``: pool já aberto (reaproveita processos entre chamadas).
+
+    Returns:
+        (df_feat, FeatureMatrix | None)
+    """
+    workers = workers or default_workers()
+    n_rows = len(panel)
+    bounds = shard_bounds(panel.starts, n_rows, workers * SHARDS_PER_WORKER)
+    feature_columns = None if feature_columns is None else tuple(feature_columns)
+
+    layout = {
+        'floats': ((len(OUTPUT_FLOATS), n_rows), FLOAT_DTYPE),
+        'flags': ((len(OUTPUT_FLAGS), n_rows), FLAG_DTYPE),
+    }
+    if feature_columns is not None:
+        layout['matrix'] = ((n_rows, len(feature_columns)), FLOAT_DTYPE)
+
+    with share_panel(panel) as shared, SharedArrays(layout) as out:
+        tasks = [(shared.spec, out.spec, int(lo), int(hi), feature_columns)
+                 for lo, hi in zip(bounds[:-1], bounds[1:])]
+        if workers == 1 and executor is None:
+            for task in tasks:
+                _features_shard(*task)
+        else:
+            pool = executor or _executor(workers)
+            try:
+                # Cada shard escreve nas próprias linhas: a ordem de término não importa
+                list(pool.map(_features_shard, *zip(*tasks)))
+            finally:
+                if executor is None:
+                    pool.shutdown()
+
+        cols = {'date': panel.frame['date'].to_numpy()}
+        floats = dict(zip(OUTPUT_FLOATS, out['floats'].copy()))
+        flags = dict(zip(OUTPUT_FLAGS, out['flags'].copy()))
+        for name in FEATURE_NAMES[1:]:
+            cols[name] = floats[name] if name in floats else flags[name]
+        df_feat = pd.DataFrame(cols, index=panel.frame.index)
+        df_feat.insert(0, 'asset', panel.frame['asset'].to_numpy())
+
+        matrix = None
+        if feature_columns is not None:
+            matrix = FeatureMatrix(n_rows, feature_columns)
+            matrix.values[:] = out['matrix']
+    return df_feat, matrix
+
+
+def parallel_grid(panel, func, grid, workers: Optional[int] = None, executor=None) -> list:
+    """
+    ``func(frame, starts, **params)`` para cada ``params`` de ``grid``, em paralelo.
+
+    ``func`` precisa ser uma função de módulo (importável pelos processos);
+    ``frame`` é o painel inteiro reconstruído da memória compartilhada.
+    Os resultados voltam na ordem de ``grid``.
+    """
+    workers = workers or default_workers()
+    grid = list(grid)
+    with share_panel(panel) as shared:
+        if workers == 1 and executor is None:
+            return [_grid_task(shared.spec, func, params) for params in grid]
+        pool = executor or _executor(workers)
+        try:
+            return list(pool.map(_grid_task, [shared.spec] * len(grid), [func] * len(grid), grid))
+        finally:
+            if executor is None:
+                pool.shutdown()
+
+
+def ma_cross_accuracy(frame: pd.DataFrame, starts, fast: int, slow: int) -> dict:
+    """
+    Acerto do sinal ``ma{fast} > ma{slow}`` como previsão de alta no pregão
+    seguinte, em todos os ativos (exemplo de função para ``parallel_grid``).
+    """
+    from ibov.features import rolling_mean
+
+    close = frame['close'].to_numpy(dtype='float64')
+    signal = rolling_mean(close, fast, starts) > rolling_mean(close, slow, starts)
+    nxt = np.append(close[1:], np.nan)
+    nxt[np.asarray(starts[1:], dtype=np.int64) - 1] = np.nan   # último pregão de cada ativo
+    valid = ~np.isnan(rolling_mean(close, slow, starts)) & ~np.isnan(nxt)
+    hit = signal[valid] == (nxt[valid] > close[valid])
+    return {'fast': fast, 'slow': slow, 'n': int(valid.sum()), 'acerto': float(hit.mean()) if hit.size else np.nan}
+
+
+# =========================
+# BENCHMARK
+# =========================
+
+def scaling_report(panel, feature_columns=None, max_workers: Optional[int] = None) -> pd.DataFrame:
+    """
+    Tempo e linhas/s de ``parallel_features`` com 1..``max_workers`` processos.
+
+    O pool é aberto antes da medição (custo de spawn fora do tempo) e cada
+    resultado é conferido contra a execução com 1 processo.
+    """
+    max_workers = max_workers or default_workers()
+    reference, _ = parallel_features(panel, feature_columns, workers=1)
+    rows = []
+    for workers in range(1, max_workers + 1):
+        with _executor(workers) as pool:
+            parallel_features(panel, feature_columns, workers, executor=pool)   # aquece os processos
+            start = time.perf_counter()
+            df_feat, _ = parallel_features(panel, feature_columns, workers, executor=pool)
+            elapsed = time.perf_counter() - start
+        rows.append({
+            'processos': workers,
+            'segundos': elapsed,
+            'linhas_por_s': len(panel) / elapsed,
+            'identico': df_feat.equals(reference),
+        })
+    report = pd.DataFrame(rows)
+    report['speedup'] = report['segundos'].iloc[0] / report['segundos']
+    return report
+
+
+if __name__ == '__main__':
+    if not sys.argv[1:] or sys.argv[1] != 'bench':
+        print(__doc__)
+        sys.exit(1)
+    from ibov.ingest import DATA_DIR
+    from ibov.panel import Panel, load_panel
+
+    panel = load_panel(sys.argv[2] if len(sys.argv) > 2 else DATA_DIR)
+    repeat = int(sys.argv[3]) if len(sys.argv) > 3 else 1
+    if repeat > 1:
+        # Painel sintético: os mesmos ativos repetidos para medir escala
+        n = len(panel)
+        frame = pd.concat([panel.frame] * repeat, ignore_index=True)
+        names = tuple(f'{a}#{r}' for r in range(repeat) for a in panel.assets)
+        starts = np.concatenate([panel.starts + r * n for r in range(repeat)])
+        codes = np.repeat(np.arange(len(names)), np.diff(np.append(starts, len(frame))))
+        frame['asset'] = pd.Categorical.from_codes(codes, names)
+        panel = Panel(frame, names, starts)
+
+    max_workers = int(sys.argv[4]) if len(sys.argv) > 4 else None
+    print(f"✅ {len(panel.assets)} ativos, {len(panel)} linhas, {default_workers()} CPUs")
+    print(scaling_report(panel, max_workers=max_workers).to_string(index=False, float_format='%.3f'))
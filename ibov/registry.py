@@ -0,0 +1,231 @@
+"""
+Registro local de versões do modelo com troca atômica em produção.
+
+Estrutura:
+    registry/
+        CURRENT                       # id da versão ativa (uma linha)
+        versions/
+            20260108-000431-3f2a9c1e/ # imutável (arquivos somente leitura)
+                best_model.pkl
+                model_info.json
+                feature_columns.json
+
+Publicar uma versão copia os artefatos para uma pasta temporária, valida o
+bundle e só então renomeia a pasta (``os.rename`` é atômico no mesmo
+sistema de arquivos). Ativar reescreve ``CURRENT`` via ``os.replace``.
+
+Nos servidores, ``HotSwapModel`` observa ``CURRENT`` numa thread de fundo:
+a nova versão é carregada e validada fora do caminho das requisições e
+depois trocada por uma única atribuição de referência. Previsões em
+andamento continuam com o bundle que já tinham em mãos.
+
+Uso:
+    python -m ibov.registry publish best_model.pkl model_info.json feature_columns.json
+    python -m ibov.registry activate <versão>
+    python -m ibov.registry list
+"""
+
+import dataclasses
+import os
+import shutil
+import stat
+import sys
+import tempfile
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Optional
+
+from ibov.artifacts import artifact_dir, file_sha256, has_artifact
+from ibov.model_bundle import (
+    FEATURE_COLUMNS_PATH, MODEL_INFO_PATH, MODEL_PATH, ModelBundle, load_model_bundle,
+)
+
+REGISTRY_DIR = Path('registry')
+POINTER_FILE = 'CURRENT'
+VERSIONS_DIR = 'versions'
+
+ARTIFACTS = (MODEL_PATH, MODEL_INFO_PATH, FEATURE_COLUMNS_PATH)
+
+
+class ModelRegistry:
+    """Diretório de versões imutáveis + ponteiro para a versão ativa"""
+
+    def __init__(self, root=REGISTRY_DIR):
+        self.root = Path(root)
+        self.versions_dir = self.root / VERSIONS_DIR
+        self.pointer = self.root / POINTER_FILE
+
+    def exists(self) -> bool:
+        return self.pointer.exists()
+
+    def versions(self) -> list:
+        if not self.versions_dir.exists():
+            return []
+        return sorted(p.name for p in self.versions_dir.iterdir()
+                      if p.is_dir() and not p.name.startswith('.'))
+
+    def path(self, version: str) -> Path:
+        return self.versions_dir / version
+
+    def current_version(self) -> Optional[str]:
+        try:
+            return self.pointer.read_text().strip() or None
+        except FileNotFoundError:
+            return None
+
+    def load(self, version: Optional[str] = None) -> ModelBundle:
+        """Carrega e valida uma versão (por padrão a ativa)"""
+        version = version or self.current_version()
+        if version is None:
+            raise FileNotFoundError(f"Nenhuma versão ativa em {self.pointer}")
+        folder = self.path(version)
+        bundle = load_model_bundle(folder / MODEL_PATH, folder / MODEL_INFO_PATH,
+                                   folder / FEATURE_COLUMNS_PATH)
+        return dataclasses.replace(bundle, version=version)
+
+    def publish(self, model_path=MODEL_PATH, info_path=MODEL_INFO_PATH,
+                columns_path=FEATURE_COLUMNS_PATH, activate: bool = True) -> str:
+        """
+        Copia os artefatos para uma nova versão imutável.
+
+        O bundle é validado antes de a versão ficar visível; um modelo
+        incompatível com as features nunca chega ao registro.
+        """
+        self.versions_dir.mkdir(parents=True, exist_ok=True)
+        staging = Path(tempfile.mkdtemp(prefix='.staging-', dir=self.versions_dir))
+        try:
+            for src, name in zip((model_path, info_path, columns_path), ARTIFACTS):
+                shutil.copyfile(src, staging / name)
+            if has_artifact(model_path):
+                # Formato rápido (ibov.artifacts) acompanha o .pkl
+                shutil.copytree(artifact_dir(model_path), artifact_dir(staging / MODEL_PATH))
+            load_model_bundle(staging / MODEL_PATH, staging / MODEL_INFO_PATH,
+                              staging / FEATURE_COLUMNS_PATH)
+
+            stamp = datetime.now().strftime('%Y%m%d-%H%M%S')
+            version = f"{stamp}-{file_sha256(staging / MODEL_PATH)[:8]}"
+            read_only = stat.S_IRUSR | stat.S_IRGRP | stat.S_IROTH
+            for path in staging.rglob('*'):
+                if path.is_file():
+                    os.chmod(path, read_only)
+            os.rename(staging, self.path(version))
+        except BaseException:
+            shutil.rmtree(staging, ignore_errors=True)
+            raise
+
+        if activate:
+            self.activate(version)
+        return version
+
+    def activate(self, version: str) -> None:
+        """Aponta ``CURRENT`` para ``version`` (escrita atômica)"""
+        if not self.path(version).is_dir():
+            raise FileNotFoundError(f"Versão inexistente: {version}")
+        self.root.mkdir(parents=True, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(prefix='.CURRENT-', dir=self.root)
+        with os.fdopen(fd, 'w') as f:
+            f.write(version + '\n')
+        os.replace(tmp, self.pointer)
+
+
+class HotSwapModel:
+    """
+    Referência ao bundle ativo, trocada atomicamente quando ``CURRENT`` muda.
+
+    ``get()`` é só uma leitura de atributo; quem pegou o bundle antigo
+    termina a previsão com ele.
+    """
+
+    def __init__(self, registry: ModelRegistry, poll_seconds: float = 30.0,
+                 on_error: Optional[Callable[[Exception], None]] = None):
+        self.registry = registry
+        self.poll_seconds = poll_seconds
+        self.on_error = on_error or (lambda e: print(f"⚠️  Falha ao trocar modelo: {e}"))
+        self._bundle = registry.load()
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def get(self) -> ModelBundle:
+        return self._bundle
+
+    @property
+    def version(self) -> Optional[str]:
+        return self._bundle.version
+
+    def refresh(self) -> bool:
+        """Carrega a versão apontada por ``CURRENT`` se ela mudou"""
+        with self._lock:
+            target = self.registry.current_version()
+            if target is None or target == self._bundle.version:
+                return False
+            try:
+                bundle = self.registry.load(target)
+            except Exception as e:
+                self.on_error(e)
+                return False
+            self._bundle = bundle
+            print(f"🔄 Modelo trocado para a versão {target}")
+            return True
+
+    def start(self) -> 'HotSwapModel':
+        """Inicia a thread de fundo que observa o ponteiro"""
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._watch, name='model-hot-swap', daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._stop.set()
+
+    def _watch(self) -> None:
+        while not self._stop.wait(self.poll_seconds):
+            self.refresh()
+
+
+class StaticModel:
+    """Mesma interface de ``HotSwapModel`` para os artefatos soltos na raiz"""
+
+    def __init__(self, bundle: ModelBundle):
+        self._bundle = bundle
+
+    def get(self) -> ModelBundle:
+        return self._bundle
+
+    @property
+    def version(self) -> Optional[str]:
+        return self._bundle.version
+
+
+def open_model(registry_dir=REGISTRY_DIR, poll_seconds: float = 30.0):
+    """
+    Modelo servido pelo app: registro com hot-swap quando existe,
+    senão os arquivos ``best_model.pkl``/``*.json`` da raiz.
+    """
+    registry = ModelRegistry(registry_dir)
+    if registry.exists():
+        return HotSwapModel(registry, poll_seconds).start()
+    return StaticModel(load_model_bundle())
+
+
+def main(argv) -> int:
+    registry = ModelRegistry()
+    if argv[:1] == ['publish'] and len(argv) in (1, 4):
+        version = registry.publish(*argv[1:4])
+        print(f"✅ Versão publicada e ativada: {version}")
+    elif argv[:1] == ['activate'] and len(argv) == 2:
+        registry.activate(argv[1])
+        print(f"✅ Versão ativa: {argv[1]}")
+    elif argv[:1] == ['list']:
+        current = registry.current_version()
+        for v in registry.versions():
+            print(f"{'*' if v == current else ' '} {v}")
+    else:
+        print(__doc__)
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,87 @@
+"""
+Agregação OHLC por resolução para os gráficos de períodos longos.
+
+Com o histórico inteiro selecionado, um gráfico diário manda ~5.000
+pontos por série para o navegador. ``build_rollups`` calcula uma vez
+(por versão dos dados) as séries diária, semanal e mensal; ``select``
+escolhe a resolução mais fina que cabe em ``max_points`` para o intervalo
+pedido e devolve só a fatia visível (busca binária nas datas, sem filtro
+booleano sobre o DataFrame inteiro).
+
+Sem ``open``/``high``/``low`` na origem, o OHLC do período é montado a
+partir do fechamento (primeiro, máximo, mínimo e último ``close``).
+"""
+
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+# (regra do pandas, rótulo exibido) da mais fina para a mais grossa
+RESOLUTIONS = (
+    ('D', 'Diário'),
+    ('W-FRI', 'Semanal'),
+    ('ME', 'Mensal'),
+)
+MAX_POINTS = 500
+
+OHLC_COLUMNS = ('open', 'high', 'low', 'close')
+
+
+def ohlc_rollup(df: pd.DataFrame, rule: str, extra=()) -> pd.DataFrame:
+    """
+    OHLC(V) de ``df`` (colunas ``date``, ``close`` e opcionais ``open``,
+    ``high``, ``low``, ``volume``) agregado pela regra ``rule``.
+
+    Cada linha é datada pelo último pregão do período; as colunas de
+    ``extra`` (ex.: médias móveis) ficam com o último valor do período.
+    """
+    cols = {'date': df['date'].to_numpy()}
+    for name in OHLC_COLUMNS:
+        cols[name] = (df[name] if name in df else df['close']).to_numpy()
+    if 'volume' in df:
+        cols['volume'] = df['volume'].to_numpy()
+    for name in extra:
+        cols[name] = df[name].to_numpy()
+    base = pd.DataFrame(cols)
+    if rule == 'D':
+        return base
+
+    agg = {'date': 'last', 'open': 'first', 'high': 'max', 'low': 'min', 'close': 'last'}
+    if 'volume' in base:
+        agg['volume'] = 'sum'
+    agg.update({name: 'last' for name in extra})
+    out = base.groupby(pd.Grouper(key='date', freq=rule)).agg(agg)
+    # Períodos sem pregão (feriados longos) saem vazios
+    return out.dropna(subset=['close']).reset_index(drop=True)
+
+
+@dataclass(frozen=True)
+class Rollups:
+    """Séries pré-agregadas por resolução + datas para busca binária"""
+
+    frames: dict
+    dates: dict
+
+    def select(self, start, end, max_points: int = MAX_POINTS):
+        """
+        Resolução mais fina com no máximo ``max_points`` pontos em [start, end].
+
+        Returns:
+            (rótulo da resolução, DataFrame fatiado)
+        """
+        start = np.datetime64(pd.Timestamp(start), 'ns')
+        end = np.datetime64(pd.Timestamp(end), 'ns')
+        for rule, label in RESOLUTIONS:
+            dates = self.dates[rule]
+            lo = np.searchsorted(dates, start, side='left')
+            hi = np.searchsorted(dates, end, side='right')
+            if hi - lo <= max_points or rule == RESOLUTIONS[-1][0]:
+                return label, self.frames[rule].iloc[lo:hi]
+
+
+def build_rollups(df: pd.DataFrame, extra=()) -> Rollups:
+    """Pré-calcula as resoluções de ``RESOLUTIONS`` (``df`` em ordem de data)"""
+    frames = {rule: ohlc_rollup(df, rule, extra) for rule, _ in RESOLUTIONS}
+    dates = {rule: frame['date'].to_numpy(dtype='datetime64[ns]') for rule, frame in frames.items()}
+    return Rollups(frames, dates)
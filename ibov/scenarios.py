@@ -0,0 +1,109 @@
+"""
+Cenários de preço do Ibovespa por Monte Carlo a partir do ARIMA(1,0,0).
+
+O log-retorno segue ``r_t = c + phi * (r_{t-1} - c) + e_t``, com choques
+gaussianos de variância ``sigma2`` ou reamostrados dos resíduos do ajuste
+(bootstrap). Os caminhos são gerados em blocos de ``chunk_size`` linhas:
+cada bloco é uma operação NumPy (um passo por dia sobre todos os caminhos
+do bloco), e só a matriz final de log-preços em float32 fica em memória
+(100k × 60 ≈ 24 MB), de onde saem os quantis do fan chart.
+"""
+
+from dataclasses import dataclass
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+from ibov.artifacts import ArimaParams
+from ibov.trading_calendar import b3_calendar
+
+FAN_QUANTILES = (0.05, 0.25, 0.5, 0.75, 0.95)
+
+
+@dataclass(frozen=True)
+class FanChart:
+    """Quantis dos preços simulados para cada dia à frente"""
+
+    quantiles: tuple
+    values: np.ndarray      # (len(quantiles) × horizonte), em pontos do índice
+    mean: np.ndarray        # média dos caminhos por dia
+    prob_up: np.ndarray     # fração dos caminhos acima do último fechamento
+    last_price: float
+    n_paths: int
+
+    @property
+    def horizon(self) -> int:
+        return self.values.shape[1]
+
+    def to_frame(self, start_date) -> pd.DataFrame:
+        """Uma linha por pregão da B3 após ``start_date``, colunas ``q05``, ``q50``, ..."""
+        dates = b3_calendar().sessions_after(start_date, self.horizon)
+        data = {f'q{round(q * 100):02d}': v for q, v in zip(self.quantiles, self.values)}
+        data['mean'] = self.mean
+        data['prob_up'] = self.prob_up
+        return pd.DataFrame(data, index=pd.Index(dates, name='date'))
+
+
+def _shocks(rng, shape, sigma: float, resid: Optional[np.ndarray] = None) -> np.ndarray:
+    if resid is None:
+        return rng.standard_normal(shape, dtype=np.float32) * np.float32(sigma)
+    return resid[rng.integers(0, len(resid), size=shape)]
+
+
+def _simulate(params: ArimaParams, last_price: float, last_return: float, horizon: int,
+              n_paths: int, bootstrap: bool, seed, chunk_size: int) -> np.ndarray:
+    """
+    Log-preços simulados em layout dias × caminhos (float32 C-contíguo).
+
+    ``last_return`` é o último log-retorno observado (condição inicial do AR).
+    Com ``bootstrap=True`` os choques vêm dos resíduos do ajuste (centrados),
+    preservando caudas gordas que o choque gaussiano não captura.
+    """
+    rng = np.random.default_rng(seed)
+    c, phi = np.float32(params.const), np.float32(params.phi)
+    resid = None
+    if bootstrap:
+        if params.resid is None or len(params.resid) < 2:
+            raise ValueError("Artefato ARIMA sem resíduos para bootstrap")
+        # O primeiro resíduo vem da inicialização do filtro, não de um choque
+        resid = np.asarray(params.resid[1:], dtype=np.float32)
+        # Pregões sem dado (NaN na série do calendário) não têm resíduo
+        resid = resid[np.isfinite(resid)]
+        resid = resid - resid.mean()
+
+    # Cada passo do AR e cada quantil percorrem memória contígua
+    out = np.empty((horizon, n_paths), dtype=np.float32)
+    log_p0 = np.float32(np.log(last_price))
+    for start in range(0, n_paths, chunk_size):
+        block = out[:, start:start + chunk_size]
+        shocks = _shocks(rng, (horizon, block.shape[1]), np.sqrt(params.sigma2), resid)
+        r = np.full(block.shape[1], last_return, dtype=np.float32)
+        for t in range(horizon):
+            r = c + phi * (r - c) + shocks[t]
+            shocks[t] = r
+        np.cumsum(shocks, axis=0, out=block)
+        block += log_p0
+    return out
+
+
+def simulate_log_prices(params: ArimaParams, last_price: float, last_return: float,
+                        horizon: int = 60, n_paths: int = 100_000, bootstrap: bool = False,
+                        seed=None, chunk_size: int = 20_000) -> np.ndarray:
+    """Log-preços simulados (caminhos × dias, view sem cópia)"""
+    return _simulate(params, last_price, last_return, horizon, n_paths,
+                     bootstrap, seed, chunk_size).T
+
+
+def fan_chart(params: ArimaParams, last_price: float, last_return: float,
+              horizon: int = 60, n_paths: int = 100_000, bootstrap: bool = False,
+              quantiles=FAN_QUANTILES, seed=None, chunk_size: int = 20_000) -> FanChart:
+    """Simula ``n_paths`` caminhos e resume em quantis de preço por dia"""
+    log_prices = _simulate(params, last_price, last_return, horizon, n_paths,
+                           bootstrap, seed, chunk_size)
+    # Quantis no log-preço e depois exp (monótona): evita exponenciar a matriz
+    values = np.exp(np.quantile(log_prices, quantiles, axis=1))
+    prob_up = (log_prices > np.log(last_price)).mean(axis=1)
+    mean = sum(np.exp(log_prices[:, i:i + chunk_size], dtype=np.float64).sum(axis=1)
+               for i in range(0, n_paths, chunk_size)) / n_paths
+    return FanChart(tuple(quantiles), values, mean, prob_up, float(last_price), n_paths)
@@ -0,0 +1,190 @@
+"""
+Tendência + sazonalidade + regressores com atualização recursiva (Kalman).
+
+Substitui o walk-forward do notebook, que refazia ``Prophet()`` com
+``add_regressor`` a cada dia. O modelo tem a mesma forma aditiva do
+Prophet:
+
+    y(t+1) = a + b·τ + sazonalidade anual/semanal (Fourier) + Σ β_k·x_k(t) + ε
+
+mas os coeficientes são o estado de um filtro de Kalman com passeio
+aleatório (``Q = q·I``): cada pregão é uma atualização O(d²), com d fixo
+(~33 parâmetros), sem refazer o ajuste sobre o histórico. O passeio
+aleatório faz o papel dos changepoints do Prophet (a tendência e os betas
+se adaptam aos poucos).
+
+No walk-forward a previsão de cada dia é feita com o estado *antes* de
+ver o alvo, então a série inteira é avaliada numa única passada. Os
+regressores são os do notebook (dólar, MA20, fechamento anterior, RSI,
+sinal do MACD), todos conhecidos no pregão t para prever o fechamento de
+t+1. A padronização usa só o período de aquecimento.
+
+Uso:
+    python -m ibov.statespace [dias]   # walk-forward nos últimos ``dias`` pregões (padrão 30)
+"""
+
+import sys
+import time
+from dataclasses import dataclass
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+# Regressores do notebook (nomes de create_features; ``lag_1`` = fechamento do próprio dia)
+REGRESSORS = ('usd_close', 'ma20', 'lag_1', 'rsi', 'signal')
+YEARLY_ORDER = 10       # ordens de Fourier padrão do Prophet
+WEEKLY_ORDER = 3
+WARMUP = 250            # pregões para padronização e estado inicial (sem avaliação)
+PROCESS_NOISE = 1e-6    # q: variância do passeio aleatório dos coeficientes (escala padronizada)
+
+
+def fourier_terms(dates: np.ndarray, period_days: float, order: int) -> np.ndarray:
+    """sen/cos de ordem 1..``order`` com período ``period_days`` (linhas × 2·order)"""
+    days = dates.astype('datetime64[D]').astype(np.float64)
+    angles = 2 * np.pi * days[:, None] * np.arange(1, order + 1) / period_days
+    return np.hstack([np.sin(angles), np.cos(angles)])
+
+
+@dataclass(frozen=True)
+class TrendDesign:
+    """Linhas do modelo: regressores em t, alvo = fechamento em t+1"""
+
+    dates: np.ndarray       # pregão t (a previsão é para o pregão seguinte)
+    close: np.ndarray       # fechamento em t
+    target: np.ndarray      # fechamento em t+1 (NaN na última linha)
+    H: np.ndarray           # linhas × parâmetros
+    columns: tuple
+    y_scale: float
+
+
+def trend_design(df_feat: pd.DataFrame, regressors=REGRESSORS, warmup: int = WARMUP,
+                 yearly_order: int = YEARLY_ORDER, weekly_order: int = WEEKLY_ORDER) -> TrendDesign:
+    """Monta a matriz do modelo; médias/desvios e escala de y saem das ``warmup`` primeiras linhas"""
+    frame = df_feat.assign(lag_1=df_feat['close'])
+    frame = frame.dropna(subset=['close', *regressors]).reset_index(drop=True)
+    dates = frame['date'].to_numpy()
+    close = frame['close'].to_numpy(dtype=np.float64)
+    target = np.append(close[1:], np.nan)
+
+    X = frame[list(regressors)].to_numpy(dtype=np.float64)
+    mean, std = X[:warmup].mean(axis=0), X[:warmup].std(axis=0)
+    X = (X - mean) / np.where(std > 0, std, 1.0)
+    years = (dates - dates[0]) / np.timedelta64(365, 'D')
+
+    H = np.hstack([
+        np.ones((len(frame), 1)),
+        years[:, None].astype(np.float64),
+        fourier_terms(dates, 365.25, yearly_order),
+        fourier_terms(dates, 7.0, weekly_order),
+        X,
+    ])
+    columns = (('intercept', 'tendencia')
+               + tuple(f'anual_{k}' for k in range(2 * yearly_order))
+               + tuple(f'semanal_{k}' for k in range(2 * weekly_order))
+               + tuple(regressors))
+    return TrendDesign(dates, close, target, H, columns, float(np.abs(close[:warmup]).max()))
+
+
+class KalmanRegression:
+    """
+    Regressão com coeficientes em passeio aleatório.
+
+    ``update`` é O(d²) por observação; ``predict`` é um produto interno.
+    Com ``q = 0`` e prior difuso equivale a mínimos quadrados recursivos.
+    """
+
+    def __init__(self, n_params: int, q: float = PROCESS_NOISE, r: float = 1.0, prior: float = 1e4):
+        self.theta = np.zeros(n_params)
+        self.P = np.eye(n_params) * prior
+        self.q = q
+        self.r = r
+
+    def predict(self, h: np.ndarray) -> float:
+        return float(h @ self.theta)
+
+    def update(self, h: np.ndarray, y: float) -> None:
+        P = self.P
+        P[np.diag_indices_from(P)] += self.q
+        Ph = P @ h
+        gain = Ph / (h @ Ph + self.r)
+        self.theta += gain * (y - h @ self.theta)
+        P -= np.outer(gain, Ph)
+        self.P = (P + P.T) * 0.5     # mantém a simetria numérica
+
+
+@dataclass(frozen=True)
+class WalkForward:
+    """Previsões um passo à frente de cada pregão + previsão do próximo"""
+
+    frame: pd.DataFrame     # date, close, target, yhat (NaN no aquecimento)
+    next_forecast: float    # fechamento previsto para o pregão seguinte ao último
+    model: KalmanRegression
+    design: TrendDesign
+    seconds: float
+
+
+def walk_forward(df_feat: pd.DataFrame, regressors=REGRESSORS, warmup: int = WARMUP,
+                 q: float = PROCESS_NOISE) -> WalkForward:
+    """
+    Uma passada pelo histórico: prevê o fechamento de t+1 com o estado até t,
+    depois atualiza com o valor observado.
+    """
+    start = time.perf_counter()
+    design = trend_design(df_feat, regressors, warmup)
+    H, y = design.H, design.target / design.y_scale
+    model = KalmanRegression(H.shape[1], q=q)
+
+    n = len(y)
+    yhat = np.full(n, np.nan)
+    for i in range(n - 1):
+        if i >= warmup:
+            yhat[i] = model.predict(H[i])
+        model.update(H[i], y[i])
+    next_forecast = model.predict(H[-1]) * design.y_scale
+
+    frame = pd.DataFrame({
+        'date': design.dates,
+        'close': design.close,
+        'target': design.target,
+        'yhat': yhat * design.y_scale,
+    })
+    return WalkForward(frame, next_forecast, model, design, time.perf_counter() - start)
+
+
+def direction_metrics(frame: pd.DataFrame, last: Optional[int] = None) -> dict:
+    """Acerto da direção prevista (``yhat > close``) como no notebook, opcionalmente nos últimos ``last`` dias"""
+    from ibov.training import classification_scores
+
+    rows = frame.dropna(subset=['yhat', 'target'])
+    if last is not None:
+        rows = rows.tail(last)
+    true_up = (rows['target'] > rows['close']).to_numpy().astype(int)
+    proba = (rows['yhat'] > rows['close']).to_numpy().astype(float)
+    scores = classification_scores(true_up, proba)
+    scores.pop('roc_auc')      # previsão binária: AUC não informa nada aqui
+    scores['mae'] = float((rows['yhat'] - rows['target']).abs().mean())
+    scores['n'] = len(rows)
+    return scores
+
+
+if __name__ == '__main__':
+    from ibov.features import create_features
+    from ibov.ingest import UNIFIED_PATH, load_unified_data
+
+    days = int(sys.argv[1]) if len(sys.argv) > 1 else 30
+    result = walk_forward(create_features(load_unified_data(UNIFIED_PATH)))
+    n_steps = int(result.frame['yhat'].notna().sum())
+    print(f"✅ Walk-forward: {n_steps} pregões em {result.seconds * 1000:.1f} ms "
+          f"({result.seconds / max(n_steps, 1) * 1e6:.0f} µs por pregão)")
+    for label, last in ((f'últimos {days}', days), ('todo o período', None)):
+        m = direction_metrics(result.frame, last)
+        print(f"   {label:>15}: acurácia {m['accuracy']:.2%} | precisão {m['precision']:.2%} | "
+              f"recall {m['recall']:.2%} | F1 {m['f1']:.2%} | MAE {m['mae']:,.0f} pts (n={m['n']})")
+    from ibov.trading_calendar import b3_calendar
+
+    last_close = result.frame['close'].iloc[-1]
+    target_date = b3_calendar().next_trading_day(result.frame['date'].iloc[-1])
+    direction = 'ALTA 📈' if result.next_forecast > last_close else 'BAIXA 📉'
+    print(f"🎯 Pregão de {target_date:%d/%m/%Y}: {result.next_forecast:,.2f} "
+          f"(último {last_close:,.2f}) → {direction}")
@@ -0,0 +1,206 @@
+"""
+Calendário de pregões da B3.
+
+O notebook usa ``asfreq("B").ffill()``: todo dia de semana vira pregão, os
+feriados entram como linhas inventadas (cópias do pregão anterior, que o
+ARIMA lê como observações) e "o próximo dia útil" pode cair num feriado. Aqui os dias sem pregão vêm de uma
+tabela local (``feriados_b3.csv``) e as buscas usam ``np.is_busday`` /
+``np.busday_offset`` com um ``np.busdaycalendar``: vetorizadas sobre arrays
+de datas, sem laço em Python.
+
+A tabela é gerada pelas regras da B3: feriados nacionais, Carnaval,
+Sexta-feira Santa, Corpus Christi, véspera de Natal e último dia útil do
+ano; até 2021, também os feriados de São Paulo (25/01, 09/07 e 20/11, com
+os dois últimos antecipados em 2020); 20/11 nacional a partir de 2024.
+Conferida contra os pregões de 2005 a 2025 em ``data/``: a única
+divergência é 20/02/2007 (terça de Carnaval), uma cópia de 16/02 no export
+do Investing.com, que ``align`` descarta.
+
+Uso:
+    python -m ibov.trading_calendar [aaaa-mm-dd]      # próximos pregões após a data (padrão: último da base)
+    python -m ibov.trading_calendar gerar 2005 2030   # regrava a tabela de feriados
+"""
+
+import sys
+from datetime import date, timedelta
+from functools import lru_cache
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+HOLIDAYS_PATH = Path(__file__).with_name('feriados_b3.csv')
+WEEKMASK = '1111100'     # segunda a sexta
+
+FIXED_HOLIDAYS = (
+    (1, 1, 'Confraternização Universal'),
+    (4, 21, 'Tiradentes'),
+    (5, 1, 'Dia do Trabalho'),
+    (9, 7, 'Independência'),
+    (10, 12, 'Nossa Senhora Aparecida'),
+    (11, 2, 'Finados'),
+    (11, 15, 'Proclamação da República'),
+    (12, 24, 'Véspera de Natal'),
+    (12, 25, 'Natal'),
+)
+# Dias sem pregão fora das regras
+SPECIAL_CLOSURES = (
+    (date(2014, 6, 12), 'Abertura da Copa do Mundo em São Paulo'),
+)
+
+
+def easter(year: int) -> date:
+    """Domingo de Páscoa (algoritmo de Meeus/Jones/Butcher, calendário gregoriano)"""
+    a, b, c = year % 19, year // 100, year % 100
+    d, e = b // 4, b % 4
+    g = (8 * b + 13) // 25
+    h = (19 * a + b - d - g + 15) % 30
+    i, k = c // 4, c % 4
+    l = (32 + 2 * e + 2 * i - h - k) % 7
+    m = (a + 11 * h + 22 * l) // 451
+    month, day = divmod(h + l - 7 * m + 114, 31)
+    return date(year, month, day + 1)
+
+
+def b3_holidays(year: int) -> list:
+    """Dias sem pregão em ``year`` pelas regras da B3: ``[(data, nome), ...]``"""
+    days = [(date(year, month, day), name) for month, day, name in FIXED_HOLIDAYS]
+    sunday = easter(year)
+    days += [
+        (sunday - timedelta(days=48), 'Carnaval'),
+        (sunday - timedelta(days=47), 'Carnaval'),
+        (sunday - timedelta(days=2), 'Sexta-feira Santa'),
+        (sunday + timedelta(days=60), 'Corpus Christi'),
+    ]
+    last = date(year, 12, 31)
+    while last.weekday() >= 5:
+        last -= timedelta(days=1)
+    days.append((last, 'Último dia útil do ano'))
+    # Feriados de São Paulo: a B3 passou a abrir neles em 2022 (em 2020 foram antecipados)
+    if year <= 2021:
+        days.append((date(year, 1, 25), 'Aniversário de São Paulo'))
+        if year != 2020:
+            days.append((date(year, 7, 9), 'Revolução Constitucionalista'))
+    if year >= 2024 or (year <= 2021 and year != 2020):
+        days.append((date(year, 11, 20), 'Consciência Negra'))
+    days += [(day, name) for day, name in SPECIAL_CLOSURES if day.year == year]
+    # Uma linha por data (ex.: Tiradentes numa Sexta-feira Santa)
+    return sorted(dict(reversed(days)).items())
+
+
+def write_holidays(first_year: int, last_year: int, path=HOLIDAYS_PATH) -> pd.DataFrame:
+    """Regrava a tabela local com os dias sem pregão de ``first_year`` a ``last_year``"""
+    rows = [row for year in range(first_year, last_year + 1) for row in b3_holidays(year)]
+    table = pd.DataFrame(rows, columns=['date', 'name'])
+    table.to_csv(path, index=False)
+    return table
+
+
+class TradingCalendar:
+    """
+    Pregões = dias de semana fora da tabela de feriados.
+
+    Os métodos aceitam uma data ou um array/Series/DatetimeIndex de datas:
+    para uma data devolvem ``pd.Timestamp``/``bool``, para arrays um
+    ``DatetimeIndex``/array do mesmo tamanho.
+    """
+
+    def __init__(self, holidays, names=None):
+        self.holidays = np.unique(np.asarray(holidays, dtype='datetime64[D]'))
+        self.names = dict(zip(np.asarray(holidays, dtype='datetime64[D]'), names)) if names is not None else {}
+        self._busdays = np.busdaycalendar(weekmask=WEEKMASK, holidays=self.holidays)
+        # Frequência do pandas/statsmodels com um passo por pregão
+        self.freq = pd.offsets.CustomBusinessDay(weekmask=WEEKMASK, holidays=list(self.holidays))
+
+    @classmethod
+    def from_csv(cls, path=HOLIDAYS_PATH) -> 'TradingCalendar':
+        table = pd.read_csv(path, parse_dates=['date'])
+        return cls(table['date'].to_numpy(), table['name'].tolist())
+
+    @staticmethod
+    def _days(dates):
+        scalar = np.ndim(dates) == 0
+        days = np.asarray(pd.DatetimeIndex(np.atleast_1d(dates)).normalize(), dtype='datetime64[D]')
+        return days, scalar
+
+    @staticmethod
+    def _out(days: np.ndarray, scalar: bool):
+        index = pd.DatetimeIndex(days.astype('datetime64[ns]'))
+        return index[0] if scalar else index
+
+    def is_trading_day(self, dates):
+        days, scalar = self._days(dates)
+        result = np.is_busday(days, busdaycal=self._busdays)
+        return bool(result[0]) if scalar else result
+
+    def next_trading_day(self, dates, n: int = 1):
+        """``n``-ésimo pregão estritamente depois de cada data (``n`` pode ser array)"""
+        days, scalar = self._days(dates)
+        # Dia sem pregão recua para o pregão anterior; daí ``n`` pregões à frente
+        return self._out(np.busday_offset(days, n, roll='backward', busdaycal=self._busdays), scalar)
+
+    def previous_trading_day(self, dates, n: int = 1):
+        """``n``-ésimo pregão estritamente antes de cada data"""
+        days, scalar = self._days(dates)
+        return self._out(np.busday_offset(days, -n, roll='forward', busdaycal=self._busdays), scalar)
+
+    def sessions(self, start, end) -> pd.DatetimeIndex:
+        """Pregões de ``start`` a ``end`` (inclusive)"""
+        days = np.arange(np.datetime64(pd.Timestamp(start).date()),
+                         np.datetime64(pd.Timestamp(end).date()) + 1)
+        return pd.DatetimeIndex(days[np.is_busday(days, busdaycal=self._busdays)].astype('datetime64[ns]'))
+
+    def sessions_after(self, start, count: int) -> pd.DatetimeIndex:
+        """Os ``count`` pregões seguintes a ``start`` (datas de uma previsão de ``count`` passos)"""
+        index = self.next_trading_day(np.full(count, np.datetime64(pd.Timestamp(start).date())),
+                                      np.arange(1, count + 1))
+        return pd.DatetimeIndex(index, freq=self.freq) if count else index
+
+    def align(self, frame: pd.DataFrame, date_column: str = 'date') -> pd.DataFrame:
+        """Descarta as linhas em dias sem pregão (cópias de feriados nos exports)"""
+        keep = self.is_trading_day(frame[date_column])
+        return frame if keep.all() else frame[keep].reset_index(drop=True)
+
+    def conform(self, series: pd.Series) -> pd.Series:
+        """
+        Série indexada por data no índice de pregões (com ``freq``), no lugar
+        de ``asfreq("B").ffill()``: feriados não viram linhas e um pregão sem
+        dado fica NaN (o ARIMA do statsmodels trata como observação ausente).
+        """
+        series = series[self.is_trading_day(series.index)]
+        # ``freq`` explícita (o pandas confere o índice uma vez, ~70 ms em 20 anos)
+        index = pd.DatetimeIndex(self.sessions(series.index[0], series.index[-1]), freq=self.freq)
+        return series.reindex(index)
+
+
+@lru_cache(maxsize=1)
+def b3_calendar() -> TradingCalendar:
+    """Calendário da tabela local (carregado uma vez por processo)"""
+    return TradingCalendar.from_csv(HOLIDAYS_PATH)
+
+
+if __name__ == '__main__':
+    if len(sys.argv) == 4 and sys.argv[1] == 'gerar':
+        table = write_holidays(int(sys.argv[2]), int(sys.argv[3]))
+        print(f"✅ {HOLIDAYS_PATH}: {len(table)} feriados ({sys.argv[2]} a {sys.argv[3]})")
+        sys.exit(0)
+    if len(sys.argv) > 2:
+        print(__doc__)
+        sys.exit(1)
+
+    calendar = b3_calendar()
+    if len(sys.argv) == 2:
+        start = pd.Timestamp(sys.argv[1])
+    else:
+        from ibov.ingest import UNIFIED_PATH, load_unified_data
+
+        start = load_unified_data(UNIFIED_PATH)['date'].iloc[-1]
+    horizons = np.array([1, 5, 10])
+    days = calendar.next_trading_day(np.full(len(horizons), np.datetime64(start.date())), horizons)
+    print(f"📅 {start:%d/%m/%Y} ({'pregão' if calendar.is_trading_day(start) else 'sem pregão'})")
+    for h, day in zip(horizons, days):
+        print(f"   t+{h:<2} → {day:%d/%m/%Y}")
+    skipped = [(day, name) for day, name in calendar.names.items()
+               if start < pd.Timestamp(day) < days[-1] and np.is_busday(day)]
+    for day, name in skipped:
+        print(f"   sem pregão em {pd.Timestamp(day):%d/%m/%Y}: {name}")
@@ -0,0 +1,457 @@
+"""
+Seleção do modelo principal (``best_model.pkl``) com validação temporal.
+
+Reproduz a comparação registrada em ``model_info.json`` (Regressão
+Logística, Random Forest, Gradient Boosting, SVM), agora com busca de
+hiperparâmetros e validação cruzada em janela expansiva:
+
+    |---- treino ----|p|- teste 1 -|
+    |------- treino -------|p|- teste 2 -|
+    ...                                      |-- holdout (20%) --|
+
+``p`` é o expurgo: linhas de treino cujo alvo (fechamento de t+h) cai
+dentro do bloco de teste são descartadas. A matriz de features é calculada
+uma única vez (mesmo pipeline do dashboard, ``compute_features``) e vai
+para memória compartilhada; cada tentativa (modelo × parâmetros × fold)
+roda num processo do pool e recebe só os cortes do fold. O vencedor é o de
+melhor média na validação cruzada; as métricas de ``model_info.json`` são
+as do holdout, do mesmo modelo que é gravado.
+
+A ``DesignMatrix`` (X, y e cortes dos folds) fica em cache em
+``.cache/design/<versão dos dados>-<hash da especificação>/`` como ``.npy``;
+as execuções seguintes (e os processos do pool) abrem os arrays com
+``mmap`` em vez de refazer as features. A especificação inclui as colunas,
+o horizonte, os folds e o hash de ``ibov/features.py``: mudar qualquer um
+deles gera outra entrada.
+
+Os três arquivos são escritos numa pasta temporária e movidos com
+``os.replace`` (cada arquivo é trocado atomicamente). Para trocar os três
+de uma vez em produção, use ``--publish`` (``ibov.registry``).
+
+Uso:
+    python -m ibov.training search [processos] [--publish]
+"""
+
+import hashlib
+import itertools
+import json
+import os
+import pickle
+import shutil
+import sys
+import tempfile
+import time
+from contextlib import nullcontext
+from dataclasses import dataclass
+from datetime import datetime
+from pathlib import Path
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+from ibov.artifacts import HEADER_FILE, artifact_dir, export_tree_ensemble, file_sha256, replace_dir
+from ibov.features import FLOAT_DTYPE, compute_features, read_feature_columns
+from ibov.horizons import direction_targets, horizon_name
+from ibov.ingest import UNIFIED_PATH, data_version, load_unified_data
+from ibov.model_bundle import FEATURE_COLUMNS_PATH, MODEL_INFO_PATH, MODEL_PATH
+from ibov.parallel import SharedArrays, _executor, default_workers
+
+HOLDOUT = 0.2
+N_SPLITS = 5
+SCORING = 'roc_auc'
+
+DESIGN_CACHE_DIR = Path('.cache') / 'design'
+KEEP_DESIGNS = 5
+# Código de que X/y dependem: leitura da base, limpeza + features, alvo e filtro de linhas
+DESIGN_SOURCES = tuple(Path(__file__).with_name(name) for name in
+                       ('ingest.py', 'features.py', 'horizons.py', 'training.py'))
+
+# Grades de hiperparâmetros por família (nomes como em model_info.json)
+CANDIDATES = {
+    'Logistic Regression': {'C': [0.01, 0.1, 1.0, 10.0]},
+    'Random Forest': {'n_estimators': [200], 'max_depth': [3, 5, None], 'min_samples_leaf': [1, 20]},
+    'Gradient Boosting': {'n_estimators': [100, 200], 'learning_rate': [0.05, 0.1], 'max_depth': [2, 3]},
+    'SVM': {'C': [0.1, 1.0, 10.0]},
+}
+
+
+def make_model(name: str, params: dict):
+    """Estimador sklearn da família ``name`` (escala padronizada para LR/SVM)"""
+    from sklearn.ensemble import GradientBoostingClassifier, RandomForestClassifier
+    from sklearn.linear_model import LogisticRegression
+    from sklearn.pipeline import make_pipeline
+    from sklearn.preprocessing import StandardScaler
+    from sklearn.svm import SVC
+
+    if name == 'Logistic Regression':
+        return make_pipeline(StandardScaler(), LogisticRegression(max_iter=1000, **params))
+    if name == 'Random Forest':
+        return RandomForestClassifier(random_state=42, **params)
+    if name == 'Gradient Boosting':
+        return GradientBoostingClassifier(random_state=42, **params)
+    if name == 'SVM':
+        return make_pipeline(StandardScaler(), SVC(probability=True, random_state=42, **params))
+    raise ValueError(f"Modelo desconhecido: {name}")
+
+
+def param_grid(grid: dict) -> list:
+    """Produto cartesiano de ``{'param': [valores]}`` → lista de dicts"""
+    keys = sorted(grid)
+    return [dict(zip(keys, values)) for values in itertools.product(*(grid[k] for k in keys))]
+
+
+def classification_scores(y: np.ndarray, proba: np.ndarray) -> dict:
+    """Métricas no formato de ``model_info.json`` (limiar 0,5)"""
+    from sklearn.metrics import accuracy_score, f1_score, precision_score, recall_score, roc_auc_score
+
+    pred = (proba >= 0.5).astype(int)
+    return {
+        'accuracy': float(accuracy_score(y, pred)),
+        'precision': float(precision_score(y, pred, zero_division=0)),
+        'recall': float(recall_score(y, pred, zero_division=0)),
+        'f1': float(f1_score(y, pred, zero_division=0)),
+        'roc_auc': float(roc_auc_score(y, proba)) if len(np.unique(y)) == 2 else float('nan'),
+    }
+
+
+# =========================
+# MATRIZ E FOLDS
+# =========================
+
+@dataclass(frozen=True)
+class DesignMatrix:
+    """Linhas completas (features + alvo) prontas para o treino"""
+
+    X: np.ndarray           # float32, linhas × features (ordem de feature_columns)
+    y: np.ndarray           # int8, 1 = alta em t+horizon
+    rows: np.ndarray        # posição de cada linha em df_feat (para o expurgo)
+    dates: np.ndarray
+    feature_columns: tuple
+    horizon: int
+    path: Optional[Path] = None     # pasta do cache quando os arrays são mmap
+
+
+def design_matrix(df_feat: pd.DataFrame, matrix, horizon: int = 1) -> DesignMatrix:
+    """Descarta linhas com feature ou alvo ausente (como o ``dropna`` do notebook)"""
+    y = direction_targets(df_feat['close'], (horizon,))[horizon_name(horizon)].to_numpy()
+    valid = ~np.isnan(matrix.values).any(axis=1) & ~np.isnan(y)
+    rows = np.flatnonzero(valid)
+    return DesignMatrix(
+        X=np.ascontiguousarray(matrix.values[rows], dtype=FLOAT_DTYPE),
+        y=y[rows].astype(np.int8),
+        rows=rows,
+        dates=df_feat['date'].to_numpy()[rows],
+        feature_columns=tuple(matrix.columns),
+        horizon=horizon,
+    )
+
+
+def _purged_split(rows: np.ndarray, test_start: int, test_stop: int, horizon: int) -> tuple:
+    # Treino = linhas cujo alvo (t + horizon) termina antes da primeira linha de teste
+    train_stop = int(np.searchsorted(rows, rows[test_start] - horizon, side='left'))
+    return train_stop, int(test_start), int(test_stop)
+
+
+def time_series_splits(rows: np.ndarray, horizon: int = 1, n_splits: int = N_SPLITS,
+                       holdout: float = HOLDOUT):
+    """
+    Folds em janela expansiva sobre o período de desenvolvimento + corte do holdout.
+
+    Cada split é ``(train_stop, test_start, test_stop)``: treino ``[0, train_stop)``,
+    teste ``[test_start, test_stop)`` (posições na ``DesignMatrix``).
+
+    Returns:
+        (lista de folds, split do holdout)
+    """
+    n = len(rows)
+    dev = int(n * (1 - holdout))
+    edges = np.linspace(0, dev, n_splits + 2).astype(int)   # 1º bloco só treina
+    folds = [_purged_split(rows, lo, hi, horizon) for lo, hi in zip(edges[1:-1], edges[2:])]
+    return folds, _purged_split(rows, dev, n, horizon)
+
+
+# =========================
+# CACHE DA MATRIZ (mmap)
+# =========================
+
+def design_key(version: str, feature_columns, horizon: int, n_splits: int, holdout: float) -> str:
+    """``<versão dos dados>-<hash>``; o hash cobre colunas, alvo, folds e o código que monta X/y"""
+    spec = {
+        'feature_columns': list(feature_columns),
+        'horizon': horizon,
+        'n_splits': n_splits,
+        'holdout': holdout,
+        'sources_sha256': {path.name: file_sha256(path) for path in DESIGN_SOURCES},
+    }
+    digest = hashlib.sha1(json.dumps(spec, sort_keys=True).encode()).hexdigest()[:12]
+    return f"{version}-{digest}"
+
+
+def save_design(design: DesignMatrix, splits, folder) -> Path:
+    """Grava X, y, linhas, datas e folds (última linha de ``splits.npy`` = holdout)"""
+    folder = Path(folder)
+    folder.parent.mkdir(parents=True, exist_ok=True)
+    folds, final = splits
+    tmp = Path(tempfile.mkdtemp(prefix=f'.{folder.name}.', dir=folder.parent))
+    try:
+        np.save(tmp / 'X.npy', design.X)
+        np.save(tmp / 'y.npy', design.y)
+        np.save(tmp / 'rows.npy', design.rows)
+        np.save(tmp / 'dates.npy', design.dates.view('int64'))
+        np.save(tmp / 'splits.npy', np.array(list(folds) + [final], dtype=np.int64))
+        with open(tmp / HEADER_FILE, 'w') as f:
+            json.dump({'feature_columns': list(design.feature_columns), 'horizon': design.horizon,
+                       'date_dtype': str(design.dates.dtype), 'rows': len(design.y),
+                       'created': datetime.now().isoformat()}, f, indent=2)
+        os.rename(tmp, folder)
+    except OSError:
+        shutil.rmtree(tmp, ignore_errors=True)
+        if not (folder / HEADER_FILE).exists():
+            raise
+    return folder
+
+
+def open_design(folder):
+    """
+    ``(DesignMatrix, (folds, holdout))`` com os arrays mapeados em memória
+    (somente leitura), ou ``None`` se a entrada não existe.
+    """
+    folder = Path(folder)
+    try:
+        with open(folder / HEADER_FILE, 'r') as f:
+            header = json.load(f)
+        load = lambda name: np.load(folder / f'{name}.npy', mmap_mode='r')
+        design = DesignMatrix(
+            X=load('X'),
+            y=load('y'),
+            rows=load('rows'),
+            dates=load('dates').view(header['date_dtype']),
+            feature_columns=tuple(header['feature_columns']),
+            horizon=header['horizon'],
+            path=folder,
+        )
+        splits = [tuple(int(v) for v in row) for row in load('splits')]
+    except (OSError, KeyError, ValueError):
+        return None
+    return design, (splits[:-1], splits[-1])
+
+
+def prune_designs(cache_dir=DESIGN_CACHE_DIR, keep: int = KEEP_DESIGNS) -> None:
+    """Mantém só as ``keep`` entradas mais recentes do cache"""
+    entries = sorted((p for p in Path(cache_dir).iterdir()
+                      if not p.name.startswith('.') and (p / HEADER_FILE).exists()),
+                     key=lambda p: p.stat().st_mtime_ns, reverse=True)
+    for old in entries[keep:]:
+        shutil.rmtree(old, ignore_errors=True)
+
+
+def cached_design(data_path=UNIFIED_PATH, feature_columns=None, horizon: int = 1,
+                  n_splits: int = N_SPLITS, holdout: float = HOLDOUT, cache_dir=DESIGN_CACHE_DIR):
+    """
+    ``DesignMatrix`` + folds do cache; na primeira chamada para a versão
+    dos dados/especificação, calcula as features, grava e abre o cache.
+
+    Returns:
+        (DesignMatrix com arrays mmap, (folds, holdout))
+    """
+    feature_columns = tuple(feature_columns or read_feature_columns(FEATURE_COLUMNS_PATH))
+    folder = Path(cache_dir) / design_key(data_version(data_path), feature_columns, horizon, n_splits, holdout)
+    cached = open_design(folder)
+    if cached is not None:
+        return cached
+
+    _, df_feat, matrix = compute_features(load_unified_data(data_path), feature_columns)
+    design = design_matrix(df_feat, matrix, horizon)
+    save_design(design, time_series_splits(design.rows, horizon, n_splits, holdout), folder)
+    prune_designs(cache_dir)
+    return open_design(folder)
+
+
+# =========================
+# TENTATIVAS (processos)
+# =========================
+
+def share_design(design: DesignMatrix) -> SharedArrays:
+    """X e y em memória compartilhada (uma cópia para todas as tentativas)"""
+    shared = SharedArrays({
+        'X': (design.X.shape, FLOAT_DTYPE),
+        'y': (design.y.shape, np.int8),
+    })
+    shared['X'][:] = design.X
+    shared['y'][:] = design.y
+    return shared
+
+
+def _attach(source):
+    """(X, y, fechar) a partir da pasta do cache (mmap) ou do spec do bloco compartilhado"""
+    if isinstance(source, str):
+        folder = Path(source)
+        return np.load(folder / 'X.npy', mmap_mode='r'), np.load(folder / 'y.npy', mmap_mode='r'), lambda: None
+    shared = SharedArrays.attach(source)
+    return shared['X'], shared['y'], shared.close
+
+
+def _fit_score(source, columns, name: str, params: dict, split: tuple, return_model: bool = False):
+    X, y, close = _attach(source)
+    try:
+        train_stop, test_start, test_stop = split
+        model = make_model(name, params)
+        model.fit(pd.DataFrame(X[:train_stop], columns=columns), y[:train_stop])
+        proba = model.predict_proba(pd.DataFrame(X[test_start:test_stop], columns=columns))[:, 1]
+        scores = classification_scores(y[test_start:test_stop], proba)
+        return (scores, model) if return_model else scores
+    finally:
+        close()
+
+
+@dataclass(frozen=True)
+class SearchResult:
+    """Resultado da busca: tentativas, melhores parâmetros e modelos do holdout"""
+
+    trials: pd.DataFrame    # uma linha por (modelo, parâmetros), média/desvio na validação
+    best_params: dict       # {modelo: parâmetros}
+    holdout: dict           # {modelo: métricas no holdout}
+    models: dict            # {modelo: estimador treinado no período de desenvolvimento}
+    winner: str
+    folds: list
+    holdout_split: tuple
+    seconds: float
+
+
+def search(design: DesignMatrix, candidates=CANDIDATES, n_splits: int = N_SPLITS,
+           holdout: float = HOLDOUT, scoring: str = SCORING, workers: Optional[int] = None,
+           executor=None, splits=None) -> SearchResult:
+    """
+    Busca em grade com validação temporal expurgada, tentativas em paralelo.
+
+    Cada (modelo, parâmetros, fold) é uma tarefa independente do pool; o
+    melhor conjunto de cada família é retreinado no período de
+    desenvolvimento e avaliado no holdout. ``splits``: (folds, holdout) já
+    calculados (ex.: do cache); senão saem de ``time_series_splits``.
+    Com ``design.path`` os processos abrem o cache direto; senão X/y vão
+    para memória compartilhada.
+    """
+    start = time.perf_counter()
+    workers = workers or default_workers()
+    folds, final = splits or time_series_splits(design.rows, design.horizon, n_splits, holdout)
+    trials = [(name, params) for name, grid in candidates.items() for params in param_grid(grid)]
+    tasks = [(name, params, split) for name, params in trials for split in folds]
+    columns = list(design.feature_columns)
+
+    with (share_design(design) if design.path is None else nullcontext()) as shared:
+        source = str(design.path) if shared is None else shared.spec
+        pool = None if workers == 1 and executor is None else executor or _executor(workers)
+        run = map if pool is None else pool.map
+        try:
+            scores = list(run(_fit_score, *zip(*[(source, columns, *task) for task in tasks])))
+
+            rows = []
+            for i, (name, params) in enumerate(trials):
+                fold_scores = [s[scoring] for s in scores[i * len(folds):(i + 1) * len(folds)]]
+                rows.append({'modelo': name, 'params': params,
+                             'media': float(np.mean(fold_scores)), 'desvio': float(np.std(fold_scores)),
+                             'folds': fold_scores})
+            table = pd.DataFrame(rows)
+            best = table.loc[table.groupby('modelo', sort=False)['media'].idxmax()]
+            best_params = dict(zip(best['modelo'], best['params']))
+
+            refits = list(run(_fit_score, *zip(*[(source, columns, name, params, final, True)
+                                                 for name, params in best_params.items()])))
+        finally:
+            if pool is not None and executor is None:
+                pool.shutdown()
+
+    return SearchResult(
+        trials=table,
+        best_params=best_params,
+        holdout={name: s for name, (s, _) in zip(best_params, refits)},
+        models={name: m for name, (_, m) in zip(best_params, refits)},
+        winner=best.loc[best['media'].idxmax(), 'modelo'],
+        folds=folds,
+        holdout_split=final,
+        seconds=time.perf_counter() - start,
+    )
+
+
+# =========================
+# ARTEFATOS
+# =========================
+
+def model_info(result: SearchResult, design: DesignMatrix, scoring: str = SCORING) -> dict:
+    """``model_info.json`` no formato existente + parâmetros e validação cruzada"""
+    winner = result.winner
+    best = result.trials.loc[result.trials.groupby('modelo', sort=False)['media'].idxmax()]
+    train_stop, test_start, test_stop = result.holdout_split
+    return {
+        'model_name': winner,
+        **result.holdout[winner],
+        'training_date': datetime.now().isoformat(),
+        'all_models_metrics': result.holdout,
+        'best_params': result.best_params[winner],
+        'feature_count': len(design.feature_columns),
+        'validation': {
+            'scoring': scoring,
+            'n_splits': len(result.folds),
+            'horizon': design.horizon,
+            'n_train': train_stop,
+            'n_test': test_stop - test_start,
+            'test_start': str(pd.Timestamp(design.dates[test_start]).date()),
+            'cv': {row.modelo: {'mean': row.media, 'std': row.desvio, 'params': row.params}
+                   for row in best.itertuples()},
+        },
+    }
+
+
+def write_outputs(result: SearchResult, design: DesignMatrix, out_dir='.') -> dict:
+    """
+    Grava ``best_model.pkl`` (+ formato rápido para árvores), ``feature_columns.json``
+    e ``model_info.json`` em ``out_dir``; nada muda se alguma etapa falhar.
+    """
+    out_dir = Path(out_dir)
+    model = result.models[result.winner]
+    info = model_info(result, design)
+
+    staging = Path(tempfile.mkdtemp(prefix='.training-', dir=out_dir))
+    try:
+        with open(staging / MODEL_PATH, 'wb') as f:
+            pickle.dump(model, f, protocol=pickle.HIGHEST_PROTOCOL)
+        with open(staging / FEATURE_COLUMNS_PATH, 'w') as f:
+            json.dump({'feature_columns': list(design.feature_columns)}, f, indent=2)
+        with open(staging / MODEL_INFO_PATH, 'w') as f:
+            json.dump(info, f, indent=2)
+        fast = None
+        if type(model).__name__ in ('GradientBoostingClassifier', 'RandomForestClassifier'):
+            fast = export_tree_ensemble(model, artifact_dir(staging / MODEL_PATH),
+                                        source_sha256=file_sha256(staging / MODEL_PATH))
+
+        # Formato rápido primeiro: ele só é usado se o sha256 bater com o .pkl
+        if fast is not None:
+            replace_dir(fast, artifact_dir(out_dir / MODEL_PATH))
+        for name in (MODEL_PATH, FEATURE_COLUMNS_PATH, MODEL_INFO_PATH):
+            os.replace(staging / name, out_dir / name)
+    finally:
+        shutil.rmtree(staging, ignore_errors=True)
+    return info
+
+
+if __name__ == '__main__':
+    args = [a for a in sys.argv[1:] if a != '--publish']
+    if args[:1] != ['search']:
+        print(__doc__)
+        sys.exit(1)
+
+    design, splits = cached_design()
+    workers = int(args[1]) if len(args) > 1 else None
+    result = search(design, workers=workers, splits=splits)
+
+    print(result.trials.drop(columns='folds').sort_values('media', ascending=False)
+          .to_string(index=False, float_format='%.4f'))
+    info = write_outputs(result, design)
+    print(f"✅ {result.winner} {result.best_params[result.winner]} | holdout acurácia "
+          f"{info['accuracy']:.3f} | ROC-AUC {info['roc_auc']:.3f} | {result.seconds:.1f}s")
+
+    if '--publish' in sys.argv:
+        from ibov.registry import ModelRegistry
+
+        print(f"✅ Versão publicada e ativada: {ModelRegistry().publish()}")